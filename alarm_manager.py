@@ -0,0 +1,350 @@
+"""프로세스 공유 낙상 알람 상태: cutoff_top20 교차 판정 1회 + 중복 제거 + 세션 push + 중앙 확인 기록.
+
+- 알람 상태는 환자별 dict 1개입니다 (new_state 참고). 점수가 cutoff_top20 를 위로 넘으면 새 episode 로
+  'raised', 아래로 내려가면 'cleared', 간호사가 확인하면 'confirmed' 이벤트가 생기고 version 이 증가합니다.
+  cutoff 위/아래가 그대로인 갱신은 dict 조회 1번으로 끝나므로 비용은 O(변화) 입니다 (세션 수와 무관).
+- 같은 episode 의 중복 raised, 이미 확인된 알람의 중복 confirm (여러 스테이션 동시 클릭)은 무시합니다.
+- Subscription: 세션이 보고 있는 환자를 watch 하면 그 환자 이벤트만 세션 대기열로 push 됩니다
+  (환자별 watcher 색인 -> 이벤트당 O(그 환자를 보는 세션 수)). 세션이 사라지면 weakref 로 자동 해제.
+- backend: 기본 MemoryBackend (프로세스 내). SQLiteBackend 는 상태/이벤트를 WAL DB 에 남겨 재시작 후에도
+  확인 이력이 유지되고, 같은 DB 를 쓰는 다른 워커 프로세스의 이벤트를 sync() (백그라운드 폴링)로 받아옵니다.
+  전이 판정은 backend 잠금/트랜잭션(BEGIN IMMEDIATE) 안에서 현재 상태를 다시 읽고 하므로,
+  여러 세션/프로세스가 같은 교차를 동시에 봐도 이벤트는 1번만 기록됩니다.
+- resources (예: model_registry.ModelRegistry.active) 를 주면 cutoff 는 갱신마다 현재 primary 의 cutoff_top20 입니다
+  (모델 hot swap 후에도 위험군과 같은 기준으로 알람 판정).
+"""
+import json
+import math
+import sqlite3
+import threading
+import time
+import weakref
+
+import numpy as np
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+RAISED = "raised"
+CLEARED = "cleared"
+CONFIRMED = "confirmed"
+
+
+def new_state(patient_id):
+    return {
+        "patient_id": str(patient_id), "active": False, "episode": 0, "version": 0,
+        "raised_at": None, "cleared_at": None, "score": None, "display_score": None, "factors": [],
+        "confirmed_by": None, "confirmed_at": None, "confirmed_score": None, "confirmed_factors": [],
+    }
+
+
+def flashing(state):
+    """확인되지 않은 활성 알람인지 (대시보드 alarm-active 표시 기준)."""
+    return bool(state and state["active"] and not state["confirmed_by"])
+
+
+    # --------------------------------------------------------------------------------
+# 1. backend (상태 저장 + 전이 원자성)
+    # --------------------------------------------------------------------------------
+class MemoryBackend:
+    """프로세스 내 backend. 다른 프로세스와 공유하지 않습니다."""
+
+    shared = False
+
+    def __init__(self):
+        self._states = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            return dict(self._states), self._version
+
+    def apply_many(self, items):
+        """[(patient_id, transition)] -> 실제로 바뀐 [(version, kind, state)]. transition(현재 상태|None) -> (kind, 새 상태)|None."""
+        events = []
+        with self._lock:
+            for pid, transition in items:
+                out = transition(self._states.get(pid))
+                if out is None:
+                    continue
+                self._version += 1
+                kind, state = out
+                state = {**state, "version": self._version}
+                self._states[pid] = state
+                events.append((self._version, kind, state))
+        return events
+
+    def events_since(self, version):
+        return []
+
+    def close(self):
+        pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alarm_state (
+    patient_id TEXT PRIMARY KEY,
+    version    INTEGER NOT NULL,
+    state      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alarm_events (
+    version    INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    ts         TEXT NOT NULL,
+    state      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alarm_events_patient ON alarm_events (patient_id, version);
+"""
+
+
+class SQLiteBackend:
+    """SQLite WAL backend: 알람 상태 + 이벤트 로그 (감사/확인 이력). 여러 프로세스가 같은 파일을 공유."""
+
+    shared = True
+
+    def __init__(self, path, timeout_s=5.0):
+        self.path = str(path)
+        self._conn = sqlite3.connect(self.path, timeout=timeout_s, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT patient_id, version, state FROM alarm_state").fetchall()
+            version = self._conn.execute("SELECT COALESCE(MAX(version), 0) FROM alarm_events").fetchone()[0]
+        return {pid: {**json.loads(s), "version": v} for pid, v, s in rows}, version
+
+    def apply_many(self, items):
+        events = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # 쓰기 잠금을 먼저 잡고 현재 상태를 다시 읽음 (프로세스 간 중복 제거)
+            try:
+                for pid, transition in items:
+                    row = self._conn.execute("SELECT version, state FROM alarm_state WHERE patient_id = ?", (pid,)).fetchone()
+                    out = transition({**json.loads(row[1]), "version": row[0]} if row else None)
+                    if out is None:
+                        continue
+                    kind, state = out
+                    payload = json.dumps({k: v for k, v in state.items() if k != "version"}, ensure_ascii=False)
+                    version = self._conn.execute(
+                        "INSERT INTO alarm_events (patient_id, kind, ts, state) VALUES (?, ?, ?, ?)",
+                        (pid, kind, time.strftime(TS_FORMAT), payload)).lastrowid
+                    self._conn.execute(
+                        "INSERT INTO alarm_state (patient_id, version, state) VALUES (?, ?, ?) "
+                        "ON CONFLICT(patient_id) DO UPDATE SET version = excluded.version, state = excluded.state",
+                        (pid, version, payload))
+                    events.append((version, kind, {**state, "version": version}))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return events
+
+    def events_since(self, version):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, kind, state FROM alarm_events WHERE version > ? ORDER BY version", (int(version),)).fetchall()
+        return [(v, kind, {**json.loads(s), "version": v}) for v, kind, s in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+    # --------------------------------------------------------------------------------
+# 2. 세션 구독
+    # --------------------------------------------------------------------------------
+class Subscription:
+    """세션 1개의 알람 변화 대기열. drain() 으로 (patient_id -> (kind, state)) 를 꺼냅니다."""
+
+    def __init__(self, manager):
+        self._manager = weakref.ref(manager)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.watching = None  # None = 구독 안 함, "*" = 전체, frozenset = 환자 목록
+
+    def watch(self, patient_ids="*"):
+        """관심 환자 목록 교체 ("*" 는 병동 전체). 목록이 같으면 아무 일도 하지 않습니다."""
+        target = "*" if patient_ids == "*" else frozenset(str(p) for p in patient_ids)
+        manager = self._manager()
+        if target != self.watching and manager is not None:
+            manager._rewatch(self, self.watching, target)
+            self.watching = target
+
+    def _push(self, kind, state):
+        with self._lock:
+            self._pending[state["patient_id"]] = (kind, state)
+
+    def drain(self):
+        with self._lock:
+            out, self._pending = self._pending, {}
+        return out
+
+    def close(self):
+        self.watch(())
+
+
+    # --------------------------------------------------------------------------------
+# 3. 알람 관리자
+    # --------------------------------------------------------------------------------
+class AlarmManager:
+    """cutoff_top20 교차 알람의 단일 원본 (st.cache_resource 로 프로세스당 1개)."""
+
+    def __init__(self, cutoff_top20, backend=None, sync_interval_s=1.0, resources=None):
+        self._cutoff = float(cutoff_top20)
+        self._resources = resources  # () -> 현재 primary resources (없으면 cutoff_top20 고정)
+        self.backend = backend or MemoryBackend()
+        self._lock = threading.Lock()
+        self._states, self._synced = self.backend.load()
+        self._watchers = {}                # patient_id -> WeakSet[Subscription]
+        self._all = weakref.WeakSet()      # 병동 전체 구독
+        self.counters = {"updates": 0, "transitions": 0, "deduped": 0}
+        self._stop = threading.Event()
+        self._poller = None
+        if self.backend.shared:
+            self._poller = threading.Thread(target=self._poll, args=(sync_interval_s,), name="alarm-sync", daemon=True)
+            self._poller.start()
+
+    def close(self):
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join()
+        self.backend.close()
+
+    @property
+    def cutoff(self):
+        if self._resources is not None:
+            return float(self._resources()['cutoff_top20'])
+        return self._cutoff
+
+    @cutoff.setter
+    def cutoff(self, value):
+        self._cutoff = float(value)
+
+    # ---- 조회 ----
+    def state(self, patient_id):
+        return self._states.get(str(patient_id))
+
+    def active(self, unconfirmed_only=False):
+        """활성 알람 상태 목록 (발생 시각 순)."""
+        states = [s for s in list(self._states.values()) if s["active"] and not (unconfirmed_only and s["confirmed_by"])]
+        return sorted(states, key=lambda s: s["raised_at"] or "")
+
+    # ---- 점수 갱신 ----
+    def update(self, patient_id, raw_score, display_score=None, factors=None, ts=None):
+        """환자 점수 1건 반영. cutoff 교차가 없으면 None, 있으면 (version, kind, state)."""
+        pid = str(patient_id)
+        self.counters["updates"] += 1
+        above = _above(raw_score, self.cutoff)
+        cur = self._states.get(pid)
+        if above == bool(cur and cur["active"]):
+            return None
+        events = self._apply([(pid, _crossing(pid, above, raw_score, display_score, factors, ts))])
+        return events[0] if events else None
+
+    def update_many(self, patient_ids, raw_scores, display_scores=None, ts=None):
+        """배치 반영 (census refresh 등). 교차한 환자만 backend 에 1 트랜잭션으로 기록. 반환: 이벤트 목록."""
+        raw = np.asarray(raw_scores, dtype=float)
+        pids = [str(p) for p in patient_ids]
+        self.counters["updates"] += len(pids)
+        above = raw >= self.cutoff  # NaN -> False
+        states = self._states
+        active = np.fromiter((bool(s and s["active"]) for s in map(states.get, pids)), dtype=bool, count=len(pids))
+        rows = np.flatnonzero(above != active)
+        if not len(rows):
+            return []
+        display = None if display_scores is None else np.asarray(display_scores)
+        return self._apply([(pids[i], _crossing(pids[i], bool(above[i]), float(raw[i]),
+                                                None if display is None else display[i], None, ts)) for i in rows])
+
+    def confirm(self, patient_id, user, score=None, factors=None, ts=None):
+        """현재 episode 알람 확인 기록 (중앙). 이미 확인됐거나 활성 알람이 없으면 None."""
+        pid = str(patient_id)
+        ts = ts or time.strftime(TS_FORMAT)
+
+        def transition(cur):
+            if not flashing(cur):
+                return None
+            return CONFIRMED, {**cur, "confirmed_by": user, "confirmed_at": ts,
+                               "confirmed_score": cur["display_score"] if score is None else score,
+                               "confirmed_factors": list(cur["factors"] if factors is None else factors)}
+
+        events = self._apply([(pid, transition)])
+        return events[0] if events else None
+
+    def _apply(self, items):
+        events = self.backend.apply_many(items)
+        self.counters["deduped"] += len(items) - len(events)
+        self._ingest(events)
+        return events
+
+    # ---- 전파 ----
+    def _ingest(self, events):
+        with self._lock:
+            for version, kind, state in events:
+                pid = state["patient_id"]
+                cur = self._states.get(pid)
+                if cur is not None and cur["version"] >= version:
+                    continue  # 이미 반영 (자기 프로세스 이벤트를 sync 로 다시 받은 경우)
+                self._states[pid] = state
+                self.counters["transitions"] += 1
+                for sub in list(self._watchers.get(pid, ())) + list(self._all):
+                    sub._push(kind, state)
+
+    def sync(self):
+        """다른 프로세스가 backend 에 기록한 이벤트 반영. 반환: 새로 읽은 이벤트 수."""
+        events = self.backend.events_since(self._synced)
+        if events:
+            self._synced = events[-1][0]
+            self._ingest(events)
+        return len(events)
+
+    def _poll(self, interval_s):
+        while not self._stop.wait(interval_s):
+            try:
+                self.sync()
+            except sqlite3.Error:
+                pass  # 잠금 경합 등은 다음 주기에 다시 시도
+
+    def subscribe(self, patient_ids="*"):
+        sub = Subscription(self)
+        sub.watch(patient_ids)
+        return sub
+
+    def _rewatch(self, sub, old, new):
+        with self._lock:
+            if old == "*":
+                self._all.discard(sub)
+            elif old:
+                for pid in old:
+                    self._watchers.get(pid, weakref.WeakSet()).discard(sub)
+            if new == "*":
+                self._all.add(sub)
+            else:
+                for pid in new:
+                    self._watchers.setdefault(pid, weakref.WeakSet()).add(sub)
+
+
+def _above(raw_score, cutoff):
+    return raw_score is not None and not math.isnan(raw_score) and raw_score >= cutoff
+
+
+def _crossing(pid, above, raw_score, display_score, factors, ts):
+    """cutoff 교차 전이. backend 안에서 현재 상태로 다시 판정 (이미 반영된 교차면 None -> 중복 제거)."""
+    ts = ts or time.strftime(TS_FORMAT)
+    display_score = None if display_score is None else int(display_score)
+
+    def transition(cur):
+        cur = cur or new_state(pid)
+        if above == cur["active"]:
+            return None
+        if above:
+            return RAISED, {**cur, "active": True, "episode": cur["episode"] + 1, "raised_at": ts, "cleared_at": None,
+                            "score": float(raw_score), "display_score": display_score, "factors": list(factors or []),
+                            "confirmed_by": None, "confirmed_at": None, "confirmed_score": None, "confirmed_factors": []}
+        return CLEARED, {**cur, "active": False, "cleared_at": ts, "score": float(raw_score), "display_score": display_score}
+
+    return transition
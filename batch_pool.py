@@ -0,0 +1,237 @@
+"""멀티프로세스 배치 스코어러 (야간 전체 재원환자 재스코어링 / 과거 encounter back-fill).
+
+- 워커마다 initializer 에서 load_resources 를 한 번만 호출합니다. 학습 점수 참조는
+  score_reference 의 npy mmap 이라 모든 워커가 같은 OS 페이지 캐시를 공유하고,
+  모델은 CompiledScorer 계수(수백 바이트)만 스코어링에 쓰입니다.
+- 입력 파일은 워커가 직접 읽습니다: CSV 는 줄 경계에 맞춘 byte 범위, Parquet 는 row group 단위.
+  부모 프로세스는 chunk 계획만 세우므로 파싱/인코딩/스코어링이 모두 코어 수만큼 병렬화됩니다.
+  (CSV 는 따옴표 안 줄바꿈이 없는 export 를 전제로 합니다.)
+- 워커는 기본 'spawn' 으로 시작해 부모 프로세스 메모리(큰 DataFrame 등)를 물려받지 않으므로
+  워커별 peak RSS 는 chunk 크기에만 비례합니다.
+- 워커는 chunk 마다 점수 KLL sketch 를 만들어 함께 돌려주고, 부모가 pool.live_sketch 로 병합합니다
+  (live_cutoffs: 운영 분포 cutoff 재보정 / drift).
+- 결과는 입력 순서대로 DataFrame chunk 로 흘려보내며, 동시에 진행 중인 chunk 는
+  workers * 2 개로 제한해 부모 메모리도 일정하게 유지합니다.
+"""
+import multiprocessing
+import os
+import resource
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import live_cutoffs
+import scoring
+
+_RES = None  # 워커 프로세스 전역 리소스 (initializer 에서 1회 로딩)
+
+
+def _init_worker(percentile_index):
+    global _RES
+    _RES = scoring.load_resources(percentile_index=percentile_index)
+    _RES['live_sketch'] = None  # chunk 별 sketch 를 부모로 보내므로 워커 전역 sketch 는 쓰지 않음
+
+
+def _peak_rss_mb():
+    """워커 peak RSS (MB). ru_maxrss 는 spawn(fork+exec) 전 부모 peak 를 물려받으므로 VmHWM 우선."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB 단위
+
+
+    # --------------------------------------------------------------------------------
+# 1. 입력 chunk 계획 / 읽기
+    # --------------------------------------------------------------------------------
+def plan_csv_chunks(path, chunk_rows, sample_lines=2000):
+    """CSV 를 약 chunk_rows 행씩 나누는 (header, byte_start, byte_end) 목록. 줄 경계에 정렬."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        sample = [f.readline() for _ in range(sample_lines)]
+        avg_line = max(1, sum(map(len, sample)) // max(1, sum(1 for s in sample if s)))
+        step = max(1, chunk_rows * avg_line)
+
+        chunks, start = [], data_start
+        while start < size:
+            f.seek(min(start + step, size))
+            if f.tell() < size:
+                f.readline()  # 다음 줄 시작으로 정렬
+            end = f.tell()
+            chunks.append((header, start, end))
+            start = end
+    return chunks
+
+
+def read_csv_range(path, header, start, end, usecols=None):
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(BytesIO(header + data), usecols=usecols)
+
+
+def plan_parquet_chunks(path):
+    import pyarrow.parquet as pq
+    return [(i,) for i in range(pq.ParquetFile(path).num_row_groups)]
+
+
+def read_parquet_group(path, group, usecols=None):
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(path).read_row_group(group, columns=usecols).to_pandas()
+
+
+def iter_file_chunks(path, chunk_rows, columns):
+    """단일 프로세스 순차 읽기: chunk_rows 행씩 DataFrame yield (columns 에 있는 컬럼만, 없는 컬럼은 무시).
+
+    CSV 는 pandas chunked reader, Parquet 는 pyarrow iter_batches 라 메모리는 chunk 크기에만 비례합니다.
+    """
+    columns = set(columns)
+    if _file_kind(path) == "csv":
+        with pd.read_csv(path, chunksize=int(chunk_rows), usecols=lambda c: c in columns) as reader:
+            yield from reader
+    else:
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        cols = [c for c in pf.schema_arrow.names if c in columns]
+        for batch in pf.iter_batches(batch_size=int(chunk_rows), columns=cols):
+            yield batch.to_pandas()
+
+
+def file_columns(path):
+    """입력 파일 컬럼 이름 (CSV header / Parquet schema)."""
+    if _file_kind(path) == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    import pyarrow.parquet as pq
+    return list(pq.ParquetFile(path).schema_arrow.names)
+
+
+def _file_kind(path):
+    suffix = Path(path).suffix.lower()
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    if suffix in (".csv", ".txt"):
+        return "csv"
+    raise ValueError(f"지원하지 않는 입력 형식: {path} (csv/parquet)")
+
+
+    # --------------------------------------------------------------------------------
+# 2. 워커 작업
+    # --------------------------------------------------------------------------------
+def result_frame(frame, out, keep_cols=()):
+    """입력 chunk 의 keep_cols + score_arrays 결과 컬럼 DataFrame."""
+    result = frame[list(keep_cols)].reset_index(drop=True) if keep_cols else pd.DataFrame(index=range(len(frame)))
+    for col in scoring.RESULT_COLUMNS:
+        result[col] = out[col]
+    return result
+
+
+def _score_frame(frame, keep_cols):
+    out = scoring.score_arrays(frame, _RES)
+    result = result_frame(frame, out, keep_cols)
+    sketch = live_cutoffs.KLLSketch()
+    sketch.update_many(out["raw_score"])
+    return result, sketch.to_bytes()
+
+
+def _usecols(keep_cols):
+    return lambda c: c in set(_RES['raw_cols']) | set(keep_cols)
+
+
+def _work_csv(path, header, start, end, keep_cols):
+    frame = read_csv_range(path, header, start, end, usecols=_usecols(keep_cols))
+    return (*_score_frame(frame, keep_cols), os.getpid(), _peak_rss_mb())
+
+
+def _work_parquet(path, group, keep_cols):
+    import pyarrow.parquet as pq
+    names = pq.ParquetFile(path).schema_arrow.names
+    cols = [c for c in names if c in set(_RES['raw_cols']) | set(keep_cols)]
+    frame = read_parquet_group(path, group, usecols=cols)
+    return (*_score_frame(frame, keep_cols), os.getpid(), _peak_rss_mb())
+
+
+def _work_frame(frame, keep_cols):
+    return (*_score_frame(frame, keep_cols), os.getpid(), _peak_rss_mb())
+
+
+    # --------------------------------------------------------------------------------
+# 3. Pool
+    # --------------------------------------------------------------------------------
+class BatchScoringPool:
+    """프로세스 풀 배치 스코어러.
+
+    with BatchScoringPool(workers=8, chunk_rows=200_000, keep_cols=["encounter_id"]) as pool:
+        for part in pool.score_file("encounters.csv"):
+            ...  # 입력 순서대로 chunk 결과 (keep_cols + raw_score/display_score/risk_group/top_percent)
+    """
+
+    def __init__(self, workers=None, chunk_rows=100_000, keep_cols=(), percentile_index="exact", mp_context=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_rows = int(chunk_rows)
+        self.keep_cols = tuple(keep_cols)
+        self.worker_peak_rss_mb = {}
+        self.rows = 0
+        self.live_sketch = live_cutoffs.KLLSketch()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=mp_context or multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(percentile_index,),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _ordered(self, tasks):
+        """작업을 최대 workers*2 개만 동시에 제출하고 제출 순서대로 결과 yield."""
+        window = deque()
+        for fn, *args in tasks:
+            window.append(self._executor.submit(fn, *args))
+            if len(window) >= self.workers * 2:
+                yield self._collect(window.popleft())
+        while window:
+            yield self._collect(window.popleft())
+
+    def _collect(self, future):
+        frame, sketch, pid, rss = future.result()
+        self.live_sketch.merge(live_cutoffs.KLLSketch.from_bytes(sketch))
+        self.worker_peak_rss_mb[pid] = max(rss, self.worker_peak_rss_mb.get(pid, 0.0))
+        self.rows += len(frame)
+        return frame
+
+    def score_file(self, path):
+        path = str(path)
+        if _file_kind(path) == "csv":
+            tasks = ((_work_csv, path, h, s, e, self.keep_cols) for h, s, e in plan_csv_chunks(path, self.chunk_rows))
+        else:
+            tasks = ((_work_parquet, path, g, self.keep_cols) for (g,) in plan_parquet_chunks(path))
+        return self._ordered(tasks)
+
+    def score_frame(self, frame):
+        starts = range(0, len(frame), self.chunk_rows)
+        return self._ordered((_work_frame, frame.iloc[s:s + self.chunk_rows], self.keep_cols) for s in starts)
+
+
+def score_file(path, workers=None, chunk_rows=100_000, keep_cols=()):
+    """파일 전체를 스코어링해 하나의 DataFrame 으로 반환 (작은 파일/노트북 용)."""
+    with BatchScoringPool(workers=workers, chunk_rows=chunk_rows, keep_cols=keep_cols) as pool:
+        parts = list(pool.score_file(path))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=list(keep_cols) + scoring.RESULT_COLUMNS)
+
+
+def worker_rss_summary(pool):
+    rss = np.array(list(pool.worker_peak_rss_mb.values()) or [np.nan])
+    return float(np.nanmax(rss)), float(np.nanmean(rss))
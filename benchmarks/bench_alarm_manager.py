@@ -0,0 +1,88 @@
+"""공유 알람 관리자: 세션 수백 개 x 병동 500명 갱신 비용 (O(변화) vs 세션별 재계산).
+
+실행: python benchmarks/bench_alarm_manager.py [sessions]
+- 세션별 재계산: 기존처럼 각 세션이 모든 환자의 cutoff 교차/확인 상태를 스스로 판정 (sessions x patients)
+- 공유 관리자: 병동 갱신 1번(update_many) -> 교차한 환자만 전이 -> 그 환자를 보는 세션에만 push
+- SQLite backend: 같은 갱신을 DB 기록 포함으로, confirm 1건 지연
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from common import best_of
+
+import alarm_manager
+
+CUTOFF = 0.0255
+PATIENTS = 500
+TICKS = 50
+
+
+def score_ticks(seed=0):
+    """병동 점수 TICKS 회 갱신. 매 회 약 5% 환자 점수가 바뀌고 일부가 cutoff 를 넘나듦."""
+    rng = np.random.default_rng(seed)
+    raw = rng.gamma(2.0, 0.01, PATIENTS)
+    ticks = []
+    for _ in range(TICKS):
+        raw = raw.copy()
+        idx = rng.choice(PATIENTS, PATIENTS // 20, replace=False)
+        raw[idx] = rng.gamma(2.0, 0.01, len(idx))
+        ticks.append(raw)
+    return ticks
+
+
+def per_session(ticks, sessions, pids):
+    """기존 방식: 세션마다 환자별 확인 상태 dict 를 들고 매 갱신마다 전체 환자를 다시 판정."""
+    states = [dict.fromkeys(pids, False) for _ in range(sessions)]
+    for raw in ticks:
+        above = (raw >= CUTOFF).tolist()
+        for confirmed in states:
+            for pid, a in zip(pids, above):
+                if not a and confirmed[pid]:
+                    confirmed[pid] = False
+
+
+def shared(ticks, sessions, pids, backend=None):
+    mgr = alarm_manager.AlarmManager(CUTOFF, backend)
+    subs = [mgr.subscribe([pids[i % len(pids)]]) for i in range(sessions)]
+    pushed = 0
+    for raw in ticks:
+        mgr.update_many(pids, raw)
+        for sub in subs:
+            pushed += len(sub.drain())
+    mgr.close()
+    return pushed, mgr.counters
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    pids = [f"P{i:04d}" for i in range(PATIENTS)]
+    ticks = score_ticks()
+    crossings = sum(int(((a >= CUTOFF) != (b >= CUTOFF)).sum()) for a, b in zip(ticks[1:], ticks[:-1]))
+    print(f"세션 {sessions}, 환자 {PATIENTS}, 갱신 {TICKS}회 (cutoff 교차 약 {crossings}건)")
+
+    t_naive = best_of(lambda: per_session(ticks, sessions, pids), repeat=1) / TICKS
+    t_shared = best_of(lambda: shared(ticks, sessions, pids), repeat=3) / TICKS
+    pushed, counters = shared(ticks, sessions, pids)
+    print(f"세션별 재계산       {t_naive * 1e3:9.2f} ms / 갱신")
+    print(f"공유 관리자 (memory) {t_shared * 1e3:9.2f} ms / 갱신  "
+          f"(전이 {counters['transitions']}건, 세션 push {pushed}건)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "alarms.db")
+        t_sqlite = best_of(lambda: shared(ticks, sessions, pids, alarm_manager.SQLiteBackend(path)), repeat=1) / TICKS
+        mgr = alarm_manager.AlarmManager(CUTOFF, alarm_manager.SQLiteBackend(path))
+        flashing = [s["patient_id"] for s in mgr.active(unconfirmed_only=True)]
+        t0 = time.perf_counter()
+        for pid in flashing:
+            mgr.confirm(pid, "김분당")
+        t_confirm = (time.perf_counter() - t0) / max(len(flashing), 1)
+        mgr.close()
+    print(f"공유 관리자 (sqlite) {t_sqlite * 1e3:9.2f} ms / 갱신,  confirm {t_confirm * 1e3:.2f} ms / 건")
+
+
+if __name__ == "__main__":
+    main()
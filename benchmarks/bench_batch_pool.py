@@ -0,0 +1,56 @@
+"""멀티프로세스 배치 스코어러 scaling: 워커 수별 rows/sec, speedup, 워커 peak RSS.
+
+실행: python benchmarks/bench_batch_pool.py [--rows 1000000] [--chunk-rows 100000]
+합성 encounter CSV 를 임시 파일로 만든 뒤 워커 1, 2, 4, ... (코어 수까지) 로 스코어링합니다.
+결과 순서/값은 단일 프로세스 score_arrays 와 비교해 검증합니다.
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from common import synthetic_frame
+
+import batch_pool
+import scoring
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--chunk-rows", type=int, default=100_000)
+    args = ap.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, *[w for w in (2, 4, 8, 16, 32) if w <= cores], cores})
+    frame = synthetic_frame(args.rows)
+    frame.insert(0, "encounter_id", np.arange(args.rows))
+    expected = scoring.score_arrays(frame, scoring.load_resources())["raw_score"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "encounters.csv"
+        frame.to_csv(path, index=False)
+        print(f"rows={args.rows:,} ({path.stat().st_size / 1e6:.0f} MB CSV), chunk_rows={args.chunk_rows:,}, cores={cores}")
+        print(f"{'workers':>7} {'rows/sec':>12} {'speedup':>8} {'peak RSS/worker (max, mean MB)':>32}")
+        base = None
+        for workers in counts:
+            with batch_pool.BatchScoringPool(workers=workers, chunk_rows=args.chunk_rows, keep_cols=["encounter_id"]) as pool:
+                list(pool.score_frame(frame.head(1000)))  # 워커 기동/리소스 로딩 제외
+                t0 = time.perf_counter()
+                ids, raw = [], []
+                for part in pool.score_file(path):
+                    ids.append(part["encounter_id"].to_numpy())
+                    raw.append(part["raw_score"].to_numpy())
+                sec = time.perf_counter() - t0
+                peak, mean = batch_pool.worker_rss_summary(pool)
+            assert np.array_equal(np.concatenate(ids), frame["encounter_id"].to_numpy()), "순서 불일치"
+            assert np.allclose(np.concatenate(raw), expected, rtol=0, atol=1e-12, equal_nan=True)
+            rate = args.rows / sec
+            base = base or rate
+            print(f"{workers:>7} {rate:>12,.0f} {rate / base:>7.2f}x {peak:>20.0f}, {mean:.0f}")
+
+
+if __name__ == "__main__":
+    main()
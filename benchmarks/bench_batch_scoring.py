@@ -0,0 +1,22 @@
+"""배치 스코어링 처리량 (rows/sec): 1, 100, 10k, 1M 행.
+
+실행: python benchmarks/bench_batch_scoring.py
+"""
+from common import best_of, synthetic_frame
+
+import scoring
+
+SIZES = [1, 100, 10_000, 1_000_000]
+
+
+def main():
+    res = scoring.load_resources()
+    print(f"{'rows':>10} {'sec':>10} {'rows/sec':>14}")
+    for n in SIZES:
+        frame = synthetic_frame(n)
+        sec = best_of(lambda: scoring.score_batch(frame, res), repeat=1 if n >= 1_000_000 else 3)
+        print(f"{n:>10,} {sec:>10.4f} {n / sec:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
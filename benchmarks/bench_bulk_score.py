@@ -0,0 +1,57 @@
+"""일괄 스코어링 CLI: 입력 크기별 rows/sec 와 peak RSS (chunk 스트리밍이면 RSS 는 입력 크기와 무관).
+
+실행: python benchmarks/bench_bulk_score.py [--rows 100000,1000000] [--chunk-rows 100000]
+합성 encounter 를 CSV / Parquet 임시 파일로 만든 뒤 bulk_score.py 를 별도 프로세스로 실행합니다
+(peak RSS 가 프로세스 단위라 크기마다 새 프로세스). 첫 크기의 출력은 score_arrays 와 비교해 검증합니다.
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from common import synthetic_frame
+
+import scoring
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def run_cli(src, out, chunk_rows):
+    proc = subprocess.run([sys.executable, str(ROOT / "bulk_score.py"), str(src), "-o", str(out),
+                           "--keep", "encounter_id", "--chunk-rows", str(chunk_rows)],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    return proc.stderr.strip().splitlines()[-1]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", default="100000,1000000")
+    ap.add_argument("--chunk-rows", type=int, default=100_000)
+    args = ap.parse_args()
+    sizes = [int(n) for n in args.rows.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for i, n in enumerate(sizes):
+            frame = synthetic_frame(n)
+            frame.insert(0, "encounter_id", np.arange(n))
+            for fmt in ("csv", "parquet"):
+                src, out = tmp / f"in_{n}.{fmt}", tmp / f"out_{n}.{fmt}"
+                if fmt == "csv":
+                    frame.to_csv(src, index=False)
+                else:
+                    frame.to_parquet(src, row_group_size=args.chunk_rows)
+                print(f"{fmt:>7} {n:>10,}: {run_cli(src, out, args.chunk_rows)}")
+                if i == 0:
+                    got = pd.read_csv(out) if fmt == "csv" else pd.read_parquet(out)
+                    expected = scoring.score_arrays(frame, scoring.load_resources())["raw_score"]
+                    assert (got["encounter_id"].to_numpy() == np.arange(n)).all()
+                    assert np.allclose(got["raw_score"].to_numpy(), expected, rtol=0, atol=1e-12, equal_nan=True)
+            del frame
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""병동 census refresh 비용 (500병상 기준).
+
+실행: python benchmarks/bench_census.py [n_patients]
+- 전체 refresh: 첫 refresh (모든 환자 스코어링 + 위험요인 평가)
+- 증분 refresh: 입력 변경 0명 / 5% 환자 (새 활력징후 도착 가정)
+- 표 렌더링 준비: 정렬 + 25행 페이지 슬라이스
+"""
+import sys
+import time
+
+import numpy as np
+
+from common import best_of
+
+import census
+import scoring
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    res = scoring.load_resources()
+    roster = census.demo_roster(n)
+
+    def full():
+        census.CensusScorer(res).refresh(roster)
+
+    scorer = census.CensusScorer(res)
+    scorer.refresh(roster)
+    rng = np.random.default_rng(0)
+
+    def partial(frac):
+        changed = roster.copy()
+        rows = rng.choice(n, max(1, int(n * frac)), replace=False)
+        changed.loc[rows, "PR"] += rng.integers(1, 10, len(rows))
+        scorer.refresh(roster)
+        t0 = time.perf_counter()
+        scorer.refresh(changed)
+        return time.perf_counter() - t0
+
+    table = scorer.refresh(roster)
+    print(f"census {n}명 (compiled={'yes' if res['compiled'] is not None else 'no'})")
+    print(f"  전체 refresh          {best_of(full) * 1e3:8.2f} ms")
+    print(f"  증분 refresh (0명)    {best_of(lambda: scorer.refresh(roster)) * 1e3:8.2f} ms")
+    print(f"  증분 refresh (5%)     {min(partial(0.05) for _ in range(5)) * 1e3:8.2f} ms"
+          f"  (재계산 {scorer.last_refresh['rescored']}명)")
+    print(f"  정렬 + 페이지(25행)   {best_of(lambda: census.page(census.ranked(table), 1, 25)) * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compiled scorer 정합성 + 단일 행 지연 비교 (sklearn predict_proba vs NumPy).
+
+실행: python benchmarks/bench_compiled_scorer.py
+정합성: 여러 시드의 probe 배치(결측/미정의 범주/극단값 포함)에서 |diff| <= 1e-12 확인.
+"""
+import time
+
+import numpy as np
+from common import synthetic_frame
+
+import scoring
+
+
+def per_call_us(fn, n=2000):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    res = scoring.load_resources(bundle_path=None)  # sklearn 모델과 비교하므로 원본 아티팩트에서 로딩
+    compiled = res['compiled']
+    if compiled is None:
+        raise SystemExit(f"compiled scorer 비활성: {res['compiled_error']}")
+
+    # 1) 정합성
+    worst = 0.0
+    for seed in range(5):
+        worst = max(worst, scoring.verify_parity(compiled, res, scoring.parity_probe(res, n=10_000, seed=seed)))
+        worst = max(worst, scoring.verify_parity(compiled, res, synthetic_frame(10_000, seed=seed)))
+    print(f"parity: max |compiled - predict_proba| = {worst:.3e} (atol {scoring.PARITY_ATOL:.0e})")
+
+    # 2) 단일 행 지연
+    record = synthetic_frame(1).to_dict("records")[0]
+    model = res['model']
+    frame = scoring.build_input_frame([record], res)
+    X = scoring.encode_matrix([record], res)
+    rows = [
+        ("predict_proba (DataFrame 준비됨)", lambda: model.predict_proba(frame), 300),
+        ("build_input_frame + predict_proba", lambda: model.predict_proba(scoring.build_input_frame([record], res)), 300),
+        ("compiled.predict_proba1 (행렬 준비됨)", lambda: compiled.predict_proba1(X), 20_000),
+        ("encode_matrix + compiled", lambda: compiled.predict_proba1(scoring.encode_matrix([record], res)), 20_000),
+        ("score_arrays (compiled, 1행)", lambda: scoring.score_arrays([record], res), 20_000),
+        ("score_batch (compiled, 1행, DataFrame 결과)", lambda: scoring.score_batch([record], res), 2_000),
+    ]
+    print(f"{'single-row path':<40} {'us/call':>10}")
+    for name, fn, n in rows:
+        print(f"{name:<40} {per_call_us(fn, n):>10.1f}")
+
+    # 3) 배치 처리량 (compiled vs sklearn)
+    big = synthetic_frame(100_000)
+    Xb = scoring.encode_matrix(big, res)
+    fb = scoring.build_input_frame(big, res)
+    for name, fn in [("sklearn predict_proba", lambda: model.predict_proba(fb)),
+                     ("compiled predict_proba1", lambda: compiled.predict_proba1(Xb))]:
+        t0 = time.perf_counter()
+        fn()
+        sec = time.perf_counter() - t0
+        print(f"100k rows {name:<28} {100_000 / sec:>14,.0f} rows/sec")
+    assert np.isfinite(compiled.predict_proba1(Xb)).all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""환자별 기여도 설명 비용: 병동 배치 스코어링 대비 + 단일 환자 캐시 hit.
+
+실행: python benchmarks/bench_explain.py
+"""
+import time
+
+import numpy as np
+
+from common import best_of, synthetic_frame
+
+import score_cache
+import scoring
+
+
+def main():
+    res = scoring.load_resources()
+    explainer = res['explainer']
+    if explainer is None:
+        print(f"explainer 없음 (compiled scorer 사용 불가: {res['compiled_error']})")
+        return
+
+    print(f"{'rows':>8s} {'score ms':>10s} {'explain ms':>11s} {'ratio':>6s} {'max |Σ기여-logit|':>18s}")
+    for n in (500, 10_000, 100_000):
+        X = scoring.encode_matrix(synthetic_frame(n), res)
+        t_score = best_of(lambda: scoring.score_matrix(X, res))
+        t_explain = best_of(lambda: explainer.contributions(X))
+        err = np.abs(explainer.contributions(X).sum(axis=1) + explainer.baseline_logit
+                     - res['compiled'].decision_function(X)).max()
+        print(f"{n:8,d} {t_score * 1e3:10.2f} {t_explain * 1e3:11.2f} {t_explain / t_score:6.2f} {err:18.1e}")
+
+    record = synthetic_frame(1).to_dict("records")[0]
+    cache = score_cache.ScoreCache()
+    score_cache.explain_record(record, res, cache)
+    reps = 20_000
+    for label, c in (("캐시 없음", None), ("캐시 hit", cache)):
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            score_cache.explain_record(record, res, c)
+        print(f"단일 환자 explain_record ({label}) {(time.perf_counter() - t0) / reps * 1e6:8.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
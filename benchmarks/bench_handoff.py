@@ -0,0 +1,59 @@
+"""근무조 교대 시점 병동 보고서: 접속마다 전체 계산 vs 교대 전 사전 계산 보고서 + 변경 환자만 live.
+
+실행: python benchmarks/bench_handoff.py
+- 전체 계산: 접속한 세션이 명단 전체를 인코딩/스코어링/위험요인 평가 (공유 census 가 비어 있는 교대 직후와 같음)
+- 사전 계산: HandoffReport.current (스냅샷과 입력 비교 -> 바뀐 환자만 재스코어링). 변경 비율 0 / 2 / 10 %
+- 재접속: 같은 명단 버전 key 로 current 를 다시 부름 (대시보드는 명단 mtime / model_version 을 key 로 씀)
+- 보고서 생성: 스케줄러가 교대 lead_s 전에 1번 실행하는 build_report (이력 기록 포함)
+병동 10개 책임간호사가 교대 시각에 동시에 여는 경우는 접속당 시간 x 10 이 같은 프로세스에 몰립니다.
+"""
+import numpy as np
+
+from common import best_of
+
+import census
+import handoff
+import score_history
+import scoring
+
+
+def updated(roster, share, seed=0):
+    """share 비율 환자의 SBP/albumin 을 바꾼 명단 (스냅샷 이후 활력징후/검사 갱신)."""
+    roster = roster.copy()
+    rows = np.random.default_rng(seed).choice(len(roster), int(len(roster) * share), replace=False)
+    roster.loc[roster.index[rows], "SBP"] -= 25
+    roster.loc[roster.index[rows], "albumin"] -= 0.4
+    return roster
+
+
+def main():
+    res = scoring.load_resources()
+    engine = res['risk_factors']
+    print(f"{'beds':>6} {'전체 계산 (ms)':>14} {'보고서 생성 (ms)':>16} "
+          f"{'사전 0% (ms)':>12} {'사전 2% (ms)':>12} {'사전 10% (ms)':>13} {'재접속 (ms)':>11} "
+          f"{'10명 동시: 전체 / 사전 2% (ms)':>30}")
+    for n in (500, 5_000):
+        roster = census.demo_roster(n)
+        history = score_history.ScoreHistoryStore()
+        t_full = best_of(lambda: census.CensusScorer(res, engine).refresh(roster))
+        t_build = best_of(lambda: handoff.build_report(roster, res, engine, history))
+        report = handoff.build_report(roster, res, engine, history)
+        t_pre = {}
+        for share in (0.0, 0.02, 0.10):
+            current = updated(roster, share)
+            t_pre[share] = best_of(lambda: report.current(current, res, engine, history))
+            table = report.current(current, res, engine, history)
+            assert int(table["live"].sum()) == int(n * share)
+        report.current(current, res, engine, history, key="mtime")
+        t_again = best_of(lambda: report.current(current, res, engine, history, key="mtime"))
+        print(f"{n:>6,} {t_full * 1e3:14.1f} {t_build * 1e3:16.1f} {t_pre[0.0] * 1e3:12.1f} {t_pre[0.02] * 1e3:12.1f} "
+              f"{t_pre[0.10] * 1e3:13.1f} {t_again * 1e3:11.3f} {t_full * 1e4:>17.0f} / "
+              f"{(t_pre[0.02] + 9 * t_again) * 1e3:.0f}")
+
+    counts = handoff.group_counts(report.table())
+    print("병동별 위험군 (5,000병상 스냅샷):")
+    print(counts.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""계측 on/off 오버헤드.
+
+실행: python benchmarks/bench_instrumentation.py
+- span() / @timed 호출당 비용 (빈 본문)
+- 단일 환자 스코어링 (encode + predict + percentile span 3개 포함) 비용
+"""
+import time
+
+from common import synthetic_frame
+
+import instrumentation
+import scoring
+
+
+@instrumentation.timed("noop")
+def noop():
+    return None
+
+
+def per_call(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def empty_span():
+    with instrumentation.span("noop"):
+        pass
+
+
+def main():
+    res = scoring.load_resources()
+    record = synthetic_frame(1).to_dict("records")
+
+    def score_one():
+        scoring.score_arrays(record, res)
+
+    print(f"{'':24s} {'off':>10s} {'on':>10s}")
+    for label, fn, n, unit in [("span() (ns)", empty_span, 500_000, 1),
+                               ("@timed (ns)", noop, 500_000, 1),
+                               ("단일 환자 스코어링 (µs)", score_one, 20_000, 1e3)]:
+        row = []
+        for flag in (False, True):
+            instrumentation.enable(flag)
+            per_call(fn, n // 10)
+            row.append(per_call(fn, n) / unit)
+        print(f"{label:24s} {row[0]:10.1f} {row[1]:10.1f}")
+    instrumentation.enable(False)
+
+
+if __name__ == "__main__":
+    main()
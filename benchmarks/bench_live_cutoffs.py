@@ -0,0 +1,71 @@
+"""운영 점수 KLL sketch: 처리량, 메모리, 정확도(정확 분위 대비), 워커 sketch 병합, drift 지표.
+
+실행: python benchmarks/bench_live_cutoffs.py [n_scores]
+운영 분포는 학습 점수 재표본 x 1.15 (입원 환자군 위험도 상승 가정).
+"""
+import sys
+import time
+
+import numpy as np
+
+from common import best_of
+
+import live_cutoffs
+import score_reference
+
+
+def rank_error_pp(sketch, exact_sorted):
+    probes = np.quantile(exact_sorted, np.linspace(0.01, 0.99, 99))
+    exact = np.searchsorted(exact_sorted, probes, side="right") / len(exact_sorted)
+    return float(np.max(np.abs(sketch.cdf(probes) - exact)) * 100)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    train, cut20, cut40 = score_reference.read_npz_reference()
+    rng = np.random.default_rng(0)
+    live = rng.choice(train, n) * 1.15
+    exact = np.sort(live)
+    exact20, exact40 = np.quantile(exact, [0.80, 0.60])
+
+    print(f"{'k':>5s} {'batch/s':>12s} {'single/s':>10s} {'items':>6s} {'KB':>6s} {'rank err':>9s} {'top20 cut':>10s} {'top40 cut':>10s}")
+    for k in (128, 256, 512):
+        sketch = live_cutoffs.KLLSketch(k, seed=0)
+        t0 = time.perf_counter()
+        for chunk in np.array_split(live, 1000):
+            sketch.update_many(chunk)
+        batch_rate = n / (time.perf_counter() - t0)
+        single = live_cutoffs.KLLSketch(k, seed=0)
+        t0 = time.perf_counter()
+        for v in live[:100_000].tolist():
+            single.update(v)
+        single_rate = 100_000 / (time.perf_counter() - t0)
+        c20, c40 = live_cutoffs.live_cutoffs(sketch)
+        print(f"{k:5d} {batch_rate:12,.0f} {single_rate:10,.0f} {sketch.size:6d} {sketch.size * 8 / 1024:6.1f} "
+              f"{rank_error_pp(sketch, exact):7.2f}pp {c20:10.5f} {c40:10.5f}")
+    print(f"{'exact':>5s} {'':>12s} {'':>10s} {n:6d} {n * 8 / 1024:6.0f} {'':>9s} {exact20:10.5f} {exact40:10.5f}")
+
+    workers = [live_cutoffs.KLLSketch(seed=i) for i in range(8)]
+    for w, part in zip(workers, np.array_split(live, 8)):
+        w.update_many(part)
+    def merge_all():
+        merged = live_cutoffs.KLLSketch.from_bytes(workers[0].to_bytes())
+        for w in workers[1:]:
+            merged.merge(live_cutoffs.KLLSketch.from_bytes(w.to_bytes()))
+        return merged
+
+    merge_ms = best_of(merge_all) * 1e3
+    merged = merge_all()
+    print(f"8 워커 병합 {merge_ms:.2f} ms -> rank err {rank_error_pp(merged, exact):.2f}pp, "
+          f"cutoff {live_cutoffs.live_cutoffs(merged)[0]:.5f}/{live_cutoffs.live_cutoffs(merged)[1]:.5f}")
+
+    for label, scores in (("학습 분포 재표본", rng.choice(train, n)), ("운영 분포 (x1.15)", live)):
+        s = live_cutoffs.KLLSketch(seed=0)
+        s.update_many(scores)
+        d = live_cutoffs.drift_report(s, train, cut20, cut40)
+        print(f"drift [{label}] KS={d['ks']:.3f} PSI={d['psi']:.3f} "
+              f"학습 top20 초과 {d['live_share_above_train_top20'] * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""모델 registry: shadow 스코어링이 운영 경로에 더하는 지연 + primary 교체 비용 / 캐시 재사용.
+
+실행: python benchmarks/bench_model_registry.py
+임시 registry (v1 primary, v2/v3 shadow) 를 저장소 아티팩트 symlink 로 만들고, 후보는 cutoff 만 바꿔
+재보정된 모델처럼 위험군이 일부 달라지게 합니다.
+- 단일 환자 (score_record, 캐시 없음): shadow 없음 vs 후보 2개 shadow. 요청 사이 간격을 둔 경우 (병동 요청 패턴,
+  요청 경로에는 submit 만 남음) 와 연속 호출 (worker 와 CPU 경쟁) 을 따로 잽니다.
+- 배치 score_arrays: shadow 없음 vs shadow (운영 반환까지 / 후보 스코어링 완료까지). 반복 사이 drain.
+- 교체: promote 호출 시간, 다른 프로세스 역할의 registry 가 poll 로 새 primary 를 보기까지,
+  v1 -> v2 -> v1 로 되돌렸을 때 점수 캐시 hit (캐시를 비우지 않으므로 v1 항목이 그대로 남음)
+CPU 코어가 1개면 shadow worker 는 다음 요청과 같은 코어를 나눠 쓰므로 연속 호출 수치가 커집니다.
+"""
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from common import best_of, synthetic_frame
+
+import model_bundle
+import model_registry
+import score_cache
+import scoring
+
+
+def make_registry(root, versions):
+    for v in versions:
+        d = Path(root) / v
+        d.mkdir()
+        for src in (scoring.MODEL_PATH, scoring.SCHEMA_PATH, scoring.REF_PATH, model_bundle.BUNDLE_PATH):
+            if src.exists():
+                os.symlink(src, d / src.name)
+
+
+def per_call_us(fn, records, repeat=3):
+    best = min(best_of(lambda: [fn(r) for r in records], repeat=1) for _ in range(repeat))
+    return best / len(records) * 1e6
+
+
+def paced_us(fn, records, gap_s=0.002):
+    """요청 사이 gap_s 를 두고 호출 자체 시간만 잰 중앙값 (µs)."""
+    samples = []
+    for r in records:
+        t0 = time.perf_counter()
+        fn(r)
+        samples.append(time.perf_counter() - t0)
+        time.sleep(gap_s)
+    return statistics.median(samples) * 1e6
+
+
+def best_drained(fn, shadow, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        shadow.drain()
+        best = min(best, best_of(fn, repeat=1))
+    return best
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        make_registry(root, ["v1", "v2", "v3"])
+        registry = model_registry.ModelRegistry(root)
+        registry.write_manifest("v1", ["v2", "v3"])
+        registry.refresh()
+        for v, scale in (("v2", 0.9), ("v3", 1.1)):  # 재보정 후보 흉내
+            cand = registry.loaded[v]
+            cand['cutoff_top20'] *= scale
+            cand['cutoff_top40'] *= scale
+        res = registry.active()
+        shadow = res['shadow']
+        plain = dict(res, shadow=None)
+
+        records = synthetic_frame(2_000, seed=3).to_dict("records")
+        paced = records[:500]
+        p_plain = paced_us(lambda r: score_cache.score_record(r, plain), paced)
+        p_shadow = paced_us(lambda r: score_cache.score_record(r, res), paced)
+        shadow.drain()
+        t_plain = per_call_us(lambda r: score_cache.score_record(r, plain), records)
+        batches = shadow.batches
+        t_shadow = per_call_us(lambda r: score_cache.score_record(r, res), records)
+        shadow.drain()
+        print(f"단일 환자 score_record (요청 간격 2 ms): shadow 없음 {p_plain:.1f} µs / shadow 후보 2개 {p_shadow:.1f} µs")
+        print(f"단일 환자 score_record (연속 호출): shadow 없음 {t_plain:.1f} µs / shadow 후보 2개 {t_shadow:.1f} µs "
+              f"(요청 {3 * len(records):,}건 -> shadow 실행 {shadow.batches - batches:,}번, 건너뜀 {shadow.dropped:,}행)")
+
+        print(f"{'rows':>9} {'shadow 없음 (ms)':>16} {'shadow 반환 (ms)':>16} {'후보 완료까지 (ms)':>19}")
+        for n in (1_000, 100_000, 1_000_000):
+            frame = synthetic_frame(n)
+            t_off = best_of(lambda: scoring.score_arrays(frame, plain))
+            t_on = best_drained(lambda: scoring.score_arrays(frame, res), shadow)
+            shadow.drain()
+            t0 = time.perf_counter()
+            scoring.score_arrays(frame, res)
+            shadow.drain()
+            print(f"{n:>9,} {t_off * 1e3:16.2f} {t_on * 1e3:16.2f} {(time.perf_counter() - t0) * 1e3:19.2f}")
+
+        for v, s in shadow.summary()["candidates"].items():
+            print(f"  {v}: {s['rows']:,}행 일치 {s['agreement']:.3f} kappa {s['kappa']:.3f} "
+                  f"상향 {s['upgraded']:.3f} 하향 {s['downgraded']:.3f}")
+
+        # primary 교체: 캐시는 그대로 (key 에 model_version)
+        for v in ("v1", "v2"):  # 같은 아티팩트 symlink 라 model_version 이 같으므로 v2 는 다른 버전처럼 표시
+            registry.loaded[v]['model_version'] = f"{registry.loaded[v]['model_version']}-{v}"
+        cache = score_cache.ScoreCache()
+        sample = records[:500]
+        for r in sample:
+            score_cache.score_record(r, registry.active(), cache)
+        watcher = model_registry.ModelRegistry(root, poll_s=0.05, max_pending_rows=0)
+        swaps = []
+        for target in ("v2", "v1"):
+            t0 = time.perf_counter()
+            registry.promote(target)
+            t_promote = time.perf_counter() - t0
+            while watcher.active()['registry_version'] != target:
+                time.sleep(0.001)
+            swaps.append((target, t_promote, time.perf_counter() - t0))
+            hits = cache.hits
+            for r in sample:
+                score_cache.score_record(r, registry.active(), cache)
+            print(f"promote {target}: {t_promote * 1e3:.2f} ms, 다른 registry 반영 {swaps[-1][2] * 1e3:.1f} ms "
+                  f"(poll 50 ms), 환자 {len(sample)}명 재스코어링 캐시 hit {cache.hits - hits}")
+        print(f"캐시 크기 {len(cache)} (버전별 항목 공존, clear 없음) · 교체 중앙값 "
+              f"{statistics.median(t for _, t, _ in swaps) * 1e3:.2f} ms")
+        shadow.close()
+
+
+if __name__ == "__main__":
+    main()
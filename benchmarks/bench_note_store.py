@@ -0,0 +1,84 @@
+"""간호기록 저장소: 10만 건 기준 insert 처리량 + 첫 페이지 조회/렌더 비용.
+
+실행: python benchmarks/bench_note_store.py [n_notes]
+- insert: 건별 commit (기존 list.insert(0, ...) 에 대응하는 단순 저장) vs append() 배치 기록
+- 첫 페이지: 한 병동 n 건 중 한 환자의 최근 10건 조회 + HTML 1회 생성
+- 대시보드: 같은 DB 로 AppTest rerun (간호기록 탭 포함 전체 스크립트)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from common import ROOT, best_of
+
+import note_store
+
+APP_RERUNS = """
+import time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+t0 = time.perf_counter()
+for _ in range({n}):
+    at.run()
+print((time.perf_counter() - t0) / {n} * 1e3)
+"""
+
+
+def note_rows(n, patients, seed=0):
+    rng = np.random.default_rng(seed)
+    pids = rng.choice(patients, n)
+    base = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, -1))
+    ts = np.sort(base + rng.integers(0, 365 * 86400, n))
+    return [(pid, "41W", time.strftime(note_store.TS_FORMAT, time.localtime(t)), "김분당",
+             f"낙상위험평가({i % 20}점) -> 위험요인(고령) 확인 -> 중재(침상난간 올림 확인) 시행함.")
+            for i, (pid, t) in enumerate(zip(pids, ts))]
+
+
+def insert_rate(path, rows, batched):
+    with note_store.NoteStore(path, batch_size=256 if batched else 1) as store:
+        t0 = time.perf_counter()
+        if batched:
+            for r in rows:
+                store.append(r[0], r[4], r[3], ts=r[2], ward=r[1])
+            store.flush()
+        else:
+            for r in rows:
+                store.append_many([r])
+        return len(rows) / (time.perf_counter() - t0)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    patients = [f"{10_000_000 + i}" for i in range(50)] + ["12345678"]
+    rows = note_rows(n, patients)
+    with tempfile.TemporaryDirectory() as tmp:
+        single = insert_rate(Path(tmp) / "single.db", rows[:5_000], batched=False)
+        db = Path(tmp) / "notes.db"
+        batched = insert_rate(db, rows, batched=True)
+        print(f"insert  건별 commit   {single:12,.0f} notes/s  (5,000건)")
+        print(f"insert  배치 append   {batched:12,.0f} notes/s  ({n:,}건)")
+
+        with note_store.NoteStore(db) as store:
+            def first_page():
+                page = store.recent("12345678", 10)
+                return "".join(f"<div class='note-entry'>{r['ts']} {r['content']}</div>" for r in page)
+
+            def deep_page():
+                return store.recent("12345678", 10, before=("2025-07-01 00:00:00", 0))
+
+            print(f"첫 페이지 조회+HTML   {best_of(first_page, 20) * 1e3:8.3f} ms  (환자당 ~{n // len(patients):,}건)")
+            print(f"중간 페이지(keyset)   {best_of(deep_page, 20) * 1e3:8.3f} ms")
+
+        env = dict(os.environ, FALLGUARD_NOTES_DB=str(db))
+        out = subprocess.run([sys.executable, "-c", APP_RERUNS.format(app=str(ROOT / "fall down.app.py"), n=20)],
+                             capture_output=True, text=True, env=env, cwd=ROOT)
+        print(f"대시보드 rerun        {float(out.stdout.strip().splitlines()[-1]):8.1f} ms  (AppTest, 노트 {n:,}건 DB)")
+
+
+if __name__ == "__main__":
+    main()
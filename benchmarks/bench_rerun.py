@@ -0,0 +1,159 @@
+"""대시보드 상호작용당 서버 rerun 시간 / 전송 bytes (실제 streamlit 서버 + websocket 클라이언트).
+
+실행:
+    python benchmarks/bench_rerun.py                 # 현재 작업 트리의 앱
+    python benchmarks/bench_rerun.py --rev HEAD~1    # 특정 커밋의 앱 (변경 전/후 비교)
+
+AppTest 는 항상 스크립트 전체를 실행하므로 st.fragment 범위 rerun 을 측정할 수 없습니다.
+여기서는 headless 서버를 띄우고 브라우저처럼 BackMsg(rerun_script)를 보낸 뒤, script_finished 까지의
+시간과 받은 ForwardMsg 크기 합을 잽니다. 위젯이 fragment 안에 있으면 브라우저와 같이 fragment_id 를 실어
+보냅니다. 클라이언트 메시지 캐시는 쓰지 않으므로 (cached_message_hashes 없음) bytes 는 상한입니다.
+
+상호작용:
+    first_load       첫 접속 (전체 스크립트)
+    vital            Albumin 슬라이더 변경 (시뮬레이션 입력 1개)
+    patient          환자 리스트에서 다른 환자 선택
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect
+
+APP = ROOT / "fall down.app.py"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Session:
+    """브라우저 탭 1개 흉내: rerun 요청 -> script_finished 까지 ForwardMsg 수집 (st.rerun() 재실행 포함)."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets = {}  # key 또는 label -> (widget id, fragment id, options)
+
+    async def rerun(self, widget=None, **value):
+        msg = BackMsg()
+        msg.rerun_script.SetInParent()
+        if widget is not None:
+            wid, fragment_id, _ = self.widgets[widget]
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = wid
+            for field, v in value.items():
+                if isinstance(v, list):
+                    getattr(state, field).data.extend(v)
+                else:
+                    setattr(state, field, v)
+            msg.rerun_script.fragment_id = fragment_id
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        nbytes = n_deltas = 0
+        while True:
+            raw = await self.ws.recv()
+            nbytes += len(raw)
+            fmsg = ForwardMsg()
+            fmsg.ParseFromString(raw)
+            kind = fmsg.WhichOneof("type")
+            if kind == "delta":
+                n_deltas += 1
+                self._track(fmsg.delta)
+            elif kind == "script_finished" and fmsg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return {"ms": (time.perf_counter() - t0) * 1e3, "bytes": nbytes, "deltas": n_deltas,
+                        "scope": "fragment" if widget is not None and self.widgets[widget][1] else "app"}
+
+    def _track(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind is None:
+            return
+        proto = getattr(element, kind)
+        wid = getattr(proto, "id", "")
+        if wid.startswith("$$ID-"):
+            key = wid.rsplit("-", 1)[-1]
+            self.widgets[key if key != "None" else getattr(proto, "label", "")] = (
+                wid, delta.fragment_id, list(getattr(proto, "options", [])))
+
+    def option(self, widget, i):
+        """radio/selectbox 의 i 번째 옵션 표시값 (widget state 는 string_value 로 보냄)."""
+        return self.widgets[widget][2][i]
+
+
+async def measure(port, repeat):
+    for _ in range(150):
+        try:
+            ws = await connect(f"ws://127.0.0.1:{port}/_stcore/stream", max_size=None)
+            break
+        except OSError:
+            await asyncio.sleep(0.2)
+    else:
+        raise RuntimeError("streamlit 서버에 연결하지 못했습니다.")
+    async with ws:
+        s = Session(ws)
+        results = {"first_load": [await s.rerun()]}
+        await s.rerun()  # warm-up (st.cache_* / import 이후 상태에서 측정)
+        results["vital"] = [await s.rerun("sim_alb", double_array_value=[v]) for v in [2.8, 3.6] * repeat]
+        results["patient"] = [await s.rerun("환자 리스트", string_value=s.option("환자 리스트", i % 4))
+                              for i in range(1, 2 * repeat + 1)]
+    return results
+
+
+def run_app(app_path, repeat):
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, FALLGUARD_HISTORY_DIR=os.path.join(tmp, "history"),
+                   FALLGUARD_NOTES_DB=os.path.join(tmp, "notes.db"))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", str(app_path), "--server.headless", "true",
+             "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            return asyncio.run(measure(port, repeat))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rev", help="측정할 git 커밋 (기본: 작업 트리)")
+    ap.add_argument("--repeat", type=int, default=5, help="상호작용별 반복 쌍 수")
+    args = ap.parse_args()
+
+    app_path = APP
+    if args.rev:
+        # 앱이 같은 디렉터리의 모듈을 import 하므로 저장소 루트에 임시 사본을 둠
+        app_path = ROOT / f".bench_app_{args.rev.replace('~', '_').replace('/', '_')}.py"
+        app_path.write_bytes(subprocess.run(["git", "show", f"{args.rev}:{APP.name}"], cwd=ROOT,
+                                            capture_output=True, check=True).stdout)
+    try:
+        results = run_app(app_path, args.repeat)
+    finally:
+        if app_path != APP:
+            app_path.unlink()
+
+    print(f"{args.rev or '작업 트리'}: {APP.name}")
+    print(f"{'interaction':>12s} {'scope':>9s} {'median ms':>10s} {'min ms':>8s} {'bytes':>9s} {'deltas':>7s}")
+    for name, runs in results.items():
+        print(f"{name:>12s} {runs[0]['scope']:>9s} {statistics.median(r['ms'] for r in runs):10.1f} "
+              f"{min(r['ms'] for r in runs):8.1f} {statistics.median(r['bytes'] for r in runs):9,.0f} "
+              f"{statistics.median(r['deltas'] for r in runs):7.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""위험요인 태깅: 벡터화 규칙 엔진 vs 환자별 Python if 분기 (기존 사이드바 방식).
+
+실행: python benchmarks/bench_risk_factors.py
+"""
+from common import best_of, synthetic_frame
+
+import risk_factors
+import scoring
+
+REDUCED = ["verbal", "pain", "unresponsive", "drowsy", "stupor", "confus"]
+
+
+def python_branches(records):
+    """기존 사이드바 if 체인을 환자마다 실행."""
+    out = []
+    for r in records:
+        f = []
+        if r["나이"] >= 65: f.append("고령")
+        if r["albumin"] < 3.0: f.append("알부민 저하")
+        if float(r["crp"] or 0) >= 5.0: f.append("CRP 상승")
+        if r["SBP"] < 100: f.append("저혈압(SBP<100)")
+        elif r["SBP"] >= 180: f.append("고혈압(SBP≥180)")
+        if r["PR"] > 100: f.append("빈맥(PR>100)")
+        if r["RR"] >= 24: f.append("빈호흡(RR≥24)")
+        if r["BT"] >= 37.8: f.append("발열(BT≥37.8)")
+        if any(k in str(r["내원시 반응"]).lower() for k in REDUCED): f.append("의식/반응 저하")
+        if int(r["중증도분류"]) >= 4: f.append("중증도 높음(4~5)")
+        out.append(f)
+    return out
+
+
+def main():
+    engine = risk_factors.load_engine()
+    print(f"{'patients':>9} {'python if (ms)':>15} {'engine (ms)':>12} {'engine, 인코딩 제외 (ms)':>24}")
+    for n in (100, 10_000, 100_000):
+        frame = synthetic_frame(n)
+        records = frame.to_dict("records")
+        X = scoring.encode_matrix(frame, engine.context)
+        t_py = best_of(lambda: python_branches(records))
+        t_engine = best_of(lambda: engine.evaluate_records(frame))
+        t_eval = best_of(lambda: engine.evaluate(X))
+        print(f"{n:>9,} {t_py * 1e3:>15.2f} {t_engine * 1e3:>12.2f} {t_eval * 1e3:>24.2f}")
+
+    M = engine.evaluate(X)
+    expected = python_branches(records)
+    assert all(engine.labels_for(M[i]) == expected[i] for i in range(len(expected))), "규칙 결과 불일치"
+    print("병동 요약:", engine.summary(M))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""점수 캐시 on/off: 단일 환자 점수 계산 비용 + 대시보드 rerun 전체 비용.
+
+실행: python benchmarks/bench_score_cache.py
+- 함수 수준: 같은 입력이 반복되는 rerun (입력 변경 10% 가정)
+- 대시보드: streamlit AppTest 로 입력 변경 없는 rerun 반복 (캐시 설정마다 별도 프로세스)
+"""
+import os
+import subprocess
+import sys
+import time
+
+from common import ROOT, synthetic_frame
+
+import score_cache
+import scoring
+
+APP_RERUNS = """
+import time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+t0 = time.perf_counter()
+for _ in range({n}):
+    at.run()
+print((time.perf_counter() - t0) / {n} * 1e3)
+"""
+
+
+def rerun_cost(res, cache, records, reruns=20_000):
+    t0 = time.perf_counter()
+    for i in range(reruns):
+        score_cache.score_record(records[(i // 10) % len(records)], res, cache)  # 10회 rerun 마다 입력 변경
+    return (time.perf_counter() - t0) / reruns * 1e6
+
+
+def main():
+    res = scoring.load_resources()
+    records = synthetic_frame(500).to_dict("records")
+    cache = score_cache.ScoreCache()
+    off = rerun_cost(res, None, records)
+    on = rerun_cost(res, cache, records)
+    print(f"score_record / rerun (compiled): cache off {off:8.1f} us, cache on {on:7.1f} us")
+    fallback = dict(res, compiled=None)  # compiled scorer 비활성 시 (predict_proba 경로)
+    off = rerun_cost(fallback, None, records, reruns=500)
+    on = rerun_cost(fallback, score_cache.ScoreCache(), records, reruns=500)
+    print(f"score_record / rerun (sklearn) : cache off {off:8.1f} us, cache on {on:7.1f} us")
+    print("cache stats:", cache.stats())
+
+    small = score_cache.ScoreCache(maxsize=64, ttl_s=None)
+    rerun_cost(res, small, records, reruns=5_000)
+    print("maxsize=64 stats:", small.stats())
+
+    print("\nAppTest 입력 변경 없는 rerun (ms/rerun):")
+    for label, size in [("cache off", "0"), ("cache on", str(score_cache.DEFAULT_MAXSIZE))]:
+        env = dict(os.environ, FALLGUARD_SCORE_CACHE_SIZE=size, PYTHONWARNINGS="ignore")
+        code = APP_RERUNS.format(app=str(ROOT / "fall down.app.py"), n=20)
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        print(f"  {label:<10} {float(out.stdout.strip().splitlines()[-1]):8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""점수 이력 저장소: 기록 처리량, 환자당 메모리 상한, 병동 추이 (집계 bucket vs 원시 점 재집계).
+
+실행: python benchmarks/bench_score_history.py [n_patients] [weeks]
+- 환자당 5분 간격 점수 (weeks 주) 를 시간순으로 기록
+- 병동 근무조 추이: ward_trend (미리 집계된 bucket) vs 원시 점 전체를 pandas groupby 로 재집계
+"""
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import best_of
+
+import score_history
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    weeks = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    step = 300
+    t0 = time.time() - weeks * 7 * 86400
+    ticks = np.arange(t0, time.time(), step)
+    ids = [f"{10_000_000 + i}" for i in range(n)]
+    rng = np.random.default_rng(0)
+    base = rng.uniform(0.005, 0.05, n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = score_history.ScoreHistoryStore(spill_dir=tmp, min_interval_s=0)
+        raw_log = []
+        start = time.perf_counter()
+        for t in ticks:
+            raw = base + rng.normal(0, 0.002, n)
+            store.record_many(ids, raw, ts=t)
+            raw_log.append(raw)
+        elapsed = time.perf_counter() - start
+        total = len(ticks) * n
+        print(f"기록          {total / elapsed:12,.0f} points/s  ({n}명 x {len(ticks):,}점, {weeks}주)")
+        print(f"메모리        {store.nbytes() / n / 1024:8.1f} KB/환자 (ring 고정)  vs 원시 {len(ticks) * 12 / 1024:8.1f} KB/환자")
+
+        trend = best_of(lambda: store.ward_trend(ids, "shift"), 5)
+        frame = pd.DataFrame({"ts": np.repeat(ticks, n), "pid": np.tile(ids, len(ticks)),
+                              "raw": np.concatenate(raw_log)})
+
+        def from_raw():
+            b = score_history.bucket_ids(frame["ts"].to_numpy(), "shift")
+            last = frame.assign(b=b).groupby(["pid", "b"])["raw"].agg(["last", "max"])
+            return last.groupby("b").agg(mean_last=("last", "mean"), max=("max", "max"))
+
+        raw_cost = best_of(from_raw, 3)
+        shifts = len(store.ward_trend(ids, "shift"))
+        print(f"병동 근무조 추이 ({shifts} 근무조, 메모리 ring 범위)")
+        print(f"  ward_trend (집계 bucket)  {trend * 1e3:8.1f} ms")
+        print(f"  원시 점 재집계 (pandas)   {raw_cost * 1e3:8.1f} ms  ({len(frame):,}점)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""학습 점수 참조 로딩/상위 % 조회 비교: npz 전체 읽기 vs npy mmap vs sketch.
+
+실행: python benchmarks/bench_score_reference.py
+"""
+import time
+
+import numpy as np
+from common import best_of
+
+import score_reference
+
+
+def npz_legacy_load():
+    """기존 load_resources 방식: allow_pickle npz 전체 읽기 + float 복사."""
+    ref = np.load(score_reference.REF_PATH, allow_pickle=True)
+    return np.array(ref.get('train_scores_sorted')).astype(float)
+
+
+def main():
+    score_reference.export_reference()
+    legacy = npz_legacy_load()
+
+    loaders = [
+        ("npz (legacy, allow_pickle + copy)", npz_legacy_load),
+        ("npy mmap (exact)", lambda: score_reference.load_reference(exact=True)),
+        ("sketch only", lambda: score_reference.load_reference(exact=False)),
+    ]
+    print(f"{'loader':<36} {'ms':>8}")
+    for name, fn in loaders:
+        print(f"{name:<36} {best_of(fn, repeat=5) * 1e3:>8.2f}")
+
+    ref = score_reference.load_reference(exact=True)
+    scores, sketch = ref['train_scores_sorted'], ref['percentile_sketch']
+    print(f"\nprivate heap: legacy {legacy.nbytes / 1e6:.2f} MB/프로세스, "
+          f"mmap 0 MB (페이지 캐시 공유), sketch {sketch.nbytes / 1e3:.1f} KB")
+
+    rng = np.random.default_rng(0)
+    one = float(rng.choice(scores))
+    many = rng.uniform(scores[0], scores[-1], 1_000_000)
+    n_single = 20_000
+    for name, fn in [("exact searchsorted", lambda x: np.searchsorted(scores, x, side="right")),
+                     ("sketch interp", sketch.cdf)]:
+        t0 = time.perf_counter()
+        for _ in range(n_single):
+            fn(one)
+        single_us = (time.perf_counter() - t0) / n_single * 1e6
+        batch_ms = best_of(lambda: fn(many)) * 1e3
+        print(f"{name:<20} 1건 {single_us:6.2f} us   1M건 {batch_ms:8.2f} ms")
+
+    exact = np.clip(100 - np.searchsorted(scores, many, side="right") / len(scores) * 100, 0, 100)
+    err = np.abs(sketch.top_percent(many) - exact).max()
+    print(f"\nsketch knots={len(sketch.knot_scores)}, 측정 오차 {err:.4f} %p "
+          f"(빌드 시 학습점수 기준 max_error_pct {sketch.max_error_pct:.4f} %p)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""What-if 민감도 격자: 점별 단일 스코어링 반복 vs 격자 벡터화 1회, 경계 해석해 정확도.
+
+실행: python benchmarks/bench_sensitivity.py
+- 점별: 시뮬레이션 패널처럼 값 하나 바꿀 때마다 score_record 1회 (격자 점 수만큼 반복)
+- 격자: sensitivity.sweep (n x n 행렬 predict_matrix 1회 + 경계 해석해), 목표 < 100 ms @ 200 x 200
+- 정확도: 해석해 경계 값을 다시 스코어링했을 때 cutoff 와의 차이
+"""
+import numpy as np
+
+from common import best_of
+
+import score_cache
+import scoring
+import sensitivity
+
+RECORD = {"성별": "F", "나이": 81.0, "중증도분류": 3.0, "SBP": 110.0, "DBP": 70.0, "RR": 22.0, "PR": 96.0,
+          "BT": 37.6, "내원시 반응": "verbal response", "albumin": 2.6, "crp": 6.0}
+
+
+def per_point(res, xs, ys):
+    for y in ys:
+        for x in xs:
+            score_cache.score_record(dict(RECORD, albumin=x, crp=y), res, None)
+
+
+def main():
+    res = scoring.load_resources()
+    print(f"{'grid':>9s} {'점별 ms':>10s} {'격자 ms':>9s} {'speedup':>8s}")
+    for n in (20, 50, 100, 200):
+        t_grid = best_of(lambda: sensitivity.sweep(res, RECORD, "albumin", y_col="crp", n=n))
+        if n <= 50:
+            out = sensitivity.sweep(res, RECORD, "albumin", y_col="crp", n=n)
+            t_point = best_of(lambda: per_point(res, out["x"], out["y"]), repeat=1)
+            print(f"{n:4d}x{n:<4d} {t_point * 1e3:10.1f} {t_grid * 1e3:9.2f} {t_point / t_grid:7.0f}x")
+        else:
+            print(f"{n:4d}x{n:<4d} {'-':>10s} {t_grid * 1e3:9.2f}")
+
+    solver = sensitivity.solver_for(res)
+    if solver is None:
+        print(f"해석해 없음 (compiled scorer 사용 불가: {res['compiled_error']})")
+        return
+    x_row = scoring.encode_matrix([RECORD], res)[0]
+    errs = []
+    for col in sensitivity.SWEEP_INPUTS:
+        for cutoff in (res['cutoff_top20'], res['cutoff_top40']):
+            v = solver.crossing(x_row, col, cutoff)
+            raw = scoring.predict_matrix(scoring.encode_matrix([dict(RECORD, **{col: v})], res), res)[0]
+            errs.append(abs(raw - cutoff))
+    print(f"경계 해석해 재스코어링 |P - cutoff| 최대 {max(errs):.1e} ({len(errs)}건)")
+
+
+if __name__ == "__main__":
+    main()
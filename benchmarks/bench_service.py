@@ -0,0 +1,74 @@
+"""스코어링 서비스 부하 생성기: micro-batching on/off 처리량 + 지연 p50/p99.
+
+실행: python benchmarks/bench_service.py [--concurrency 64] [--requests 20000]
+서비스를 별도 프로세스로 띄우고, keep-alive 연결 concurrency 개에서 요청을 연속 전송합니다.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+from common import ROOT, synthetic_frame
+
+CONFIGS = [("batching off", 1, 0.0), ("batching on", 64, 2.0)]
+
+
+async def client(host, port, bodies, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    for body in bodies:
+        req = (f"POST /score HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+               f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+        t0 = time.perf_counter()
+        writer.write(req)
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int([l for l in head.split(b"\r\n") if l.lower().startswith(b"content-length")][0].split(b":")[1])
+        payload = await reader.readexactly(length)
+        latencies.append(time.perf_counter() - t0)
+        assert head.startswith(b"HTTP/1.1 200"), payload
+    writer.close()
+
+
+async def load(port, records, concurrency):
+    bodies = [json.dumps(r, ensure_ascii=False).encode() for r in records]
+    latencies = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*[client("127.0.0.1", port, bodies[i::concurrency], latencies) for i in range(concurrency)])
+    return len(bodies) / (time.perf_counter() - t0), np.array(latencies) * 1e3
+
+
+def wait_ready(proc):
+    line = proc.stdout.readline()
+    if "scoring service" not in line:
+        raise RuntimeError(f"서비스 시작 실패: {line}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--requests", type=int, default=20_000)
+    ap.add_argument("--port", type=int, default=18502)
+    args = ap.parse_args()
+
+    records = synthetic_frame(args.requests).to_dict("records")
+    print(f"concurrency={args.concurrency}, requests={args.requests:,}")
+    for name, max_batch, wait_ms in CONFIGS:
+        proc = subprocess.Popen(
+            [sys.executable, "-W", "ignore", str(ROOT / "service.py"), "--port", str(args.port),
+             "--max-batch", str(max_batch), "--max-wait-ms", str(wait_ms)],
+            stdout=subprocess.PIPE, text=True)
+        try:
+            wait_ready(proc)
+            asyncio.run(load(args.port, records[:500], args.concurrency))  # warm-up
+            rps, lat = asyncio.run(load(args.port, records, args.concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{name:<14} {rps:>10,.0f} req/s  p50={np.percentile(lat, 50):6.2f} ms  "
+              f"p99={np.percentile(lat, 99):6.2f} ms  max={lat.max():6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""낙상 + 욕창 동시 스코어링 처리량: 같은 인코딩 행렬 재사용 vs 환자별 욕창 계산.
+
+실행: python benchmarks/bench_sore.py
+- 낙상만      : score_arrays 에서 욕창 scorer 를 뺀 res (기존 경로)
+- 낙상 + 욕창 : score_arrays (검증/인코딩 1회 -> 낙상 predict + Braden 규칙 벡터화 1회)
+- 욕창 환자별 : 환자마다 record -> encode_matrix -> SoreScorer 1행 (대시보드 단건 경로를 병동에 반복)
+- 욕창만      : 이미 만든 행렬에 SoreScorer.score (추가 비용)
+상위 % 참조는 합성 환자 histogram 으로 채워 참조 lookup 비용까지 포함합니다.
+"""
+import numpy as np
+
+from common import best_of, synthetic_frame
+
+import scoring
+
+
+def per_patient(records, res):
+    sore = res['sore']
+    return [sore.score(scoring.encode_matrix([r], res)) for r in records]
+
+
+def main():
+    res = scoring.load_resources()
+    sore = res['sore']
+    X_ref, errors = res['validator'].encode(synthetic_frame(100_000, seed=7))
+    sore.set_reference(sore.histogram(X_ref))
+    fall_only = dict(res, sore=None)
+
+    print(f"{'rows':>9} {'낙상만 rows/s':>14} {'낙상+욕창 rows/s':>17} {'욕창 추가 (ms)':>15} {'욕창 환자별 rows/s':>19}")
+    for n in (1_000, 100_000, 1_000_000):
+        frame = synthetic_frame(n)
+        X = res['validator'].encode(frame)[0]
+        t_fall = best_of(lambda: scoring.score_arrays(frame, fall_only))
+        t_both = best_of(lambda: scoring.score_arrays(frame, res))
+        t_sore = best_of(lambda: sore.score(X))
+        records = frame.head(5_000).to_dict("records")
+        t_row = best_of(lambda: per_patient(records, res), repeat=1) / len(records) * n
+        print(f"{n:>9,} {n / t_fall:>14,.0f} {n / t_both:>17,.0f} {t_sore * 1e3:>15.2f} {n / t_row:>19,.0f}")
+
+    out = scoring.score_arrays(synthetic_frame(10_000), res)
+    groups, counts = np.unique(out["sore_group"].astype(str), return_counts=True)
+    print("욕창 위험군 (합성 10,000명):", dict(zip(groups.tolist(), counts.tolist())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""스트리밍 수집 replay 벤치마크: 지속 events/sec, event -> alarm 지연 p50/p99.
+
+실행: python benchmarks/bench_streaming.py [--patients 3000] [--events 300000]
+합성 JSONL(ADT 1건/환자 + 모니터 활력징후 + 간헐적 LIS 결과)을 임시 파일로 만든 뒤
+동기(generator) / asyncio 경로로 최대 속도 replay 합니다.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from common import synthetic_frame
+
+import scoring
+import streaming
+
+VITALS = ["SBP", "DBP", "PR", "RR", "BT"]
+
+
+def write_events(path, n_patients, n_events, seed=0):
+    rng = np.random.default_rng(seed)
+    base = synthetic_frame(n_patients, seed=seed)
+    ids = [f"P{i:06d}" for i in range(n_patients)]
+    ts = 1_765_500_000.0
+    with open(path, "w", encoding="utf-8") as f:
+        for pid, row in zip(ids, base.to_dict("records")):
+            f.write(json.dumps({"patient_id": pid, "ts": ts, "type": "adt", **row}, ensure_ascii=False) + "\n")
+        vit = base[VITALS].to_numpy()
+        lab = base[["albumin", "crp"]].to_numpy()
+        for _ in range(n_events - n_patients):
+            ts += 0.01
+            i = int(rng.integers(n_patients))
+            if rng.random() < 0.05:  # LIS
+                lab[i] = [max(1.0, lab[i, 0] + rng.normal(0, 0.3)), max(0.0, lab[i, 1] + rng.normal(0, 2.0))]
+                event = {"patient_id": ids[i], "ts": ts, "code": "albumin" if rng.random() < 0.5 else "crp",
+                         "value": round(float(lab[i, 0] if rng.random() < 0.5 else lab[i, 1]), 1)}
+            else:  # 모니터: 일부 항목만 변경 (같은 값 재전송 포함)
+                vit[i] += rng.normal(0, [4, 3, 4, 1, 0.1]) * (rng.random(5) < 0.5)
+                event = {"patient_id": ids[i], "ts": ts, **{c: round(float(v), 1) for c, v in zip(VITALS, vit[i])}}
+            f.write(json.dumps(event) + "\n")
+
+
+def report(name, n_events, sec, scorer, transitions):
+    lat = np.array([t["latency_ms"] for t in transitions]) if transitions else np.array([np.nan])
+    print(f"{name:<10} {n_events / sec:>12,.0f} events/s  scored={scorer.rows_scored:>8,}  "
+          f"transitions={len(transitions):>6,}  latency p50={np.nanpercentile(lat, 50):7.2f} ms  "
+          f"p99={np.nanpercentile(lat, 99):7.2f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--patients", type=int, default=3000)
+    ap.add_argument("--events", type=int, default=300_000)
+    ap.add_argument("--max-batch", type=int, default=256)
+    args = ap.parse_args()
+
+    res = scoring.load_resources()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "events.jsonl"
+        write_events(path, args.patients, args.events)
+        events = list(streaming.read_jsonl(path))  # 파싱 비용 제외한 수집/스코어링 처리량
+
+        scorer = streaming.StreamingScorer(res, max_batch=args.max_batch)
+        t0 = time.perf_counter()
+        transitions = list(scorer.process(events))
+        report("sync", len(events), time.perf_counter() - t0, scorer, transitions)
+
+        async def run_async():
+            async def source():
+                for i, e in enumerate(events):
+                    if i % 1024 == 0:
+                        await asyncio.sleep(0)
+                    yield e
+            s = streaming.StreamingScorer(res, max_batch=args.max_batch)
+            t = time.perf_counter()
+            out = [tr async for tr in s.aprocess(source())]
+            return s, out, time.perf_counter() - t
+
+        scorer, transitions, sec = asyncio.run(run_async())
+        report("asyncio", len(events), sec, scorer, transitions)
+
+        t0 = time.perf_counter()
+        n = sum(1 for _ in streaming.read_jsonl(path))
+        print(f"(참고) JSONL 파싱만: {n / (time.perf_counter() - t0):,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
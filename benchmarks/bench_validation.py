@@ -0,0 +1,65 @@
+"""입력 검증: 배치 NumPy mask (InputValidator.encode) vs 행별 Python try/except 격리.
+
+실행: python benchmarks/bench_validation.py
+- 행별 try/except: 행마다 float 변환/범위/범주를 검사하고 실패 행만 따로 모음 (기존 단건 경로를 배치에 적용한 방식)
+- InputValidator.encode: 컬럼 단위 변환 + 범위 mask, 범주는 고유값만 mapping -> 칸별 오류 code
+- score_arrays: 검증 + 정상 행만 스코어링 (오류 행 격리). 오류 비율이 0 / 0.1% / 5% 일 때 비교
+결과 (오류 행 집합)는 두 방식이 같은지 검증합니다.
+"""
+import numpy as np
+
+from common import best_of, synthetic_frame
+
+import scoring
+import validation
+
+
+def corrupt(frame, share, seed=1):
+    """share 비율 행에 숫자 아님 / 범위 밖 / 미정의 범주 값을 섞음."""
+    frame = frame.copy()
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(frame), int(len(frame) * share), replace=False)
+    kinds = rng.integers(0, 3, len(rows))
+    for col in ("crp", "BT"):
+        frame[col] = frame[col].astype(object)
+    frame.loc[frame.index[rows[kinds == 0]], "crp"] = "양성"
+    frame.loc[frame.index[rows[kinds == 1]], "BT"] = 3.68  # 단위/소수점 입력 착오
+    frame.loc[frame.index[rows[kinds == 2]], "내원시 반응"] = "drowsy"
+    return frame
+
+
+def per_row(records, validator):
+    """행마다 try/except 로 검사 -> 오류 행 번호 목록."""
+    bad = []
+    for i, r in enumerate(records):
+        try:
+            validator.encode_record(r)
+        except validation.InputError:
+            bad.append(i)
+    return bad
+
+
+def main():
+    res = scoring.load_resources()
+    validator = res['validator']
+    print(f"{'rows':>9} {'오류':>6} {'행별 try/except (ms)':>21} {'encode (ms)':>12} {'encode_matrix (ms)':>19} {'score_arrays (ms)':>18}")
+    for n in (10_000, 100_000):
+        for share in (0.0, 0.001, 0.05):
+            frame = corrupt(synthetic_frame(n), share)
+            records = frame.to_dict("records")
+            t_row = best_of(lambda: per_row(records, validator), repeat=1)
+            t_enc = best_of(lambda: validator.encode(frame))
+            t_score = best_of(lambda: scoring.score_arrays(frame, res))
+            try:
+                t_old = f"{best_of(lambda: scoring.encode_matrix(frame, res)) * 1e3:19.2f}"
+            except ValueError:
+                t_old = f"{'(ValueError)':>19s}"  # 기존 인코딩은 숫자 아닌 값 하나로 배치 전체 실패
+            print(f"{n:>9,} {share * 100:5.1f}% {t_row * 1e3:21.2f} {t_enc * 1e3:12.2f} {t_old} {t_score * 1e3:18.2f}")
+
+            _, errors = validator.encode(frame)
+            assert np.flatnonzero(validation.row_codes(errors)).tolist() == per_row(records, validator), "오류 행 불일치"
+    print("오류 요약 (마지막 배치):", validator.summary(errors))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""벤치마크 공용 유틸: 합성 환자 배치 생성 + 타이밍."""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+REACTIONS = ["alert", "verbal response", "painful response", "unresponsive", "nan"]
+
+# 정규분포 꼬리가 입력 검증 범위 (dashboard_schema.json input_ranges) 밖으로 나가지 않도록 자름
+PHYSIOLOGIC_LOWER = pd.Series({"SBP": 40, "DBP": 20, "RR": 4, "PR": 20, "BT": 30.0})
+PHYSIOLOGIC_UPPER = pd.Series({"SBP": 300, "DBP": 200, "RR": 80, "PR": 250, "BT": 45.0})
+
+
+def synthetic_frame(n, seed=0):
+    """학습 분포와 비슷한 범위의 합성 환자 n명 (raw_input_cols 기준 DataFrame)."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "성별": rng.choice(["M", "F"], n),
+        "중증도분류": rng.integers(1, 6, n).astype(float),
+        "SBP": rng.normal(137, 25, n).round(),
+        "DBP": rng.normal(78, 16, n).round(),
+        "RR": rng.normal(18.4, 3, n).round(),
+        "PR": rng.normal(86, 18, n).round(),
+        "BT": rng.normal(36.8, 0.7, n).round(1),
+        "내원시 반응": rng.choice(REACTIONS, n, p=[0.9, 0.04, 0.02, 0.01, 0.03]),
+        "나이": rng.integers(18, 100, n).astype(float),
+        "albumin": rng.normal(4.0, 0.5, n).round(1),
+        "crp": np.abs(rng.normal(2.2, 4.8, n)).round(1),
+    }).clip(lower=PHYSIOLOGIC_LOWER, upper=PHYSIOLOGIC_UPPER, axis=1)
+
+
+def best_of(fn, repeat=3):
+    """fn()을 repeat번 실행해 최소 소요시간(초) 반환."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
@@ -0,0 +1,342 @@
+"""벤치마크 하네스: 핵심 경로 측정 -> JSON 저장 -> 저장된 baseline 과 비교 (회귀 시 exit 1).
+
+실행:
+    python benchmarks/run.py --out benchmarks/results/current.json
+    python benchmarks/run.py --compare benchmarks/results/baseline.json [--tolerance 0.25]
+    python benchmarks/run.py --quick --filter percentile
+
+측정 항목 (값은 모두 초 단위, 반복 측정의 median/min/p95):
+    cold_start.import.<mode>     새 프로세스에서 import scoring (subprocess, mode = bundle | joblib)
+    cold_start.load.<mode>       scoring.load_resources (단일 번들 / 원본 아티팩트)
+    cold_start.first_score.<mode>  프로세스 시작 후 첫 단일 환자 점수까지 (import + 로딩 + 1행 스코어링)
+    calculate_risk_score.*       대시보드 단일 환자 경로 (session_record -> score_cache.score_record), 캐시 없음/hit
+    predict_proba.sklearn.n*     model.predict_proba (DataFrame 구성 포함) 배치 크기별
+    predict_proba.compiled.n*    scoring.score_arrays (compiled scorer) 배치 크기별
+    percentile.searchsorted.n*   train_scores_sorted 기준 상위 % (np.searchsorted)
+    risk_factors.n*              규칙 엔진 요인 행렬
+    validation.encode.n*         입력 검증 + 인코딩 (InputValidator.encode, 칸별 오류 code)
+    sore.score.n*                욕창 Braden 근사 점수 (이미 만든 인코딩 행렬 재사용, 참조 lookup 포함)
+    handoff.build / current.n*   인수인계 보고서 생성 (명단 전체) / 스냅샷 대비 변경 환자만 live (변경 0 %)
+    sensitivity.grid.n*          What-if 민감도 격자 (1축 n, 2축 n x n) 스코어링 + 경계 해석해
+    app.first_run / app.rerun    streamlit AppTest 전체 스크립트 (subprocess)
+
+baseline 과 모델/참조 아티팩트 버전(model_version)이 다르면 함께 표시하므로,
+모델 아티팩트 교체나 앱 변경으로 인한 성능 회귀를 배포 전에 확인할 수 있습니다.
+측정값은 머신에 따라 다르므로 baseline 은 같은 배포 머신에서 만든 것과 비교하세요.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from common import ROOT, synthetic_frame
+
+import census
+import handoff
+import scoring
+import score_cache
+import sensitivity
+
+COLD_START = """
+import json, sys, time
+t0 = time.perf_counter()
+import scoring
+t1 = time.perf_counter()
+res = scoring.load_resources(bundle_path={bundle})
+t2 = time.perf_counter()
+scoring.score_arrays([scoring.session_record({{"gender": "M", "age": 78}}, {{"sim_severity": 3, "sim_reaction": "alert"}})], res)
+t3 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0, "load": t2 - t1, "first_score": t3 - t0, "source": res["source"],
+                  "heavy_modules": sorted(m for m in ("pandas", "sklearn", "joblib", "scipy") if m in sys.modules)}}))
+"""
+
+APP_RUNS = """
+import json, time
+from streamlit.testing.v1 import AppTest
+t0 = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+first = time.perf_counter() - t0
+samples = []
+for _ in range({n}):
+    t0 = time.perf_counter()
+    at.run()
+    samples.append(time.perf_counter() - t0)
+print(json.dumps({{"first": first, "reruns": samples, "exception": bool(at.exception)}}))
+"""
+
+
+    # --------------------------------------------------------------------------------
+# 1. 측정 유틸
+    # --------------------------------------------------------------------------------
+def measure(fn, repeat=7, min_sample_s=0.02):
+    """fn 1회 평균 시간 샘플 repeat 개. 샘플당 min_sample_s 이상이 되도록 반복 횟수를 자동 조정."""
+    fn()
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - t0 >= min_sample_s or number >= 1 << 20:
+            break
+        number *= 4
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return samples
+
+
+def summarize(samples, **extra):
+    arr = np.asarray(samples, dtype=float)
+    return {"median": float(np.median(arr)), "min": float(arr.min()), "p95": float(np.percentile(arr, 95)),
+            "samples": len(arr), **extra}
+
+
+def _subprocess_json(code, env=None):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, env=env)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "subprocess 실패")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+    # --------------------------------------------------------------------------------
+# 2. 벤치마크 케이스
+    # --------------------------------------------------------------------------------
+def bench_cold_start(ctx):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    modes = {"joblib": "None"}
+    if scoring.BUNDLE_PATH.exists():
+        modes["bundle"] = repr(str(scoring.BUNDLE_PATH))
+    for mode, bundle in modes.items():
+        runs = [_subprocess_json(COLD_START.format(bundle=bundle), env) for _ in range(ctx["cold_repeat"])]
+        extra = {"source": runs[0]["source"], "heavy_modules": runs[0]["heavy_modules"]}
+        yield f"cold_start.import.{mode}", summarize([r["import"] for r in runs])
+        yield f"cold_start.load.{mode}", summarize([r["load"] for r in runs], **extra)
+        yield f"cold_start.first_score.{mode}", summarize([r["first_score"] for r in runs], **extra)
+
+
+def bench_single(ctx):
+    res = ctx["res"]
+    state = {"sim_sbp": 120, "sim_dbp": 80, "sim_pr": 80, "sim_rr": 20, "sim_bt": 36.5, "sim_alb": 3.2,
+             "sim_crp": 0.5, "sim_severity": 3, "sim_reaction": "alert"}
+    pt = {"gender": "M", "age": 78}
+    cache = score_cache.ScoreCache()
+    yield "calculate_risk_score.nocache", summarize(
+        measure(lambda: score_cache.score_record(scoring.session_record(pt, state), res, None)))
+    yield "calculate_risk_score.cache_hit", summarize(
+        measure(lambda: score_cache.score_record(scoring.session_record(pt, state), res, cache)))
+
+
+def bench_batch(ctx):
+    res = ctx["res"]
+    model = res['model'] if res['model'] is not None else scoring.load_resources(bundle_path=None)['model']
+    for n in ctx["sizes"]:
+        frame = synthetic_frame(n)
+        yield f"predict_proba.sklearn.n{n}", summarize(
+            measure(lambda: model.predict_proba(scoring.build_input_frame(frame, res))[:, 1], repeat=5), rows=n)
+        if res['compiled'] is not None:
+            yield f"predict_proba.compiled.n{n}", summarize(measure(lambda: scoring.score_arrays(frame, res), repeat=5), rows=n)
+
+
+def bench_percentile(ctx):
+    res = ctx["res"]
+    scores_sorted = res['train_scores_sorted']
+    rng = np.random.default_rng(0)
+    for n in (1, 10_000):
+        raw = rng.uniform(0.0, 0.06, n)
+        if scores_sorted is not None:
+            yield f"percentile.searchsorted.n{n}", summarize(measure(lambda: scoring.top_percent(raw, scores_sorted)), rows=n)
+        yield f"percentile.sketch.n{n}", summarize(measure(lambda: res['percentile_sketch'].top_percent(raw)), rows=n)
+
+
+def bench_risk_factors(ctx):
+    res = ctx["res"]
+    engine = res['risk_factors']
+    for n in (1, 10_000):
+        X = scoring.encode_matrix(synthetic_frame(n), res)
+        yield f"risk_factors.n{n}", summarize(measure(lambda: engine.evaluate(X)), rows=n)
+
+
+def bench_validation(ctx):
+    validator = ctx["res"]['validator']
+    for n in (1, 10_000):
+        frame = synthetic_frame(n)
+        yield f"validation.encode.n{n}", summarize(measure(lambda: validator.encode(frame)), rows=n)
+
+
+def bench_sore(ctx):
+    res = ctx["res"]
+    for n in (1, 10_000):
+        X = scoring.encode_matrix(synthetic_frame(n), res)
+        yield f"sore.score.n{n}", summarize(measure(lambda: res['sore'].score(X)), rows=n)
+
+
+def bench_handoff(ctx):
+    res = ctx["res"]
+    roster = census.demo_roster(500)
+    yield "handoff.build.n500", summarize(measure(lambda: handoff.build_report(roster, res, res['risk_factors'])), rows=500)
+    report = handoff.build_report(roster, res, res['risk_factors'])
+    yield "handoff.current.n500", summarize(measure(lambda: report.current(roster, res, res['risk_factors'])), rows=500)
+
+
+def bench_sensitivity(ctx):
+    res = ctx["res"]
+    record = scoring.session_record({"gender": "F", "age": 81}, {"sim_alb": 2.6, "sim_crp": 6.0})
+    yield "sensitivity.grid.n200", summarize(measure(lambda: sensitivity.sweep(res, record, "albumin", n=200)), rows=200)
+    yield "sensitivity.grid.n200x200", summarize(
+        measure(lambda: sensitivity.sweep(res, record, "albumin", y_col="crp", n=200), repeat=5), rows=200 * 200)
+
+
+def bench_app(ctx):
+    app = str(ROOT / "fall down.app.py")
+    out = _subprocess_json(APP_RUNS.format(app=app, n=ctx["app_reruns"]))
+    if out["exception"]:
+        raise RuntimeError("AppTest 실행 중 예외")
+    yield "app.first_run", summarize([out["first"]])
+    yield "app.rerun", summarize(out["reruns"])
+
+
+# 이름 접두어 -> 케이스 (--filter 와 접두어가 겹치지 않으면 케이스 자체를 건너뜀)
+CASES = {
+    "cold_start": bench_cold_start,
+    "calculate_risk_score": bench_single,
+    "predict_proba": bench_batch,
+    "percentile": bench_percentile,
+    "risk_factors": bench_risk_factors,
+    "validation": bench_validation,
+    "sore": bench_sore,
+    "handoff": bench_handoff,
+    "sensitivity": bench_sensitivity,
+    "app": bench_app,
+}
+
+
+    # --------------------------------------------------------------------------------
+# 3. 실행 / 비교
+    # --------------------------------------------------------------------------------
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=ROOT).stdout.strip()
+    except OSError:
+        return ""
+
+
+def environment(res):
+    import pandas
+    import sklearn
+    return {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "git_commit": _git_commit(),
+        "model_version": res.get('model_version'),
+        "resource_source": res.get('source'),
+        "compiled": res.get('compiled') is not None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run(name_filter=None, quick=False):
+    res = scoring.load_resources()
+    ctx = {
+        "res": res,
+        "sizes": (1, 1_000) if quick else (1, 100, 10_000, 100_000),
+        "cold_repeat": 1 if quick else 3,
+        "app_reruns": 3 if quick else 10,
+    }
+    results, failed = {}, {}
+    for prefix, case in CASES.items():
+        if name_filter and name_filter not in prefix and not name_filter.startswith(prefix + "."):
+            continue
+        try:
+            for name, stats in case(ctx):
+                if name_filter and name_filter not in name:
+                    continue
+                results[name] = stats
+                print(f"  {name:36s} median {_fmt(stats['median'])}  (min {_fmt(stats['min'])}, p95 {_fmt(stats['p95'])})", flush=True)
+        except Exception as e:
+            failed[prefix] = f"{type(e).__name__}: {e}"
+            print(f"  {prefix:36s} 실패: {failed[prefix]}", flush=True)
+    return {"environment": environment(res), "results": results, "failed": failed}
+
+
+def _fmt(seconds):
+    if seconds >= 1:
+        return f"{seconds:8.3f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.3f} ms"
+    return f"{seconds * 1e6:8.2f} µs"
+
+
+def compare(current, baseline, tolerance, name_filter=None):
+    """median 비율 비교. 반환: 회귀 항목 목록.
+
+    실행 중 실패한 case 와, baseline 에 있는데 이번 결과에 없는 항목 (name_filter 범위 안) 도 회귀로 봅니다.
+    """
+    env_c, env_b = current["environment"], baseline["environment"]
+    for key in ("model_version", "git_commit", "sklearn", "numpy", "platform"):
+        if env_c.get(key) != env_b.get(key):
+            print(f"  [env] {key}: {env_b.get(key)} -> {env_c.get(key)}")
+    regressions = []
+    print(f"  {'benchmark':36s} {'baseline':>11s} {'current':>11s} {'ratio':>7s}")
+    for name, stats in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"  {name:36s} {'-':>11s} {_fmt(stats['median'])}    new")
+            continue
+        ratio = stats["median"] / base["median"] if base["median"] else float("inf")
+        flag = "REGRESSION" if ratio > 1 + tolerance else ("faster" if ratio < 1 / (1 + tolerance) else "")
+        if flag == "REGRESSION":
+            regressions.append(name)
+        print(f"  {name:36s} {_fmt(base['median'])} {_fmt(stats['median'])} {ratio:6.2f}x {flag}")
+    for prefix, error in current.get("failed", {}).items():
+        regressions.append(prefix)
+        print(f"  {prefix:36s} {'-':>11s} {'-':>11s}         FAILED ({error})")
+    for name, base in baseline["results"].items():
+        if name in current["results"] or (name_filter and name_filter not in name):
+            continue
+        if any(name.startswith(prefix + ".") for prefix in current.get("failed", {})):
+            continue  # 위에서 case 실패로 이미 셈
+        regressions.append(name)
+        print(f"  {name:36s} {_fmt(base['median'])} {'-':>11s}         MISSING")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="fall-guard-ai 성능 벤치마크 하네스")
+    ap.add_argument("--out", help="결과 JSON 경로 (기본: benchmarks/results/<timestamp>.json)")
+    ap.add_argument("--compare", help="비교할 baseline JSON")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="median 이 baseline 대비 (1+tolerance)배 초과면 회귀")
+    ap.add_argument("--filter", help="이름에 이 문자열이 포함된 항목만")
+    ap.add_argument("--quick", action="store_true", help="작은 배치/적은 반복 (CI smoke)")
+    args = ap.parse_args()
+
+    current = run(args.filter, args.quick)
+    out = args.out or str(ROOT / "benchmarks" / "results" / f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+    print(f"결과: {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance, args.filter)
+        if regressions:
+            print(f"성능 회귀 {len(regressions)}건: {', '.join(regressions)}")
+            sys.exit(1)
+        print("성능 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
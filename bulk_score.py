@@ -0,0 +1,171 @@
+"""과거 encounter 일괄 스코어링 CLI (CSV/Parquet 입력 -> CSV/Parquet 출력, chunk 스트리밍).
+
+    python bulk_score.py encounters.parquet -o scores.parquet --keep encounter_id,visit_date
+    python bulk_score.py encounters.csv -o scores.csv --chunk-rows 200000 --workers 8
+    python bulk_score.py encounters.csv -o - --keep encounter_id | head      # stdout (CSV)
+
+- 입력은 raw_input_cols (+ --keep 컬럼)만 chunk_rows 행씩 읽습니다 (CSV: pandas chunked reader,
+  Parquet: pyarrow iter_batches). 성별 gender_mapping / 내원시 반응 결측 정규화는 대시보드
+  calculate_risk_score 와 같은 scoring.encode_matrix 규칙이고, chunk 마다 벡터화 호출 1번으로 스코어링합니다.
+- 결과 (keep 컬럼 + raw_score/display_score/risk_group/top_percent/input_error
+  /sore_score/sore_group/sore_top_percent)는 chunk 가 끝날 때마다 출력 파일에
+  이어 씁니다 (CSV append / Parquet row group). 메모리는 입력 크기가 아니라 chunk 크기에 비례합니다.
+- 입력 검증 (validation.InputValidator)에 걸린 행은 중단 없이 격리합니다: risk_group "입력오류",
+  raw_score 빈 값, input_error 에 오류 code (1 숫자 아님 / 2 범위 밖 / 4 정의되지 않은 범주, OR).
+- --workers 2 이상이면 batch_pool.BatchScoringPool (워커가 파일 범위를 직접 읽음)로 병렬 스코어링합니다.
+- 끝나면 행 수, 소요 시간, rows/sec, peak RSS, 위험군 분포를 stderr 에 출력합니다.
+- --sketch-out: 점수 KLL sketch 저장 -> `python live_cutoffs.py <sketch>` 로 drift 리포트 / 참조 재발행.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+import batch_pool
+import scoring
+
+
+    # --------------------------------------------------------------------------------
+# 1. 출력 (chunk append)
+    # --------------------------------------------------------------------------------
+class CsvSink:
+    def __init__(self, path):
+        self._own = path != "-"
+        self._f = open(path, "w", encoding="utf-8", newline="") if self._own else sys.stdout
+        self._header = True
+
+    def write(self, frame):
+        frame.to_csv(self._f, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        if self._own:
+            self._f.close()
+        else:
+            self._f.flush()
+
+
+class ParquetSink:
+    """첫 chunk 의 schema 로 ParquetWriter 를 열고 chunk 마다 row group 1개씩 기록."""
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+
+    def write(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self._writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pandas(frame, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_sink(path):
+    if path == "-" or Path(path).suffix.lower() in (".csv", ".txt"):
+        return CsvSink(path)
+    if Path(path).suffix.lower() in (".parquet", ".pq"):
+        return ParquetSink(path)
+    raise ValueError(f"지원하지 않는 출력 형식: {path} (csv/parquet 또는 -)")
+
+
+    # --------------------------------------------------------------------------------
+# 2. 스코어링
+    # --------------------------------------------------------------------------------
+def score_chunks(path, chunk_rows=100_000, keep_cols=(), workers=1, percentile_index="exact"):
+    """입력 파일 -> 결과 DataFrame chunk 를 입력 순서대로 yield. 마지막에 live sketch 를 반환(StopIteration.value)."""
+    if workers > 1:
+        with batch_pool.BatchScoringPool(workers=workers, chunk_rows=chunk_rows, keep_cols=keep_cols,
+                                         percentile_index=percentile_index) as pool:
+            yield from pool.score_file(path)
+            return pool.live_sketch
+
+    res = scoring.load_resources(percentile_index=percentile_index)
+    columns = set(res['raw_cols']) | set(keep_cols)
+    for frame in batch_pool.iter_file_chunks(path, chunk_rows, columns):
+        yield batch_pool.result_frame(frame, scoring.score_arrays(frame, res), keep_cols)
+    return res['live_sketch']
+
+
+def run(path, out, chunk_rows=100_000, keep_cols=(), workers=1, percentile_index="exact", progress=False, log=sys.stderr):
+    """path 전체를 스코어링해 out 에 스트리밍 기록. 반환: 요약 dict (rows, seconds, rows_per_s, risk_groups, ...)."""
+    columns = batch_pool.file_columns(path)
+    missing_keep = [c for c in keep_cols if c not in columns]
+    if missing_keep:
+        raise ValueError(f"--keep 컬럼이 입력에 없습니다: {missing_keep}")
+    raw_cols = scoring.schema_context(_schema())['raw_cols'] if scoring.SCHEMA_PATH.exists() else []
+    missing_raw = [c for c in raw_cols if c not in columns]
+    if missing_raw:
+        print(f"경고: 입력에 없는 raw_input_cols {missing_raw} 는 결측으로 처리됩니다 (학습 중앙값/최빈값 대체).", file=log)
+
+    sink = open_sink(out)
+    groups = dict.fromkeys([scoring.RISK_HIGH, scoring.RISK_MID, scoring.RISK_LOW, scoring.RISK_INVALID], 0)
+    rows = chunks = 0
+    t0 = time.perf_counter()
+    gen = score_chunks(path, chunk_rows, keep_cols, workers, percentile_index)
+    sketch = None
+    try:
+        while True:
+            try:
+                part = next(gen)
+            except StopIteration as stop:
+                sketch = stop.value
+                break
+            sink.write(part)
+            rows += len(part)
+            chunks += 1
+            labels, counts = np.unique(part["risk_group"].to_numpy(dtype=str), return_counts=True)
+            for label, count in zip(labels, counts):
+                groups[label] = groups.get(label, 0) + int(count)
+            if progress:
+                elapsed = time.perf_counter() - t0
+                print(f"  chunk {chunks}: {rows:,} rows ({rows / elapsed:,.0f} rows/s)", file=log, flush=True)
+    finally:
+        gen.close()
+        sink.close()
+    seconds = time.perf_counter() - t0
+    return {"rows": rows, "chunks": chunks, "seconds": seconds, "rows_per_s": rows / seconds if seconds else 0.0,
+            "peak_rss_mb": batch_pool._peak_rss_mb(), "risk_groups": groups, "live_sketch": sketch}
+
+
+def _schema():
+    with open(scoring.SCHEMA_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="낙상 위험도 일괄 스코어링 (CSV/Parquet, chunk 스트리밍)")
+    ap.add_argument("input", help="입력 .csv / .parquet")
+    ap.add_argument("-o", "--out", required=True, help="출력 .csv / .parquet (- = stdout CSV)")
+    ap.add_argument("--keep", default="", help="출력에 함께 남길 입력 컬럼 (쉼표 구분, 예: encounter_id)")
+    ap.add_argument("--chunk-rows", type=int, default=100_000)
+    ap.add_argument("--workers", type=int, default=1, help="2 이상이면 프로세스 풀")
+    ap.add_argument("--percentile-index", choices=["exact", "sketch"], default="exact")
+    ap.add_argument("--sketch-out", help="점수 KLL sketch 저장 경로 (live_cutoffs 입력)")
+    ap.add_argument("--progress", action="store_true", help="chunk 마다 진행 상황 출력")
+    args = ap.parse_args()
+
+    keep = tuple(c.strip() for c in args.keep.split(",") if c.strip())
+    try:
+        summary = run(args.input, args.out, args.chunk_rows, keep, args.workers, args.percentile_index, args.progress)
+    except ValueError as e:
+        ap.error(str(e))
+    if args.sketch_out and summary["live_sketch"] is not None:
+        Path(args.sketch_out).write_bytes(summary["live_sketch"].to_bytes())
+    groups = " / ".join(f"{k} {v:,}" for k, v in summary["risk_groups"].items())
+    print(f"{summary['rows']:,} rows, {summary['chunks']} chunks, {summary['seconds']:.2f} s "
+          f"-> {summary['rows_per_s']:,.0f} rows/sec, peak RSS {summary['peak_rss_mb']:.0f} MB ({groups})",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""병동 재원환자(census) 일괄 스코어링 + 위험도 순위표.
+
+- 명단(roster) 소스: CSV / Parquet / SQLite (`roster.db` 또는 `roster.db::테이블명`, 기본 테이블 roster)
+  필수 컬럼 patient_id, 나머지 raw_input_cols 와 bed/name/ward 등 표시용 컬럼은 있는 만큼 사용합니다.
+- CensusScorer.refresh 는 명단 전체를 한 번에 인코딩하고, 직전 refresh 와 인코딩 값이 달라진
+  환자(및 신규 환자)만 재스코어링/위험요인 평가합니다. 나머지는 직전 결과를 그대로 씁니다.
+- history(score_history.ScoreHistoryStore)를 넘기면 refresh 마다 환자별 점수를 이력에 기록합니다
+  (같은 점수는 store 의 min_interval_s 안에서 중복 기록하지 않음) -> 병동 추이 차트.
+  명단에서 빠진 퇴원 환자 이력은 store 의 discharge_ttl_s 가 지나면 지웁니다 (evict_missing).
+- alarms(alarm_manager.AlarmManager)를 넘기면 재스코어링한 환자만 cutoff 교차 판정에 넘깁니다 (O(변화)).
+- 입력 검증 (validation) 에 걸린 환자는 위험군 "입력오류" 로 표시하고 순위표 맨 위에 둡니다
+  (점수가 없으므로 알람/이력에는 반영하지 않음).
+- 욕창 위험 (sore_risk, Braden 근사)도 같은 인코딩 행렬로 함께 계산해 sore_score/sore_group 컬럼으로 둡니다.
+- refresh(roster, res) 에 model_registry 의 현재 primary 를 넘기면 모델 교체 시 전원을 새 모델로 재스코어링합니다.
+- 표 렌더링은 ranked -> page 로 현재 페이지 행만 잘라 넘깁니다 (500병상도 화면에는 25~100행).
+"""
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+import scoring
+import validation
+
+SORT_OPTIONS = {
+    "위험도 높은 순": ("raw_score", False),
+    "위험요인 많은 순": ("n_factors", False),
+    "욕창 위험 높은 순": ("sore_score", True),
+    "병상 순": ("bed", True),
+}
+DISPLAY_COLUMNS = ["bed", "name", "patient_id", "risk_group", "display_score", "top_percent", "sore_score", "sore_group", "factors"]
+
+
+    # --------------------------------------------------------------------------------
+# 1. 명단 로딩
+    # --------------------------------------------------------------------------------
+def _split_sqlite(source):
+    path, _, table = str(source).partition("::")
+    return path, table or "roster"
+
+
+def source_mtime(source):
+    """캐시 무효화용 소스 수정 시각 (없으면 0)."""
+    if not source:
+        return 0.0
+    path = _split_sqlite(source)[0]
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+
+def load_roster(source):
+    """CSV / Parquet / SQLite 명단 -> DataFrame (patient_id 는 문자열)."""
+    import pandas as pd  # 명단을 읽을 때만 import (cold start 단축)
+    path, table = _split_sqlite(source)
+    suffix = Path(path).suffix.lower()
+    if suffix in (".parquet", ".pq"):
+        roster = pd.read_parquet(path)
+    elif suffix in (".db", ".sqlite", ".sqlite3"):
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+            roster = pd.read_sql_query(f'SELECT * FROM "{table}"', conn)
+    else:
+        roster = pd.read_csv(path, dtype={"patient_id": str})
+    if "patient_id" not in roster:
+        raise ValueError(f"명단에 patient_id 컬럼이 없습니다: {source}")
+    roster["patient_id"] = roster["patient_id"].astype(str)
+    return roster
+
+
+def demo_roster(n=500, seed=7):
+    """데모용 합성 병동 명단 (n 병상)."""
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    wards = np.array(["41W", "51W", "61W", "71W", "ICU"])
+    return pd.DataFrame({
+        "patient_id": [f"{10_000_000 + i}" for i in range(n)],
+        "ward": wards[np.arange(n) * len(wards) // n],
+        "bed": [f"{(i // 4) % 99 + 1:02d}-{i % 4 + 1:02d}" for i in range(n)],
+        "name": [f"환자{i + 1:03d}" for i in range(n)],
+        "성별": rng.choice(["M", "F"], n),
+        "나이": rng.integers(20, 95, n),
+        "중증도분류": rng.integers(1, 6, n),
+        "SBP": rng.normal(130, 22, n).round(),
+        "DBP": rng.normal(78, 13, n).round(),
+        "RR": rng.normal(19, 3, n).round(),
+        "PR": rng.normal(84, 15, n).round(),
+        "BT": rng.normal(36.8, 0.5, n).round(1),
+        "내원시 반응": rng.choice(["alert", "verbal response", "painful response"], n, p=[0.9, 0.07, 0.03]),
+        "albumin": rng.normal(3.7, 0.5, n).round(1),
+        "crp": np.abs(rng.normal(2.5, 4.0, n)).round(1),
+    })
+
+
+    # --------------------------------------------------------------------------------
+# 2. 증분 스코어링
+    # --------------------------------------------------------------------------------
+def encode_roster(roster, res):
+    """명단 -> (X (n, 11), 행 오류 code (n,)). validator 가 있으면 변환 불가 / 범위 밖 값도 예외 없이 code 로 표시."""
+    validator = res.get('validator')
+    if validator is None:
+        X = scoring.encode_matrix(roster, res)
+        return X, np.zeros(len(X), dtype=np.uint8)
+    X, errors = validator.encode(roster)
+    return X, validation.row_codes(errors)
+
+
+def match_rows(ids, X, prev_ids, prev_X, codes=None, prev_codes=None):
+    """직전 명단 (prev_ids, prev_X) 대비 -> (old_idx, known, changed). changed: 신규이거나 인코딩 입력이 달라진 환자.
+
+    codes / prev_codes (행 오류 code) 를 주면 code 가 달라진 환자도 changed (예: "pending" -> 결측은 X 가 같은 NaN).
+    """
+    pos = {pid: i for i, pid in enumerate(prev_ids)}
+    old_idx = np.array([pos.get(pid, -1) for pid in ids], dtype=np.intp)
+    known = old_idx >= 0
+    changed = ~known
+    if known.any():
+        A, B = X[known], prev_X[old_idx[known]]
+        changed[known] = ((A != B) & ~(np.isnan(A) & np.isnan(B))).any(axis=1)
+        if codes is not None and prev_codes is not None:
+            changed[known] |= codes[known] != prev_codes[old_idx[known]]
+    return old_idx, known, changed
+
+
+def carry_over(prev_results, old_idx, known, n):
+    """n 명 결과 배열 dict. known 행은 직전 결과 (prev_results[col][old_idx]) 를 그대로 가져옴."""
+    results = {
+        "raw_score": np.full(n, np.nan),
+        "display_score": np.zeros(n, dtype=int),
+        "risk_group": np.full(n, None, dtype=object),
+        "top_percent": np.full(n, np.nan),
+        "input_error": np.zeros(n, dtype=np.uint8),
+        "sore_score": np.full(n, -1),
+        "sore_group": np.full(n, None, dtype=object),
+        "sore_top_percent": np.full(n, np.nan),
+        "n_factors": np.zeros(n, dtype=int),
+        "factors": np.full(n, "", dtype=object),
+    }
+    if known.any():
+        for col, arr in results.items():
+            arr[known] = prev_results[col][old_idx[known]]
+    return results
+
+
+def score_rows(X, rows, results, res, engine=None, codes=None):
+    """X[rows] 를 스코어링해 results 의 해당 행을 채움 (위험요인 포함). 반환: score_matrix 결과.
+
+    codes: encode_roster 의 행 오류 code. 주면 그 code 로 격리 (변환 불가 값은 X 에서 NaN 이라 check 로는 못 잡음).
+    """
+    out = scoring.score_matrix(X[rows], res) if codes is None else scoring._score_checked(X[rows], codes[rows], res)
+    for col in scoring.RESULT_COLUMNS:
+        results[col][rows] = out[col]
+    if engine is not None:
+        M = engine.evaluate(X[rows])
+        results["n_factors"][rows] = M.sum(axis=1)
+        results["factors"][rows] = [", ".join(engine.labels_for(m)) for m in M]
+    return out
+
+
+def result_table(roster, results, raw_cols):
+    """명단 표시용 컬럼 (raw 입력 제외) + 결과 컬럼 DataFrame."""
+    meta = [c for c in roster.columns if c not in raw_cols]
+    table = roster[meta].reset_index(drop=True)
+    for col, arr in results.items():
+        table[col] = arr
+    return table
+
+
+class CensusScorer:
+    """직전 명단과 비교해 입력이 바뀐 환자만 재계산하는 census 스코어러 (세션 간 공유, thread-safe)."""
+
+    def __init__(self, res, engine=None, history=None, alarms=None):
+        self.res = res
+        self.history = history
+        self.alarms = alarms
+        self.engine = engine if engine is not None else res.get('risk_factors')
+        self.ids = np.empty(0, dtype=object)
+        self.X = np.empty((0, len(res['raw_cols'])))
+        self.results = {}
+        self.last_refresh = {"patients": 0, "rescored": 0, "invalid": 0, "ms": 0.0}
+        self._lock = threading.Lock()
+
+    def refresh(self, roster, res=None):
+        """res: 현재 primary resources (model_registry). model_version 이 바뀌었으면 전원 재스코어링."""
+        with self._lock:
+            t0 = time.perf_counter()
+            if res is not None and res.get('model_version') != self.res.get('model_version'):
+                self._swap(res)
+            ids = roster["patient_id"].astype(str).to_numpy(dtype=object)
+            X, codes = encode_roster(roster, self.res)
+
+            old_idx, known, changed = match_rows(ids, X, self.ids, self.X, codes, self.results.get("input_error"))
+            results = carry_over(self.results, old_idx, known, len(ids))
+            rows = np.flatnonzero(changed)
+            if len(rows):
+                out = score_rows(X, rows, results, self.res, self.engine, codes)
+                if self.alarms is not None:
+                    ok = out["input_error"] == 0  # 입력 오류 행은 점수가 없으므로 알람 상태를 바꾸지 않음
+                    self.alarms.update_many(ids[rows][ok], out["raw_score"][ok], out["display_score"][ok])
+
+            self.ids, self.X, self.results = ids, X, results
+            invalid = results["input_error"] != 0
+            if self.history is not None:
+                self.history.record_many(ids[~invalid], results["raw_score"][~invalid])
+                self.history.evict_missing(ids)  # 명단에서 빠진 지 discharge_ttl_s 지난 퇴원 환자 정리
+            self.last_refresh = {"patients": len(ids), "rescored": int(len(rows)), "invalid": int(invalid.sum()),
+                                 "ms": (time.perf_counter() - t0) * 1e3}
+            return result_table(roster, self.results, self.res['raw_cols'])
+
+    def _swap(self, res):
+        """모델 교체: 직전 결과는 이전 모델 점수이므로 버리고, 알람 cutoff 를 새 모델 기준으로 (registry 를 따르는 알람은 이미 같음)."""
+        self.res = res
+        self.ids = np.empty(0, dtype=object)
+        self.X = np.empty((0, len(res['raw_cols'])))
+        self.results = {}
+        if self.alarms is not None:
+            self.alarms.cutoff = float(res['cutoff_top20'])
+
+
+def ranked(table, sort_label="위험도 높은 순"):
+    col, ascending = SORT_OPTIONS[sort_label]
+    if col not in table:
+        col, ascending = "raw_score", False
+    return table.sort_values(col, ascending=ascending, kind="stable", na_position="first")  # 입력오류 (점수 없음) 행을 위로
+
+
+def page(table, page_no, page_size):
+    """1부터 시작하는 page_no 페이지의 표시 컬럼만 잘라 반환."""
+    start = (int(page_no) - 1) * int(page_size)
+    cols = [c for c in DISPLAY_COLUMNS if c in table]
+    return table.iloc[start:start + int(page_size)][cols]
@@ -0,0 +1,149 @@
+"""Compiled scorer: sklearn 파이프라인을 고정된 NumPy 연산열로 평가.
+
+risk_score_model.joblib 은 (ColumnTransformer 전처리 -> RUS/SMOTE -> LogisticRegression(saga))
+구조입니다. 샘플러는 예측 시 통과(no-op)이므로, 로딩 시점에 아래 파라미터만 한 번 추출하면
+predict_proba 와 동일한 값을 DataFrame 검증/ColumnTransformer 디스패치 없이 계산할 수 있습니다.
+
+    num: SimpleImputer(median) -> StandardScaler   (statistics_, mean_, scale_)
+    cat: SimpleImputer(most_frequent) -> OneHotEncoder(handle_unknown='ignore')
+    model: coef_, intercept_
+
+입력은 scoring.encode_matrix 가 만든 raw_cols 순서의 (n, 11) 행렬입니다.
+(내원시 반응 = schema category_options 인덱스, 결측 NaN, 미정의 값 -1)
+이 모듈은 sklearn 을 import 하지 않습니다 (추출 시 객체 속성만 읽음).
+"""
+import numpy as np
+
+
+def _steps(obj):
+    """Pipeline / 단일 변환기를 [(name, step)] 목록으로."""
+    return list(obj.steps) if hasattr(obj, "steps") else [(type(obj).__name__, obj)]
+
+
+def _final_estimator(model):
+    steps = _steps(model)
+    pre = [s for _, s in steps[:-1] if not hasattr(s, "fit_resample")]  # 샘플러 제외
+    return pre, steps[-1][1]
+
+
+class CompiledScorer:
+    """추출된 파라미터로 P(낙상=1)을 계산하는 NumPy 스코어러."""
+
+    def __init__(self, num_idx, num_fill, num_mean, num_scale,
+                 cat_idx, cat_fill, onehot_table, coef, intercept, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.num_idx = np.asarray(num_idx, dtype=np.intp)
+        self.num_fill = np.asarray(num_fill, dtype=self.dtype)
+        self.num_mean = np.asarray(num_mean, dtype=self.dtype)
+        self.num_scale = np.asarray(num_scale, dtype=self.dtype)
+        self.cat_idx = int(cat_idx)
+        self.cat_fill = int(cat_fill)
+        # onehot_table[code]: schema 카테고리 code -> 인코더 순서의 one-hot 행 (마지막 행 = 미정의 값, 전부 0)
+        self.onehot_table = np.asarray(onehot_table, dtype=self.dtype)
+        # (n_features, 1): sklearn 과 같은 X @ coef_.T 형태로 계산해야 비트 단위로 일치합니다.
+        self.coef = np.asarray(coef, dtype=self.dtype).reshape(-1, 1)
+        self.intercept = np.asarray(intercept, dtype=self.dtype).reshape(-1)
+
+    @classmethod
+    def from_pipeline(cls, model, schema_categories, raw_cols=None, dtype=np.float64):
+        """학습된 (imblearn/sklearn) Pipeline 에서 파라미터 추출. 미지원 구조면 ValueError."""
+        pre, clf = _final_estimator(model)
+        if len(pre) != 1 or not hasattr(pre[0], "transformers_"):
+            raise ValueError("전처리 단계가 ColumnTransformer 하나가 아닙니다.")
+        ct = pre[0]
+        if getattr(ct, "sparse_output_", False):
+            raise ValueError("sparse 출력 ColumnTransformer 는 지원하지 않습니다.")
+        if len(getattr(clf, "classes_", [])) != 2 or clf.coef_.shape[0] != 1:
+            raise ValueError("이진 LogisticRegression 만 지원합니다.")
+
+        raw_cols = list(raw_cols if raw_cols is not None else ct.feature_names_in_)
+        col_pos = {c: i for i, c in enumerate(raw_cols)}
+        num = cat = None
+        for name, trans, cols in ct.transformers_:
+            if name == "remainder":
+                if trans != "drop" and len(cols):
+                    raise ValueError("remainder 컬럼 passthrough 는 지원하지 않습니다.")
+                continue
+            kinds = {type(s).__name__: s for _, s in _steps(trans)}
+            if set(kinds) == {"SimpleImputer", "StandardScaler"}:
+                num = (name, kinds, list(cols))
+            elif set(kinds) == {"SimpleImputer", "OneHotEncoder"} and len(cols) == 1:
+                cat = (name, kinds, list(cols))
+            else:
+                raise ValueError(f"지원하지 않는 변환기 구성: {name} {sorted(kinds)}")
+        if num is None or cat is None:
+            raise ValueError("num/cat 변환기를 찾지 못했습니다.")
+
+        # 출력 열 순서대로 coef 분할
+        coef = clf.coef_.ravel()
+        num_slice, cat_slice = ct.output_indices_[num[0]], ct.output_indices_[cat[0]]
+
+        imp, scaler = num[1]["SimpleImputer"], num[1]["StandardScaler"]
+        n_num = len(num[2])
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n_num)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_num)
+
+        cat_imp, onehot = cat[1]["SimpleImputer"], cat[1]["OneHotEncoder"]
+        if onehot.drop is not None or getattr(onehot, "_infrequent_enabled", False):
+            raise ValueError("drop/infrequent 옵션 OneHotEncoder 는 지원하지 않습니다.")
+        enc_cats = [str(c) for c in onehot.categories_[0]]
+        schema_categories = [str(c) for c in schema_categories]
+        table = np.zeros((len(schema_categories) + 1, len(enc_cats)))
+        for code, c in enumerate(schema_categories):
+            if c in enc_cats:
+                table[code, enc_cats.index(c)] = 1.0
+        fill_value = str(cat_imp.statistics_[0])
+        if fill_value not in schema_categories:
+            raise ValueError(f"범주 imputer 값 '{fill_value}' 이 schema category_options 에 없습니다.")
+
+        # 출력 행렬 = [num 블록 | cat 블록] 순서를 전제로 coef 재배열
+        full_coef = np.concatenate([coef[num_slice], coef[cat_slice]])
+        return cls(
+            num_idx=[col_pos[c] for c in num[2]],
+            num_fill=imp.statistics_,
+            num_mean=mean,
+            num_scale=scale,
+            cat_idx=col_pos[cat[2][0]],
+            cat_fill=schema_categories.index(fill_value),
+            onehot_table=table,
+            coef=full_coef,
+            intercept=clf.intercept_,
+            dtype=dtype,
+        )
+
+    PARAMS = ("num_idx", "num_fill", "num_mean", "num_scale", "cat_idx", "cat_fill", "onehot_table", "coef", "intercept")
+
+    def params(self):
+        """생성자 인자 dict (NumPy 배열). model_bundle 이 그대로 저장합니다."""
+        return {name: np.asarray(getattr(self, name)) for name in self.PARAMS}
+
+    @classmethod
+    def from_params(cls, params, dtype=np.float64):
+        return cls(**{name: params[name] for name in cls.PARAMS}, dtype=dtype)
+
+    def transform(self, X):
+        """raw 행렬 (n, 11) -> 모델 입력 행렬 (n, n_features). ColumnTransformer.transform 과 동일."""
+        X = np.asarray(X, dtype=self.dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        Z = X[:, self.num_idx]  # fancy indexing -> 복사본
+        missing = np.isnan(Z)
+        if missing.any():
+            Z[missing] = np.broadcast_to(self.num_fill, Z.shape)[missing]
+        Z -= self.num_mean
+        Z /= self.num_scale
+
+        codes = X[:, self.cat_idx]
+        codes = np.where(np.isnan(codes), self.cat_fill, codes).astype(np.intp)
+        codes[codes < 0] = len(self.onehot_table) - 1
+        return np.hstack([Z, self.onehot_table[codes]])
+
+    def decision_function(self, X):
+        return (self.transform(X) @ self.coef + self.intercept).reshape(-1)
+
+    def predict_proba1(self, X):
+        """양성 클래스 확률 (n,)."""
+        z = self.decision_function(X)
+        with np.errstate(over="ignore"):
+            return 1.0 / (1.0 + np.exp(-z))
@@ -0,0 +1,42 @@
+"""환자별 가산(additive) 설명: 로지스틱 회귀 기여도 = coef × (변환 feature − 학습 기준값).
+
+모델은 logit = intercept + Σ coef_j · z_j (z = ColumnTransformer 출력) 인 선형 모델이므로
+기준 환자 z0 에 대해  logit(x) − logit(z0) = Σ coef_j · (z_j − z0_j)  가 정확히 성립합니다.
+기준 환자(baseline)는 학습 데이터 기준값입니다:
+    수치형: StandardScaler 학습 평균 (z = 0),  내원시 반응: 학습 최빈값 (most_frequent imputer 값)
+one-hot 열은 원래 입력(내원시 반응) 하나로 합산해 raw_cols 순서 (n, 11) 기여도 행렬로 돌려줍니다.
+계산은 compiled scorer 변환 결과에 (n_features, 11) 가중 행렬을 한 번 곱하는 것이므로
+병동 배치 설명 비용은 스코어링과 같은 수준입니다.
+"""
+import numpy as np
+
+
+class Explainer:
+    """CompiledScorer 파라미터로 만든 기여도 계산기."""
+
+    def __init__(self, compiled, raw_cols):
+        self.compiled = compiled
+        self.raw_cols = list(raw_cols)
+        n_num = len(compiled.num_idx)
+        n_feat = len(compiled.coef)
+
+        # 변환 열 -> raw 입력 열 그룹 행렬 (one-hot 블록은 모두 cat 열로)
+        group = np.zeros((n_feat, len(self.raw_cols)), dtype=compiled.dtype)
+        group[np.arange(n_num), compiled.num_idx] = 1.0
+        group[n_num:, compiled.cat_idx] = 1.0
+        self.weights = compiled.coef * group  # (n_feat, 11)
+
+        self.baseline_z = np.concatenate([np.zeros(n_num), compiled.onehot_table[compiled.cat_fill]])
+        self.baseline_contrib = self.baseline_z @ self.weights
+        self.baseline_logit = float(self.baseline_z @ compiled.coef.ravel() + compiled.intercept[0])
+
+    def contributions(self, X):
+        """encode_matrix 행렬 (n, 11) -> raw_cols 순서 logit 기여도 (n, 11). 행 합 + baseline_logit = logit."""
+        return self.compiled.transform(X) @ self.weights - self.baseline_contrib
+
+    def explain(self, X, top_k=None):
+        """환자별 [(feature, 기여도)] 목록 (|기여도| 큰 순)."""
+        C = self.contributions(X)
+        order = np.argsort(-np.abs(C), axis=1)[:, :top_k]
+        return [[(self.raw_cols[j], float(row[j])) for j in idx] for row, idx in zip(C, order)]
+
@@ -1,11 +1,26 @@
 import streamlit as st
-import pandas as pd
 import datetime
 import time
-import joblib
 import numpy as np
 import json
-import altair as alt
+import os
+
+import alarm_manager
+import census
+import handoff
+import instrumentation
+import live_cutoffs
+import model_registry
+import note_store
+import score_history
+import risk_factors
+import score_cache
+import scoring
+import sensitivity
+import ui_templates
+import validation
+
+instrumentation.begin_rerun()
 
     # --------------------------------------------------------------------------------
 # 1. 페이지 설정 및 상태 관리
@@ -24,162 +39,139 @@ st.set_page_config(
     # --------------------------------------------------------------------------------
 # 3. 스타일 (CSS) - 알람 박스 디자인 수정됨
     # --------------------------------------------------------------------------------
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@300;400;700&display=swap');
-    .stApp { background-color: #1e252b; color: #e0e0e0; font-family: 'Noto Sans KR', sans-serif; }
-
-    /* 헤더 */
-    .header-container {
-        background-color: #263238; padding: 10px 20px; border-radius: 5px;
-        border-top: 3px solid #0288d1; box-shadow: 0 2px 5px rgba(0,0,0,0.3); margin-bottom: 10px;
-    }
-    .header-info-text { font-size: 1.1em; color: #eceff1; margin-right: 15px; }
-
-    /* 디지털 계기판 */
-    .digital-monitor-container {
-        background-color: #000000; border: 2px solid #455a64; border-radius: 8px;
-        padding: 15px; margin-top: 15px; margin-bottom: 5px;
-        box-shadow: inset 0 0 20px rgba(0,0,0,0.9); transition: border 0.3s;
-        display: flex !important; flex-direction: row !important;
-        justify-content: space-around !important; align-items: center !important;
-    }
-    @keyframes blink { 50% { border-color: #ff5252; box-shadow: 0 0 15px #ff5252; } }
-    .alarm-active { animation: blink 1s infinite; border: 2px solid #ff5252 !important; }
-
-    .score-box { text-align: center; width: 45%; display: flex; flex-direction: column; align-items: center; justify-content: center; }
-    .digital-number { font-family: 'Consolas', monospace; font-size: 36px; font-weight: 900; line-height: 1.0; text-shadow: 0 0 10px rgba(255,255,255,0.4); margin-top: 5px; }
-    .monitor-label { color: #90a4ae; font-size: 12px; font-weight: bold; letter-spacing: 1px; }
-    .divider-line { width: 1px; height: 50px; background-color: #444; }
-
-    /* [수정] 알람 박스 디자인 개선 (높이 자동 조절) */
-    .custom-alert-box {
-        position: fixed; 
-        bottom: 30px; 
-        right: 30px; 
-        width: 380px;
-        height: auto; /* 높이 자동 조절 */
-        background-color: #263238; 
-        border-left: 8px solid #ff5252;
-        box-shadow: 0 6px 25px rgba(0,0,0,0.7); 
-        border-radius: 8px;
-        padding: 20px; 
-        z-index: 9999; 
-        animation: slideIn 0.5s ease-out;
-        font-family: 'Noto Sans KR', sans-serif;
-    }
-    @keyframes slideIn { from { transform: translateX(120%); } to { transform: translateX(0); } }
-    
-    .alert-title { color: #ff5252; font-weight: bold; font-size: 1.4em; margin-bottom: 10px; display: flex; align-items: center; gap: 10px; }
-    .alert-content { color: #eceff1; font-size: 1.0em; margin-bottom: 15px; line-height: 1.5; }
-    .alert-factors { background-color: #3e2723; padding: 12px; border-radius: 6px; margin-bottom: 20px; color: #ffcdd2; font-size: 0.95em; border: 1px solid #ff5252; }
-    
-    /* HTML 버튼 스타일링 */
-    a.btn-confirm {
-        display: block; 
-        width: 100%;
-        background-color: #d32f2f; 
-        color: white !important; 
-        text-align: center; 
-        padding: 12px 0; 
-        border-radius: 6px; 
-        font-weight: bold; 
-        font-size: 1.1em;
-        text-decoration: none !important;
-        transition: background-color 0.3s;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.2);
-    }
-    a.btn-confirm:hover { background-color: #b71c1c; transform: translateY(-1px); }
-
-    /* 기타 UI */
-    .note-entry { background-color: #2c3e50; padding: 15px; border-radius: 5px; border-left: 4px solid #0288d1; margin-bottom: 10px; }
-    .risk-tag { display: inline-block; padding: 2px 8px; border-radius: 10px; font-size: 12px; margin: 2px; border: 1px solid #ff5252; color: #ff867c; }
-    .legend-item { display: inline-block; padding: 2px 8px; margin-right: 5px; border-radius: 3px; font-size: 0.75em; font-weight: bold; color: white; text-align: center; }
-    
-    div[data-testid="stDialog"] { background-color: #263238; color: #eceff1; }
-    .stButton > button { background-color: #37474f; color: white; border: 1px solid #455a64; }
-    .stTabs [data-baseweb="tab-list"] { gap: 2px; }
-    .stTabs [data-baseweb="tab"] { background-color: #263238; color: #b0bec5; border-radius: 4px 4px 0 0; }
-    .stTabs [aria-selected="true"] { background-color: #0277bd; color: white; }
-
-/* (수정) Streamlit 버튼을 Confirm 버튼처럼 보이게 */
-div.stButton > button {
-    width: 100%;
-    background-color: #d32f2f;
-    color: white;
-    border: none;
-    padding: 12px 0;
-    border-radius: 6px;
-    font-weight: bold;
-    font-size: 1.1em;
-    box-shadow: 0 2px 5px rgba(0,0,0,0.2);
-    transition: background-color 0.3s, transform 0.2s;
-}
-div.stButton > button:hover {
-    background-color: #b71c1c;
-    transform: translateY(-1px);
-}
-
-</style>
-""", unsafe_allow_html=True)
+with instrumentation.span("css"):
+    st.markdown(ui_templates.CSS, unsafe_allow_html=True)  # 정적 CSS (ui_templates: import 시 1번 구성, fragment rerun 에서는 안 보냄)
 
     # --------------------------------------------------------------------------------
 # 4. 리소스 로딩
     # --------------------------------------------------------------------------------
 @st.cache_resource
-def load_resources():
-    """새 cutoff 모델 아티팩트 로딩 (모델 + schema + train 점수 기준 cutoff)."""
-    resources = {}
+def load_registry():
+    """모델 registry (FALLGUARD_REGISTRY_DIR 의 registry.json primary + shadow 후보, 없으면 저장소 루트 아티팩트).
+    버전마다 단일 번들 우선, 없으면 모델 + schema + train 점수 기준 cutoff.
+    실패는 캐시하지 않으므로 아티팩트를 고치면 다음 rerun 에서 다시 시도합니다.
+    registry.json 이 바뀌면 active() 가 재시작 없이 primary 를 교체합니다 (점수 캐시는 model_version 으로 분리)."""
+    return model_registry.ModelRegistry()
+
+with instrumentation.span("load_resources"):
     try:
-        # 1) 모델
-        resources['model'] = joblib.load('risk_score_model.joblib')
-
-        # 2) schema
-        with open('dashboard_schema.json', 'r', encoding='utf-8') as f:
-            schema = json.load(f)
-        resources['schema'] = schema
-
-        # 3) train score reference (cutoff)
-        ref = np.load('train_score_ref.npz', allow_pickle=True)
-        scores_sorted = ref.get('train_scores_sorted', None)
-        if scores_sorted is None:
-            raise ValueError("train_score_ref.npz 안에 'train_scores_sorted'가 없습니다.")
-
-        scores_sorted = np.array(scores_sorted).astype(float)
-        resources['train_scores_sorted'] = scores_sorted
-        cut20 = ref.get('cutoff_top20', None)
-        cut40 = ref.get('cutoff_top40', None)
-        resources['cutoff_top20'] = float(np.quantile(scores_sorted, 0.80)) if cut20 is None else float(cut20)
-        resources['cutoff_top40'] = float(np.quantile(scores_sorted, 0.60)) if cut40 is None else float(cut40)
-
-        # schema 구성요소
-        resources['raw_cols'] = schema.get('raw_input_cols', [])
-        resources['category_options'] = schema.get('category_options', {})
-        resources['gender_mapping'] = schema.get('gender_mapping', {'M': 1, 'F': 0})
-    except Exception:
+        registry = load_registry()
+        res, res_error = registry.active(), None
+    except Exception as e:
+        registry, res, res_error = None, None, f"{type(e).__name__}: {e}"
+
+if res_error:
+    st.error(f"⚠️ 낙상 위험도 모델을 불러오지 못했습니다. 점수/위험군이 계산되지 않습니다. ({res_error})")
+elif registry.error:
+    st.warning(f"모델 registry 변경을 적용하지 못해 이전 primary ({registry.primary_version}) 를 유지합니다: {registry.error}")
+elif res.get('bundle_status'):
+    st.warning(f"모델 번들: {res['bundle_status']}")
+
+@st.cache_resource
+def load_factor_engine():
+    """위험요인 규칙 엔진 (schema risk_factor_rules). 모델 로딩 실패와 무관하게 동작."""
+    return risk_factors.load_engine()
+
+factor_engine = load_factor_engine()
+
+@st.cache_resource
+def get_score_cache():
+    """세션 간 공유 점수 캐시 (프로세스당 1개). FALLGUARD_SCORE_CACHE_SIZE=0 이면 사용 안 함."""
+    return score_cache.ScoreCache(maxsize=int(os.environ.get("FALLGUARD_SCORE_CACHE_SIZE", score_cache.DEFAULT_MAXSIZE)))
+
+@st.cache_resource
+def get_score_history():
+    """환자별 점수 이력 (세션 간 공유 ring buffer). ring 밖 데이터는 FALLGUARD_HISTORY_DIR (기본 score_history/) 로 spill."""
+    return score_history.ScoreHistoryStore(spill_dir=os.environ.get("FALLGUARD_HISTORY_DIR") or os.path.join(scoring.BASE_DIR, "score_history"))
+
+@st.cache_resource
+def get_alarm_manager():
+    """세션 간 공유 알람 상태 (cutoff_top20 교차 1회 판정 + 중앙 확인 기록).
+    FALLGUARD_ALARM_DB 가 있으면 SQLite 에 기록하고 같은 DB 를 쓰는 다른 워커와 동기화.
+    cutoff 는 판정마다 registry 현재 primary 기준 (모델 교체 후에도 위험군과 같은 cutoff_top20)."""
+    path = os.environ.get("FALLGUARD_ALARM_DB")
+    return alarm_manager.AlarmManager(res['cutoff_top20'], alarm_manager.SQLiteBackend(path) if path else None,
+                                      resources=registry.active) if res else None
+
+@st.cache_resource
+def get_census_scorer():
+    """병동 census 스코어러 (세션 간 공유: 직전 refresh 대비 입력이 바뀐 환자만 재계산)."""
+    return census.CensusScorer(res, factor_engine, get_score_history(), get_alarm_manager()) if res else None
+
+@st.cache_resource
+def get_handoff_scheduler():
+    """근무조 인수인계 보고서 스케줄러 (프로세스당 스레드 1개). 근무조 경계 FALLGUARD_HANDOFF_LEAD_S (기본 15분) 전에
+    명단 전체를 미리 계산해 둠. 보고서 보관: FALLGUARD_HANDOFF_DIR (없으면 메모리)."""
+    if registry is None:
         return None
-    return resources
+    source = os.environ.get("FALLGUARD_ROSTER", "")
+    history = get_score_history()
+
+    def build(shift_start):
+        roster = census.load_roster(source) if source else census.demo_roster()
+        return handoff.build_report(roster, registry.active(), factor_engine, history, shift_start)
+    lead_s = float(os.environ.get("FALLGUARD_HANDOFF_LEAD_S", handoff.DEFAULT_LEAD_S))
+    return handoff.HandoffScheduler(handoff.default_store(), build, lead_s).start()
 
-res = load_resources()
+@st.cache_data(show_spinner=False)
+def load_census_roster(source, mtime):
+    """FALLGUARD_ROSTER (csv/parquet/sqlite) 명단. 미설정 시 데모 500병상. mtime 이 바뀌면 다시 읽음."""
+    return census.load_roster(source) if source else census.demo_roster()
+
+@st.cache_resource
+def start_metrics_endpoint():
+    """FALLGUARD_METRICS_PORT 가 있으면 Prometheus /metrics 스레드 시작 (프로세스당 1회)."""
+    port = os.environ.get("FALLGUARD_METRICS_PORT")
+    return instrumentation.start_metrics_server(int(port)) if port and instrumentation.enabled() else None
+
+start_metrics_endpoint()
+
+@st.cache_resource
+def get_note_store():
+    """간호기록 저장소 (SQLite WAL, 세션 간 공유). 경로: FALLGUARD_NOTES_DB, 기본 nursing_notes.db"""
+    return note_store.NoteStore()
+
+NOTE_WRITER = "김분당"
+NOTE_PAGE_SIZE = 10
+ALARM_POLL_S = 2  # 다른 스테이션의 알람 변화(확인/해제) 확인 주기
+HANDOFF_POLL_S = 2  # 인수인계 보고서 생성 완료 확인 주기
+DEMO_NOTE = {"ts": "2025-12-12 08:00", "writer": NOTE_WRITER, "content": "활력징후 측정함. 특이사항 없음."}
 
     # --------------------------------------------------------------------------------
 # 5. 상태 초기화 (데이터 유지)
     # --------------------------------------------------------------------------------
-if 'nursing_notes' not in st.session_state:
-    st.session_state.nursing_notes = [{"time": "2025-12-12 08:00", "writer": "김분당", "content": "활력징후 측정함. 특이사항 없음."}]
+if 'note_cursors' not in st.session_state: st.session_state.note_cursors = []
 if 'current_pt_idx' not in st.session_state: st.session_state.current_pt_idx = 0
-if 'alarm_confirmed' not in st.session_state: st.session_state.alarm_confirmed = False
 if 'last_detected_factors' not in st.session_state: st.session_state.last_detected_factors = []
 if 'last_fall_score' not in st.session_state: st.session_state.last_fall_score = None
-if 'last_confirmed_factors' not in st.session_state: st.session_state.last_confirmed_factors = []
-if 'last_confirmed_score' not in st.session_state: st.session_state.last_confirmed_score = None
-
-def confirm_alarm():
-    """알람 확인 처리: 세션 상태를 유지한 채로 알람만 확인 처리합니다."""
-    st.session_state.alarm_confirmed = True
-    # 확인 당시 요인/점수 스냅샷 저장
-    st.session_state.last_confirmed_factors = st.session_state.get('last_detected_factors', [])
-    st.session_state.last_confirmed_score = st.session_state.get('last_fall_score', None)
+if 'alarm_sub' not in st.session_state and get_alarm_manager() is not None:
+    st.session_state.alarm_sub = get_alarm_manager().subscribe(())
+
+def save_rerun_timing(stages):
+    """fragment 만 다시 실행된 rerun 의 구간별 ms (디버그 패널 '직전 rerun' 표시)."""
+    st.session_state.last_rerun_timing = stages
+
+def save_note_draft(patient_id):
+    """간호기록 탭 '저장' 버튼: 입력한 기록을 저장소에 추가하고 입력창을 비움."""
+    draft = st.session_state.get("note_draft", "").strip()
+    if draft:
+        get_note_store().append(patient_id, draft, NOTE_WRITER)
+        st.session_state.note_draft = ""
+        st.session_state.note_cursors = []
+
+def confirm_alarm(patient_id):
+    """알람 확인 처리: 공유 알람 상태에 확인자/시각과 확인 당시 요인/점수 스냅샷을 기록합니다.
+    (다른 스테이션도 다음 갱신에서 깜빡임이 멈춤. 이미 확인된 알람이면 무시)"""
+    get_alarm_manager().confirm(patient_id, NOTE_WRITER,
+                                score=st.session_state.get('last_fall_score', None),
+                                factors=st.session_state.get('last_detected_factors', []))
+
+@st.fragment(run_every=ALARM_POLL_S)
+def watch_alarms():
+    """다른 세션/워커의 알람 변화(발생/확인/해제)가 push 됐을 때만 전체 화면을 다시 그림. 평소에는 대기열 확인만."""
+    sub = st.session_state.get("alarm_sub")
+    if sub is not None and sub.drain():
+        st.rerun(scope="app")
 
 
 # 시뮬레이션 변수 초기화 (개별 키 사용)
@@ -237,70 +229,48 @@ def apply_patient_preset(patient_id: str):
         return
     for k, v in preset.items():
         st.session_state[k] = v
-    # 알람 확인 상태는 환자 전환 시 리셋(새 환자에서 알람이 떠야 자연스러움)
-    st.session_state.alarm_confirmed = False
 
     # --------------------------------------------------------------------------------
 # 6. 예측 및 보정 함수
     # --------------------------------------------------------------------------------
+@instrumentation.timed("calculate_risk_score")
 def calculate_risk_score(pt_static):
     """Flow3: 보정/가중치 제거. 모델 predict_proba 점수를 그대로 사용하고,
     train_score_ref.npz 기반 cutoff로 고/중/저 위험군 판정.
     반환값은 (표시용 점수 0~100, raw_score 0~1, risk_group) 입니다.
+    실제 계산은 scoring 배치 엔진에 1행으로 위임하고, 입력이 같으면 공유 캐시 값을 재사용합니다.
+    입력 검증 실패/계산 오류면 (None, NaN, 입력오류) 를 반환하고 사유는 last_score_error 에 남깁니다
+    (저위험으로 대체하지 않음: 잘못된 값 하나가 고위험 환자를 가리지 않도록).
+    욕창 점수(Braden 근사)는 같은 인코딩 행에서 함께 계산되어 last_sore 에 남습니다.
     """
-    # 기본값
-    raw_score = 0.0
-    risk_group = "저위험"
-
-    # 입력값 구성 (11개 raw feature)
-    inputs = {
-        "성별": pt_static.get("gender", "M"),
-        "나이": float(pt_static.get("age", np.nan)),
-        "중증도분류": float(st.session_state.get("sim_severity", np.nan)),
-        "SBP": float(st.session_state.get("sim_sbp", np.nan)),
-        "DBP": float(st.session_state.get("sim_dbp", np.nan)),
-        "RR": float(st.session_state.get("sim_rr", np.nan)),
-        "PR": float(st.session_state.get("sim_pr", np.nan)),
-        "BT": float(st.session_state.get("sim_bt", np.nan)),
-        "내원시 반응": (np.nan if str(st.session_state.get("sim_reaction", "")).strip().lower() in ["", "nan", "none"] else str(st.session_state.get("sim_reaction", "")).strip()),
-        "albumin": float(st.session_state.get("sim_alb", np.nan)),
-        "crp": float(st.session_state.get("sim_crp", np.nan)),
-    }
-
-    # 성별 mapping (schema)
-    if res and 'gender_mapping' in res:
-        gm = res.get('gender_mapping', {'M': 1, 'F': 0})
-        inputs["성별"] = gm.get(str(inputs["성별"]).upper(), np.nan)
-
-    try:
-        model = res['model']
-        raw_cols = res['raw_cols']
-        X_input = pd.DataFrame([inputs], columns=raw_cols)
-
-        raw_score = float(model.predict_proba(X_input)[0][1])
-
-        cut20 = float(res.get('cutoff_top20', 1.0))
-        cut40 = float(res.get('cutoff_top40', 1.0))
-
-        if raw_score >= cut20:
-            risk_group = "고위험"
-        elif raw_score >= cut40:
-            risk_group = "중위험"
-        else:
-            risk_group = "저위험"
+    top_percent = None
+    sore = None
 
-    except Exception:
-        raw_score = 0.0
-        risk_group = "저위험"
+    st.session_state.last_score_error = None
 
-    # 표시용(0~100): 확률이 아니라 상대 점수 표시(그대로 스케일)
-    display_score = int(round(raw_score * 100))
-    display_score = max(0, min(display_score, 99))
+    try:
+        # 입력값 구성 (11개 raw feature)
+        if res is None:
+            raise RuntimeError("모델 리소스 없음")
+        inputs = scoring.session_record(pt_static, st.session_state)
+        _, raw_score, risk_group, top_percent, sore = score_cache.score_record(inputs, res, get_score_cache())
+        get_score_history().record(pt_static["id"], raw_score)
+
+    except validation.InputError as e:
+        raw_score, risk_group = float("nan"), scoring.RISK_INVALID
+        st.session_state.last_score_error = str(e)
+    except Exception as e:
+        raw_score, risk_group = float("nan"), scoring.RISK_INVALID
+        st.session_state.last_score_error = f"{type(e).__name__}: {e}"
+
+    display_score = None if st.session_state.last_score_error else int(scoring.display_scores(raw_score))
 
     # 세션에 저장(알람/확인 스냅샷용)
     st.session_state.last_fall_score = display_score
     st.session_state.last_fall_score_raw = raw_score
     st.session_state.last_risk_group = risk_group
+    st.session_state.last_top_percent = top_percent
+    st.session_state.last_sore = sore
 
     return display_score, raw_score, risk_group
 
@@ -308,7 +278,7 @@ def calculate_risk_score(pt_static):
 # 7. 팝업창
     # --------------------------------------------------------------------------------
 @st.dialog("낙상/욕창 위험도 정밀 분석", width="large")
-def show_risk_details(name, factors, current_score):
+def show_risk_details(name, factors, current_score, contributions=None, patient_id=None, sore_subscales=None, flagged=()):
     st.info(f"🕒 **{datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}** 기준, {name} 님의 분석 결과입니다.")
     
     tab1, tab2 = st.tabs(["🛡️ 맞춤형 간호중재", "📊 AI 판단 근거"])
@@ -326,14 +296,13 @@ def show_risk_details(name, factors, current_score):
         with c3:
             st.markdown("##### ✅ 필수 간호 진술문")
             with st.container(border=True):
-                chk_rail = st.checkbox("침상 난간(Side Rail) 올림 확인", value=(current_score >= 40))
+                chk_rail = st.checkbox("침상 난간(Side Rail) 올림 확인", value=(current_score is not None and current_score >= 40))
                 chk_med = st.checkbox("💊 수면제 투여 후 30분 관찰", value=st.session_state.sim_meds)
-                chk_nutri = st.checkbox("🥩 영양팀 협진 의뢰", value=(st.session_state.sim_alb < 3.0))
+                chk_nutri = st.checkbox("🥩 영양팀 협진 의뢰", value=("albumin" in flagged))  # 위험요인 엔진 albumin 규칙
                 chk_edu = st.checkbox("📢 낙상 예방 교육 및 호출기 위치 안내", value=True)
 
         st.markdown("---")
         if st.button("간호 수행 완료 및 기록 저장 (Auto-Charting)", type="primary", use_container_width=True):
-            current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
             risk_str = ", ".join(factors) if factors else "없음"
             actions = []
             if chk_rail: actions.append("침상난간 올림 확인")
@@ -341,44 +310,426 @@ def show_risk_details(name, factors, current_score):
             if chk_nutri: actions.append("영양팀 협진")
             if chk_edu: actions.append("예방 교육")
             
-            note_content = f"낙상위험평가({current_score}점) -> 위험요인({risk_str}) 확인 -> 중재({', '.join(actions)}) 시행함."
-            st.session_state.nursing_notes.insert(0, {"time": current_time, "writer": "김분당", "content": note_content})
+            note_content = f"낙상위험평가({'입력오류' if current_score is None else f'{current_score}점'}) -> 위험요인({risk_str}) 확인 -> 중재({', '.join(actions)}) 시행함."
+            get_note_store().append(patient_id, note_content, NOTE_WRITER)  # ts 는 저장소가 TS_FORMAT (초 단위) 으로 기록
+            st.session_state.note_cursors = []
             st.toast("저장되었습니다!")
             time.sleep(1)
             st.rerun()
 
     with tab2:
         st.markdown("##### 🔍 환자 맞춤형 위험 요인 (Top 10)")
-        if res and res['importance'] is not None:
-            df_imp = res['importance'].copy().sort_values('importance', ascending=True).tail(10)
-            colors = []
-            for feature in df_imp['feature']:
-                color = "#e0e0e0"
-                if feature == "나이" and PATIENTS_BASE[st.session_state.current_pt_idx]['age'] >= 65: color = "#ff5252"
-                elif feature == "albumin" and st.session_state.sim_alb < 3.0: color = "#ff5252"
-                elif feature == "SBP" and (st.session_state.sim_sbp < 100 or st.session_state.sim_sbp > 160): color = "#ff5252"
-                elif feature == "PR" and st.session_state.sim_pr > 100: color = "#ff5252"
-                colors.append(color)
-            df_imp['color'] = colors
-            
-            chart = alt.Chart(df_imp).mark_bar().encode(
-                x=alt.X('importance', title='기여도'),
-                y=alt.Y('feature', sort='-x', title='변수명'),
-                color=alt.Color('color', scale=None)
-            ).properties(height=350)
-            st.altair_chart(chart, use_container_width=True)
+        if contributions is not None:
+            # 모델 기여도: coef × (변환 입력 − 학습 기준 환자), log-odds 단위. 빨강 = 위험 증가, 파랑 = 위험 감소
+            import pandas as pd  # 표/차트를 그릴 때만 import (cold start 단축)
+            df_imp = pd.DataFrame({"feature": res['raw_cols'], "contribution": contributions})
+            df_imp = df_imp.loc[df_imp['contribution'].abs().sort_values(ascending=False).index].head(10)
+            df_imp['color'] = np.where(df_imp['contribution'] > 0, "#ff5252", "#4fc3f7")
+
+            with instrumentation.span("render_chart"):
+                import altair as alt  # 차트를 그릴 때만 import (cold start 단축)
+                chart = alt.Chart(df_imp).mark_bar().encode(
+                    x=alt.X('contribution', title='기여도 (log-odds)'),
+                    y=alt.Y('feature', sort=alt.EncodingSortField('contribution', op='max', order='descending'), title='변수명'),
+                    color=alt.Color('color', scale=None),
+                    tooltip=['feature', alt.Tooltip('contribution', format='+.3f')]
+                ).properties(height=350)
+                st.altair_chart(chart, use_container_width=True)
+            st.caption("기준 환자(학습 평균값, 내원시 반응 최빈값) 대비 각 입력이 낙상 위험 logit 을 올리거나(+) 내린(−) 양입니다. "
+                       "기여도 합 = 현재 환자와 기준 환자의 logit 차이.")
         else:
-            st.info("중요도 데이터가 없습니다.")
+            st.info("기여도를 계산할 수 없습니다 (모델 리소스 없음).")
+
+        if sore_subscales:
+            st.markdown(f"##### 🛏️ 욕창 위험 (Braden 근사 {sum(sore_subscales.values())}점)")
+            import pandas as pd
+            st.dataframe(pd.DataFrame([sore_subscales]), hide_index=True, use_container_width=True)
+            st.caption("입력 11개로 근사한 Braden 하위척도입니다 (낮을수록 위험, 결측 입력은 만점). 간호사 Braden 평가를 대체하지 않습니다.")
+
+    # --------------------------------------------------------------------------------
+# 8. 화면 구성 단위 (fragment)
+    # --------------------------------------------------------------------------------
+# fragment 안의 위젯을 바꾸면 그 fragment 만 다시 실행됩니다 (CSS/헤더/범례/다른 탭은 다시 보내지 않음).
+# 환자 선택처럼 화면 전체가 바뀌는 입력만 전체 스크립트를 다시 실행합니다.
+@st.fragment
+@instrumentation.fragment_run("fragment_simulation", on_end=save_rerun_timing)
+def simulation_panel(curr_pt_base, monitor_slot, alarm_slot):
+    """통합뷰 탭: 시뮬레이션 입력 -> 점수/요인/알람. 계기판(좌측 패널)과 알람은 바깥 컨테이너에 그립니다."""
+    # 점수 계산
+    fall_score, fall_score_raw, fall_group = calculate_risk_score(curr_pt_base)
+    sore = st.session_state.get("last_sore")  # Braden 근사 합계 (6~23, 낮을수록 위험)
+    
+    # Top20 기준으로 알람/색상 결정
+    cutoff_top20 = float(res.get('cutoff_top20', 1.0)) if res else 1.0
+    is_top20 = bool(res) and (fall_score_raw >= cutoff_top20)
+
+    # 학습 분포 기준: 현재 점수의 '상위 %' 계산 (데모에서 가장 직관적)
+    # (calculate_risk_score 에서 searchsorted로 함께 계산된 값)
+    top_percent = st.session_state.get("last_top_percent")
+
+    # 공유 알람 상태: cutoff 교차는 환자당 1번만 판정/기록되고, 확인은 모든 스테이션에 반영
+    # (Top20 아래로 내려가면 알람 해제 -> 다시 넘으면 새 알람으로 다시 뜸)
+    alarms = get_alarm_manager()
+    alarm = None
+    if alarms is not None:
+        if not st.session_state.get("last_score_error"):
+            alarms.update(curr_pt_base["id"], fall_score_raw, fall_score)
+        st.session_state.alarm_sub.watch([curr_pt_base["id"]])
+        st.session_state.alarm_sub.drain()  # 이번 rerun 이 최신 상태를 그리므로 대기 중인 변화는 소비
+        alarm = alarms.state(curr_pt_base["id"])
+    alarm_on = alarm_manager.flashing(alarm)
+
+    # 색상은 항상 먼저 정의 (NameError 방지)
+    alarm_class = "alarm-active" if alarm_on else ""
+    f_color = "#ff5252" if is_top20 else ("#ffca28" if fall_group == "중위험" else ("#9e9e9e" if fall_group == scoring.RISK_INVALID else "#00e5ff"))
+    s_color = ("#9e9e9e" if sore is None else
+               "#ff5252" if sore["group"] == scoring.RISK_HIGH else ("#ffca28" if sore["group"] == scoring.RISK_MID else "#00e5ff"))
 
     # --------------------------------------------------------------------------------
-# 8. 메인 레이아웃 구성
+    # (Flow 5 - A안) 감지된 위험 요인: 규칙 기반 태그 유지 (모델과 독립)
+    #  - PoC 단계에서 가장 안정적: 모델 변경/재학습과 무관하게 UI는 동일하게 동작
+    #  - 임계값은 dashboard_schema.json 의 risk_factor_rules (risk_factors 엔진)
+    # --------------------------------------------------------------------------------
+    with instrumentation.span("risk_factors"):
+        factor_row = factor_engine.evaluate_records([scoring.session_record(curr_pt_base, st.session_state)])[0]
+    detected_factors = factor_engine.labels_for(factor_row)
+    st.session_state.last_detected_factors = detected_factors
+
+    # (선택) 약물 태그는 새 모델 입력 11개에 없으므로, PoC에서는 숨김 처리
+    # if st.session_state.get("sim_meds", ""):
+    #     detected_factors.append("고위험 약물")
+
+    with monitor_slot:
+        # 가로형 계기판
+        percent_text = f"상위 {top_percent:.1f}%" if top_percent is not None else ""
+        sore_text = "Braden" + (f" · 상위 {sore['top_percent']:.1f}%" if sore and sore["top_percent"] is not None else "")
+        st.markdown(ui_templates.monitor_html("--" if fall_score is None else fall_score, "--" if sore is None else sore["score"],
+                                              f_color, s_color, percent_text, alarm_class, sore_text), unsafe_allow_html=True)
+        if alarm and alarm["active"] and alarm["confirmed_by"]:
+            st.caption(f"✅ 알람 확인: {alarm['confirmed_by']} ({alarm['confirmed_at']}, {alarm['confirmed_score']}점)")
+        if st.session_state.get("last_score_error"):
+            st.error(f"위험도 계산 불가 — 입력값을 확인하세요. ({st.session_state.last_score_error})")
+
+        if st.button("🔍 상세 분석 및 중재 기록 열기", type="primary", use_container_width=True):
+            record = scoring.session_record(curr_pt_base, st.session_state)
+            contributions = score_cache.explain_record(record, res, get_score_cache()) if res else None
+            sore_subscales = None
+            if sore is not None:
+                sore_subscales = dict(zip(res['sore'].names, res['sore'].subscale_matrix(scoring.encode_matrix([record], res))[0].tolist()))
+            show_risk_details(curr_pt_base['name'], detected_factors, fall_score, contributions, curr_pt_base['id'], sore_subscales,
+                              factor_engine.flagged_features(factor_row))
+
+    c1, c2 = st.columns([1.2, 1])
+
+    with c1:
+        st.markdown("##### ⚡ 실시간 데이터 입력 (Simulation)")
+        with st.container(border=True):
+            # [핵심] 위젯의 key를 session state와 1:1 매핑 -> 데이터 유지 및 즉시 반영
+
+            # ------------------------------
+            # 예시 재원환자 4명: 환자 선택 시 자동 세팅 + 원클릭 초기화
+            # - 김수연/이영희/박민수/정수진 각각 (저위험A/저위험B/중위험/고위험) 기본값
+            # - 이후 아래 실시간 입력에서 (예: albumin) 값을 바꾸면 위험군이 즉시 변하는 것을 시연 가능
+            # ------------------------------
+            st.button("🔁 현재 환자 예시값으로 초기화", use_container_width=True,
+                      on_click=apply_patient_preset, args=(curr_pt_base["id"],))
+            st.number_input("SBP (수축기)", step=10, key="sim_sbp")
+            st.number_input("DBP (이완기)", step=10, key="sim_dbp")
+            r3, r4 = st.columns(2)
+            st.number_input("PR (맥박)", step=5, key="sim_pr")
+            st.number_input("RR (호흡)", step=2, key="sim_rr")
+            st.number_input("BT (체온)", step=0.1, format="%.1f", key="sim_bt")
+
+            st.slider("Albumin (영양)", 1.0, 5.5, value=float(st.session_state.get("sim_alb", 4.0)), step=0.1, key="sim_alb")
+            st.number_input("CRP", min_value=0.0, max_value=200.0, value=float(st.session_state.get("sim_crp", 0.2)), step=0.1, format="%.1f", key="sim_crp")
+            sev_default = int(st.session_state.get("sim_severity", 3))
+            sev_default = 1 if sev_default < 1 else (5 if sev_default > 5 else sev_default)
+            st.selectbox("중증도분류", [1, 2, 3, 4, 5], index=sev_default-1, key="sim_severity")
+# 내원시 반응 옵션은 schema에 정의된 값을 우선 사용
+            reaction_opts = (res.get('category_options', {}).get('내원시 반응', []) if res else [])
+            if not reaction_opts:
+                reaction_opts = ["alert", "verbal response", "painful response"]
+            st.selectbox("내원시 반응", reaction_opts, index=0, key="sim_reaction")
+            st.selectbox("의식 상태", ["명료(Alert)", "기면(Drowsy)", "혼미(Stupor)"], key="sim_mental")
+            st.checkbox("💊 고위험 약물(수면제 등) 복용", key="sim_meds")
+
+    with c2:
+        st.markdown("##### 📊 환자 상태 요약")
+        st.markdown(ui_templates.vitals_html([
+            ("BP", f"{st.session_state.sim_sbp}/{st.session_state.sim_dbp}"), ("PR", st.session_state.sim_pr),
+            ("RR", st.session_state.sim_rr), ("BT", st.session_state.sim_bt),
+        ]), unsafe_allow_html=True)
+
+        st.markdown(f"**[감지된 위험 요인]**")
+        if detected_factors:
+            st.markdown(ui_templates.risk_tags_html(detected_factors), unsafe_allow_html=True)
+        else:
+            st.info("특이 사항 없음")
+
+        st.markdown("**[위험도 추이]**")
+        trend_res = st.radio("추이 단위", ["shift", "day"], format_func=lambda r: {"shift": "근무조", "day": "일"}[r],
+                             horizontal=True, label_visibility="collapsed", key="trend_resolution")
+        trend = get_score_history().trend_frame(curr_pt_base["id"], trend_res)
+        if len(trend) > 1:
+            for col in ("min", "max", "last"):
+                trend[col] = scoring.display_scores(trend[col].to_numpy())
+            import altair as alt
+            band = alt.Chart(trend).mark_area(opacity=0.25, color="#4fc3f7").encode(
+                x=alt.X("start:T", title=None), y=alt.Y("min:Q", title="점수"), y2="max:Q")
+            line = alt.Chart(trend).mark_line(point=True, color="#4fc3f7").encode(
+                x="start:T", y="last:Q", tooltip=["label", "min", "max", "last", "count"])
+            st.altair_chart((band + line).properties(height=160), use_container_width=True)
+        else:
+            # 집계 bucket 이 1개뿐이면 (현재 근무조) ring buffer 원시 점수로 표시
+            pts = get_score_history().points(curr_pt_base["id"])
+            if len(pts) > 1:
+                import pandas as pd
+                live = pd.DataFrame({"time": pd.to_datetime(pts["ts"] + score_history.UTC_OFFSET_S, unit="s"),
+                                     "점수": scoring.display_scores(pts["raw"])})
+                st.line_chart(live.set_index("time"), height=160)
+            else:
+                st.caption("추이를 그릴 이력이 아직 없습니다 (근무조/일 단위 집계).")
+
+    # What-if 민감도: 현재 환자 입력 1~2개를 격자로 바꿔 한 번에 스코어링 + 위험군 경계 (해석해)
+    with st.expander("🎯 What-if 민감도 분석 (어떤 값이면 위험군이 바뀌나?)"):
+        whatif_panel(curr_pt_base)
+
+    # 알람 (Top20 상위 20% 교차, 미확인): 확인 버튼은 공유 알람 상태에 기록 후 이 fragment 만 다시 그림
+    # 알람이 없어도 자리를 매번 채워 둠 (바깥 컨테이너는 전체 실행 때 한 번 이상 써야 fragment rerun 에서 쓸 수 있음)
+    alarm_box = alarm_slot.empty()
+    if alarm_on:
+        with alarm_box.container():
+            st.markdown(ui_templates.alert_html("--" if fall_score is None else fall_score, detected_factors), unsafe_allow_html=True)
+            st.button("확인 (Confirm)", key="confirm_alarm_btn", use_container_width=True,
+                      on_click=confirm_alarm, args=(curr_pt_base["id"],))
+
+@st.fragment
+@instrumentation.fragment_run("fragment_whatif", on_end=save_rerun_timing)
+def whatif_panel(curr_pt_base):
+    """What-if 축/해상도 변경은 이 fragment 만 다시 실행 (점수 계산/계기판은 그대로)."""
+    if res is None:
+        st.info("모델 리소스가 없어 민감도 분석을 할 수 없습니다.")
+    else:
+        sweep_cols = [c for c in sensitivity.SWEEP_INPUTS if c in res['raw_cols']]
+        axis_label = lambda c: sensitivity.SWEEP_INPUTS[c][0] if c else "없음 (1축)"
+        w1, w2, w3 = st.columns(3)
+        x_col = w1.selectbox("X 축", sweep_cols, format_func=axis_label, key="whatif_x")
+        y_col = w2.selectbox("Y 축", [None] + [c for c in sweep_cols if c != x_col], format_func=axis_label, key="whatif_y")
+        grid_n = w3.select_slider("격자 해상도", [50, 100, 200], value=200, key="whatif_n")
+        sweep = sensitivity.sweep(res, scoring.session_record(curr_pt_base, st.session_state), x_col, y_col=y_col, n=grid_n)
+
+        import altair as alt
+        import pandas as pd
+        cut_scale = {"top20": ("고위험 경계", "#ff5252"), "top40": ("중위험 경계", "#ffca28")}
+        cur = pd.DataFrame([{"x": sweep["current"][x_col], "y": sweep["current"].get(y_col, np.nan)}])
+        if y_col is None:
+            curve = pd.DataFrame({"x": sweep["x"], "점수": sweep["raw"] * 100})
+            rules = pd.DataFrame([{"점수": sweep["cutoffs"][k] * 100, "경계": cut_scale[k][0]} for k in cut_scale])
+            chart = (alt.Chart(curve).mark_line(color="#4fc3f7").encode(x=alt.X("x:Q", title=axis_label(x_col)), y="점수:Q")
+                     + alt.Chart(rules).mark_rule(strokeDash=[4, 4]).encode(
+                         y="점수:Q", color=alt.Color("경계:N", scale=alt.Scale(range=[c for _, c in cut_scale.values()])))
+                     + alt.Chart(cur).mark_rule(color="white").encode(x="x:Q"))
+        else:
+            # 화면에는 최대 50x50 칸으로 줄여 그림 (경계선은 해석해라 해상도와 무관)
+            step = max(1, grid_n // 50)
+            xs, ys = sweep["x"][::step], sweep["y"][::step]
+            dx, dy = (xs[1] - xs[0]) / 2, (ys[1] - ys[0]) / 2
+            gx, gy = np.meshgrid(xs, ys)
+            cells = pd.DataFrame({"x": gx.ravel() - dx, "x2": gx.ravel() + dx, "y": gy.ravel() - dy, "y2": gy.ravel() + dy,
+                                  "점수": sweep["raw"][::step, ::step].ravel() * 100})
+            lines = pd.concat([pd.DataFrame({"x": sweep["x"], "y": yb, "경계": cut_scale[k][0]})
+                               for k, yb in sweep["boundaries"].items()], ignore_index=True)
+            lines = lines[(lines["y"] >= ys[0]) & (lines["y"] <= ys[-1])]
+            x_enc = alt.X("x:Q", title=axis_label(x_col), scale=alt.Scale(domain=[xs[0] - dx, xs[-1] + dx], nice=False))
+            y_enc = alt.Y("y:Q", title=axis_label(y_col), scale=alt.Scale(domain=[ys[0] - dy, ys[-1] + dy], nice=False))
+            chart = alt.Chart(cells).mark_rect().encode(
+                x=x_enc, x2="x2", y=y_enc, y2="y2",
+                color=alt.Color("점수:Q", scale=alt.Scale(scheme="redyellowblue", reverse=True)))
+            if len(lines):
+                chart += alt.Chart(lines).mark_line(strokeWidth=2).encode(
+                    x="x:Q", y="y:Q", color=alt.Color("경계:N", scale=alt.Scale(range=[c for _, c in cut_scale.values()])))
+            chart += alt.Chart(cur).mark_point(color="white", size=80, filled=True).encode(x="x:Q", y="y:Q")
+        st.altair_chart(chart.properties(height=280), use_container_width=True)
+
+        if sweep["crossings"]:
+            for col, cuts in sweep["crossings"].items():
+                lo, hi = sensitivity.sweep_range(col, sweep["current"][col])
+                parts = [f"{cut_scale[k][0]} {v:.2f}" + ("" if lo <= v <= hi else " (범위 밖)") for k, v in cuts.items()]
+                st.caption(f"**{axis_label(col)}** (현재 {sweep['current'][col]:.2f}): " + ", ".join(parts))
+            st.caption("다른 입력을 현재 값으로 고정했을 때 점수가 해당 cutoff 와 같아지는 값입니다 (모델 logit 선형식의 해석해).")
+        else:
+            st.caption("compiled scorer 가 없어 경계 해석해 없이 격자 점수만 표시합니다.")
+
+@st.fragment
+@instrumentation.fragment_run("fragment_notes", on_end=save_rerun_timing)
+def notes_panel(curr_pt_base):
+    """간호기록 탭 (페이지 이동/저장은 이 탭만 다시 그림)."""
+    st.markdown("##### 📋 간호진술문 (Nursing Note)")
+    notes = get_note_store()
+    cursors = st.session_state.note_cursors  # 이전 페이지들의 마지막 기록 (keyset 커서 stack)
+    page_notes = notes.recent(curr_pt_base["id"], NOTE_PAGE_SIZE, before=cursors[-1] if cursors else None)
+    # 기록이 없는 환자는 예시 기록을 화면에만 표시 (DB 에는 쓰지 않음)
+    st.markdown(ui_templates.notes_html(page_notes or ([] if cursors else [DEMO_NOTE])), unsafe_allow_html=True)
+    n1, n2, n3 = st.columns([1, 1, 3])
+    if n1.button("◀ 최근 기록", disabled=not cursors, key="note_newer"):
+        cursors.pop()
+        st.rerun(scope="fragment")
+    if n2.button("이전 기록 ▶", disabled=len(page_notes) < NOTE_PAGE_SIZE, key="note_older"):
+        cursors.append(note_store.cursor_of(page_notes[-1]))
+        st.rerun(scope="fragment")
+    n3.caption(f"{len(cursors) + 1} 페이지 · 페이지당 {NOTE_PAGE_SIZE}건")
+    st.text_area("추가 기록", height=100, key="note_draft")
+    st.button("저장", on_click=save_note_draft, args=(curr_pt_base["id"],))
+
+@st.fragment
+@instrumentation.fragment_run("fragment_census", on_end=save_rerun_timing)
+def census_panel():
+    """병동 현황 탭 (정렬/페이지 변경은 이 탭만 다시 그림)."""
+    st.markdown("##### 🏥 병동 현황 (위험도 순위)")
+    census_scorer = get_census_scorer()
+    if census_scorer is None:
+        st.info("모델 리소스가 없어 병동 현황을 계산할 수 없습니다.")
+    else:
+        roster_src = os.environ.get("FALLGUARD_ROSTER", "")
+        with instrumentation.span("census"):
+            census_table = census_scorer.refresh(load_census_roster(roster_src, census.source_mtime(roster_src)), registry.active())
+        info = census_scorer.last_refresh
+        groups = census_table["risk_group"].value_counts()
+        st.caption(f"재원 {info['patients']}명 · 고위험 {groups.get(scoring.RISK_HIGH, 0)} / 중위험 {groups.get(scoring.RISK_MID, 0)}"
+                   + (f" · ⚠️ 입력오류 {info['invalid']}명" if info['invalid'] else "") +
+                   f" · 재계산 {info['rescored']}명 ({info['ms']:.1f} ms)"
+                   f" · 미확인 알람 {len(get_alarm_manager().active(unconfirmed_only=True))}건")
+
+        s1, s2, s3 = st.columns([2, 1, 1])
+        sort_label = s1.selectbox("정렬", list(census.SORT_OPTIONS), key="census_sort")
+        page_size = s2.selectbox("페이지당", [25, 50, 100], key="census_page_size")
+        n_pages = max(1, -(-len(census_table) // page_size))
+        if st.session_state.get("census_page", 1) > n_pages: st.session_state.census_page = n_pages
+        page_no = s3.number_input(f"페이지 (/{n_pages})", min_value=1, max_value=n_pages, step=1, key="census_page")
+        with st.expander("📈 병동 위험도 추이 (근무조별)"):
+            ward_trend = get_score_history().ward_trend(census_table["patient_id"], "shift")
+            if len(ward_trend) > 1:
+                ward_trend["mean_last"] = scoring.display_scores(ward_trend["mean_last"].to_numpy())
+                ward_trend["max"] = scoring.display_scores(ward_trend["max"].to_numpy())
+                st.line_chart(ward_trend.set_index("start")[["mean_last", "max"]], height=180)
+            else:
+                st.caption("근무조가 바뀌면 병동 추이가 쌓입니다.")
+        with st.expander("🎯 cutoff 재보정 (운영 점수 분포)"):
+            live = res['live_sketch']
+            if live.n == 0:
+                st.caption("아직 수집된 운영 점수가 없습니다.")
+            else:
+                drift = live_cutoffs.drift_report(live, res['train_scores_sorted'] if res['train_scores_sorted'] is not None
+                                                  else res['percentile_sketch'].knot_scores, res['cutoff_top20'], res['cutoff_top40'])
+                d1, d2, d3, d4 = st.columns(4)
+                d1.metric("운영 점수", f"{drift['n_live']:,}")
+                d2.metric("KS", f"{drift['ks']:.3f}")
+                d3.metric("PSI", f"{drift['psi']:.3f}")
+                d4.metric("학습 Top20 초과 비율", f"{drift['live_share_above_train_top20'] * 100:.1f}%",
+                          f"{(drift['live_share_above_train_top20'] - 0.2) * 100:+.1f}%p", delta_color="inverse")
+                st.caption(f"cutoff Top20 {drift['train_cutoff_top20']:.4f} → {drift['live_cutoff_top20']:.4f} · "
+                           f"Top40 {drift['train_cutoff_top40']:.4f} → {drift['live_cutoff_top40']:.4f} (학습 → 운영)")
+                if st.button("운영 분포로 새 참조 발행", key="publish_live_ref"):
+                    out_path = os.path.join(scoring.BASE_DIR, "train_score_ref_live.npz")
+                    live_cutoffs.publish_reference(live, out_path, drift=drift)
+                    st.success(f"{out_path} 발행. FALLGUARD_REF_PATH 로 지정 후 재시작하면 적용됩니다.")
+        if registry.shadow_versions:
+            with st.expander(f"🧪 shadow 후보 모델 (primary {registry.primary_version})"):
+                shadow = registry.summary()["agreement"]
+                rows = [{"후보": v, "비교 환자": a["rows"], "위험군 일치": a.get("agreement"), "kappa": a.get("kappa"),
+                         "상향": a.get("upgraded"), "하향": a.get("downgraded"), "평균 점수차": a.get("mean_abs_diff")}
+                        for v, a in shadow["candidates"].items()]
+                import pandas as pd
+                st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True, column_config={
+                    "위험군 일치": st.column_config.NumberColumn(format="%.3f"), "kappa": st.column_config.NumberColumn(format="%.3f"),
+                    "상향": st.column_config.NumberColumn(format="%.3f"), "하향": st.column_config.NumberColumn(format="%.3f"),
+                    "평균 점수차": st.column_config.NumberColumn(format="%.4f")})
+                st.caption(f"batch {shadow['batches']:,} · 대기 초과로 건너뜀 {shadow['dropped']:,} · 오류 {shadow['errors']}"
+                           + (f" ({shadow['last_error']})" if shadow['last_error'] else "") +
+                           " · 교체: python model_registry.py promote <버전>")
+        st.dataframe(
+            census.page(census.ranked(census_table, sort_label), page_no, page_size),
+            hide_index=True, use_container_width=True,
+            column_config={
+                "bed": "병상", "name": "환자명", "patient_id": "등록번호", "risk_group": "위험군",
+                "display_score": st.column_config.NumberColumn("점수"),
+                "top_percent": st.column_config.NumberColumn("상위 %", format="%.1f"),
+                "sore_score": st.column_config.NumberColumn("욕창 (Braden)"), "sore_group": "욕창 위험군",
+                "factors": "위험요인",
+            },
+        )
+
+@st.fragment(run_every=HANDOFF_POLL_S)
+def wait_handoff_report(duty):
+    """스케줄러 스레드가 보고서를 만드는 동안 표시. 보고서가 store 에 들어오면 화면을 다시 그림."""
+    scheduler = get_handoff_scheduler()
+    if scheduler.store.latest(duty) is not None:
+        st.rerun(scope="app")
+    st.info(f"⏳ {duty} 인수인계 보고서를 만드는 중입니다. 완료되면 자동으로 표시됩니다."
+            + (f" (직전 시도 실패: {scheduler.last_error})" if scheduler.last_error else ""))
+
+@st.fragment
+@instrumentation.fragment_run("fragment_handoff", on_end=save_rerun_timing)
+def handoff_panel():
+    """근무조 인수인계 탭: 스케줄러가 미리 만든 보고서 + 스냅샷 이후 입력이 바뀐 환자만 live 재계산."""
+    st.markdown("##### 🔁 근무조 인수인계")
+    scheduler = get_handoff_scheduler()
+    if scheduler is None:
+        st.info("모델 리소스가 없어 인수인계 보고서를 만들 수 없습니다.")
+        return
+    duty = st.session_state.get("duty") or score_history.shift_of()[0]
+    report = scheduler.store.latest(duty)
+    if report is None and duty == score_history.shift_of()[0]:
+        scheduler.wake()  # 프로세스 시작 직후 첫 보고서 전: 요청 경로에서 만들지 않고 스케줄러 스레드가 만듦
+        wait_handoff_report(duty)
+        return
+    if report is None:
+        st.info(f"{duty} 인수인계 보고서가 아직 없습니다. 근무조 시작 {scheduler.lead_s / 60:.0f}분 전에 자동으로 만들어집니다.")
+        return
+
+    roster_src = os.environ.get("FALLGUARD_ROSTER", "")
+    roster_mtime = census.source_mtime(roster_src)
+    live_res = registry.active()
+    with instrumentation.span("handoff"):  # 같은 명단 (소스 mtime) / 모델이면 직전 표 재사용
+        table = report.current(load_census_roster(roster_src, roster_mtime), live_res, factor_engine, get_score_history(),
+                               key=(roster_src, roster_mtime, live_res.get('model_version')))
+    wards = sorted(table["ward"].dropna().unique()) if "ward" in table else []
+    ward = st.selectbox("병동", ["전체"] + wards, key="handoff_ward")
+    view = table if ward == "전체" else table[table["ward"] == ward]
+    counts = handoff.group_counts(view).sum()
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric(scoring.RISK_HIGH, int(counts[scoring.RISK_HIGH]))
+    m2.metric(scoring.RISK_MID, int(counts[scoring.RISK_MID]))
+    m3.metric(scoring.RISK_LOW, int(counts[scoring.RISK_LOW]))
+    m4.metric("직전 근무조 대비 상승", int((view["delta"] > 0).sum()))
+    built = time.strftime("%H:%M", time.gmtime(report.built_at + score_history.UTC_OFFSET_S))
+    st.caption(f"{report.label} 보고서 · {built} 생성 ({len(report.ids)}명)"
+               f" · 이후 입력 변경 {int(view['live'].sum())}명 live 재계산"
+               + (f" · ⚠️ 입력오류 {int(counts[scoring.RISK_INVALID])}명" if counts[scoring.RISK_INVALID] else ""))
+    if ward == "전체" and len(wards) > 1:
+        st.dataframe(handoff.group_counts(table), use_container_width=True)
+    st.dataframe(
+        census.ranked(view)[[c for c in handoff.DISPLAY_COLUMNS if c in view]],
+        hide_index=True, use_container_width=True,
+        column_config={
+            "bed": "병상", "name": "환자명", "patient_id": "등록번호", "risk_group": "위험군",
+            "display_score": st.column_config.NumberColumn("점수"),
+            "delta": st.column_config.NumberColumn("직전 근무조 대비", format="%+.0f"),
+            "factors": "위험요인", "live": st.column_config.CheckboxColumn("live 재계산"),
+        },
+    )
+
+    # --------------------------------------------------------------------------------
+# 9. 메인 레이아웃 구성
     # --------------------------------------------------------------------------------
 col_sidebar, col_main = st.columns([2, 8])
+alarm_slot = st.container()  # 알람 박스/확인 버튼: 탭 밖 (어느 탭을 보고 있어도 표시). simulation_panel 이 채움
 curr_pt_base = PATIENTS_BASE[st.session_state.current_pt_idx]
 
 # [좌측 패널]
 with col_sidebar:
-    st.selectbox("근무 DUTY", ["Day", "Evening", "Night"])
+    st.selectbox("근무 DUTY", score_history.SHIFT_NAMES, index=score_history.SHIFT_NAMES.index(score_history.shift_of()[0]),
+                 key="duty")  # 인수인계 탭의 근무조 보고서
     st.divider()
 
     st.markdown("### 🏥 재원 환자")
@@ -387,7 +738,7 @@ with col_sidebar:
     # 환자 변경 시 리셋
     if idx != st.session_state.current_pt_idx:
         st.session_state.current_pt_idx = idx
-        st.session_state.alarm_confirmed = False 
+        st.session_state.note_cursors = []
         
         st.session_state.sim_sbp = 120
         st.session_state.sim_dbp = 80
@@ -408,217 +759,44 @@ with col_sidebar:
     if st.session_state.get("active_patient_id") != curr_pt_base["id"]:
         st.session_state["active_patient_id"] = curr_pt_base["id"]
         apply_patient_preset(curr_pt_base["id"])
-    
-    st.markdown("---")
-    
-    # 점수 계산
-    fall_score, fall_score_raw, fall_group = calculate_risk_score(curr_pt_base)
-    sore_score = 15
-    
-    # Top20 기준으로 알람/색상 결정
-    cutoff_top20 = float(res.get('cutoff_top20', 1.0)) if res else 1.0
-    is_top20 = bool(res) and (fall_score_raw >= cutoff_top20)
-
-    # 학습 분포 기준: 현재 점수의 '상위 %' 계산 (데모에서 가장 직관적)
-    top_percent = None
-    if res and res.get("train_scores_sorted") is not None:
-        scores_sorted = res["train_scores_sorted"]
-        n = len(scores_sorted)
-        # percentile rank: 0~100
-        perc = (np.searchsorted(scores_sorted, fall_score_raw, side="right") / n) * 100.0 if n else 0.0
-        top_percent = max(0.0, min(100.0, 100.0 - perc))
-
-    # 점수가 Top20 아래면 알람 확인 상태 리셋(다시 위험해지면 다시 뜨게)
-    if not is_top20:
-        st.session_state.alarm_confirmed = False
-
-    # 색상은 항상 먼저 정의 (NameError 방지)
-    alarm_class = "alarm-active" if (is_top20 and (not st.session_state.alarm_confirmed)) else ""
-    f_color = "#ff5252" if is_top20 else ("#ffca28" if fall_group == "중위험" else "#00e5ff")
-    s_color = "#ff5252" if sore_score >= 18 else ("#ffca28" if sore_score >= 15 else "#00e5ff")
-# 가로형 계기판
-    percent_text = f"상위 {top_percent:.1f}%" if top_percent is not None else ""
-    digital_monitor_html = f"""
-    <div class=\"digital-monitor-container {alarm_class}\">
-        <div class=\"score-box\">
-            <div class=\"monitor-label\">FALL RISK</div>
-            <div class=\"digital-number\" style=\"color: {f_color};\">{fall_score}</div>
-            <div style=\"margin-top:6px; font-size:12px; color:#b0bec5;\">{percent_text}</div>
-        </div>
-        <div class=\"divider-line\"></div>
-        <div class=\"score-box\">
-            <div class=\"monitor-label\">SORE RISK</div>
-            <div class=\"digital-number\" style=\"color: {s_color};\">{sore_score}</div>
-        </div>
-    </div>
-    """
-    st.markdown(digital_monitor_html, unsafe_allow_html=True)
-    
-    # --------------------------------------------------------------------------------
-    # (Flow 5 - A안) 감지된 위험 요인: 규칙 기반 태그 유지 (모델과 독립)
-    #  - PoC 단계에서 가장 안정적: 모델 변경/재학습과 무관하게 UI는 동일하게 동작
-    # --------------------------------------------------------------------------------
-    detected_factors = []
-
-    # 1) 고령
-    if curr_pt_base['age'] >= 65:
-        detected_factors.append("고령")
-
-    # 2) 검사/활력징후 기반 (입력값 기반)
-    if st.session_state.sim_alb < 3.0:
-        detected_factors.append("알부민 저하")
-
-    # CRP 상승: 기관/데이터 단위에 따라 컷은 조정 가능 (PoC 기본값)
-    if float(st.session_state.get("sim_crp", 0) or 0) >= 5.0:
-        detected_factors.append("CRP 상승")
-
-    if st.session_state.sim_sbp < 100:
-        detected_factors.append("저혈압(SBP<100)")
-    elif st.session_state.sim_sbp >= 180:
-        detected_factors.append("고혈압(SBP≥180)")
-
-    if st.session_state.sim_pr > 100:
-        detected_factors.append("빈맥(PR>100)")
-
-    if st.session_state.sim_rr >= 24:
-        detected_factors.append("빈호흡(RR≥24)")
 
-    if st.session_state.sim_bt >= 37.8:
-        detected_factors.append("발열(BT≥37.8)")
-
-    # 3) 내원시 반응(의식) 기반: 반응 저하로 분류되는 옵션이면 태그
-    reaction = str(st.session_state.get("sim_reaction", "")).lower()
-    if any(k in reaction for k in ["verbal", "pain", "unresponsive", "drowsy", "stupor", "confus"]):
-        detected_factors.append("의식/반응 저하")
-
-    # 4) 중증도분류 기반: 4~5는 '중증도 높음'으로 태그
-    try:
-        sev = int(st.session_state.get("sim_severity", 0))
-        if sev >= 4:
-            detected_factors.append("중증도 높음(4~5)")
-    except Exception:
-        pass
-
-    # (선택) 약물 태그는 새 모델 입력 11개에 없으므로, PoC에서는 숨김 처리
-    # if st.session_state.get("sim_meds", ""):
-    #     detected_factors.append("고위험 약물")
+    st.markdown("---")
+    monitor_slot = st.container()  # 계기판/요인/상세 분석 버튼 (simulation_panel 이 채움)
 
-    if st.button("🔍 상세 분석 및 중재 기록 열기", type="primary", use_container_width=True):
-        show_risk_details(curr_pt_base['name'], detected_factors, fall_score)
 # [우측 메인 패널]
 with col_main:
-    header_html = f"""
-    <div class=\"header-container\">
-        <div style=\"display:flex; align-items:center; justify-content:space-between;\">
-            <div style=\"display:flex; align-items:center;\">
-                <span style=\"font-size:1.5em; font-weight:bold; color:white; margin-right:20px;\">🏥 SNUH</span>
-                <span class=\"header-info-text\"><span class=\"header-label\">환자명:</span> <b>{curr_pt_base['name']}</b> ({curr_pt_base['gender']}/{curr_pt_base['age']}세)</span>
-                <span class=\"header-info-text\"><span class=\"header-label\">ID:</span> {curr_pt_base['id']}</span>
-                <span class=\"header-info-text\"><span class=\"header-label\">진단명:</span> <span style=\"color:#4fc3f7;\">{curr_pt_base['diag']}</span></span>
-            </div>
-            <div style=\"color:#b0bec5; font-size:0.9em;\">김분당 간호사 | {datetime.datetime.now().strftime('%Y-%m-%d')}</div>
-        </div>
-    </div>
-    """
-    st.markdown(header_html, unsafe_allow_html=True)
+    st.markdown(ui_templates.header_html(curr_pt_base, NOTE_WRITER, datetime.datetime.now().strftime('%Y-%m-%d')), unsafe_allow_html=True)
 
-    tab1, tab2, tab3 = st.tabs(["🛡️ 통합뷰 (AI Simulation)", "💊 오더", "📝 간호기록(Auto-Note)"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["🛡️ 통합뷰 (AI Simulation)", "💊 오더", "📝 간호기록(Auto-Note)", "🏥 병동 현황(Census)",
+                                            "🔁 인수인계(Handoff)"])
 
     with tab1:
-        c1, c2 = st.columns([1.2, 1])
-        
-        with c1:
-            st.markdown("##### ⚡ 실시간 데이터 입력 (Simulation)")
-            with st.container(border=True):
-                # [핵심] 위젯의 key를 session state와 1:1 매핑 -> 데이터 유지 및 즉시 반영
-
-                # ------------------------------
-                # 예시 재원환자 4명: 환자 선택 시 자동 세팅 + 원클릭 초기화
-                # - 김수연/이영희/박민수/정수진 각각 (저위험A/저위험B/중위험/고위험) 기본값
-                # - 이후 아래 실시간 입력에서 (예: albumin) 값을 바꾸면 위험군이 즉시 변하는 것을 시연 가능
-                # ------------------------------
-                if st.button("🔁 현재 환자 예시값으로 초기화", use_container_width=True):
-                    apply_patient_preset(curr_pt_base["id"])
-                    st.session_state.alarm_confirmed = False
-                    st.rerun()
-                st.number_input("SBP (수축기)", step=10, key="sim_sbp")
-                st.number_input("DBP (이완기)", step=10, key="sim_dbp")
-                r3, r4 = st.columns(2)
-                st.number_input("PR (맥박)", step=5, key="sim_pr")
-                st.number_input("RR (호흡)", step=2, key="sim_rr")
-                st.number_input("BT (체온)", step=0.1, format="%.1f", key="sim_bt")
-                
-                st.slider("Albumin (영양)", 1.0, 5.5, value=float(st.session_state.get("sim_alb", 4.0)), step=0.1, key="sim_alb")
-                st.number_input("CRP", min_value=0.0, max_value=200.0, value=float(st.session_state.get("sim_crp", 0.2)), step=0.1, format="%.1f", key="sim_crp")
-                sev_default = int(st.session_state.get("sim_severity", 3))
-                sev_default = 1 if sev_default < 1 else (5 if sev_default > 5 else sev_default)
-                st.selectbox("중증도분류", [1, 2, 3, 4, 5], index=sev_default-1, key="sim_severity")
-# 내원시 반응 옵션은 schema에 정의된 값을 우선 사용
-                reaction_opts = (res.get('category_options', {}).get('내원시 반응', []) if res else [])
-                if not reaction_opts:
-                    reaction_opts = ["alert", "verbal response", "painful response"]
-                st.selectbox("내원시 반응", reaction_opts, index=0, key="sim_reaction")
-                st.selectbox("의식 상태", ["명료(Alert)", "기면(Drowsy)", "혼미(Stupor)"], key="sim_mental")
-                st.checkbox("💊 고위험 약물(수면제 등) 복용", key="sim_meds")
-
-        with c2:
-            st.markdown("##### 📊 환자 상태 요약")
-            st.markdown(f"""
-            <div style="background-color:#263238; padding:15px; border-radius:8px; margin-bottom:15px;">
-                <div style="display:grid; grid-template-columns: 1fr 1fr; gap:10px; text-align:center;">
-                    <div><div style="color:#aaa; font-size:12px;">BP</div><div style="font-weight:bold; font-size:18px;">{st.session_state.sim_sbp}/{st.session_state.sim_dbp}</div></div>
-                    <div><div style="color:#aaa; font-size:12px;">PR</div><div style="font-weight:bold; font-size:18px;">{st.session_state.sim_pr}</div></div>
-                    <div><div style="color:#aaa; font-size:12px;">RR</div><div style="font-weight:bold; font-size:18px;">{st.session_state.sim_rr}</div></div>
-                    <div><div style="color:#aaa; font-size:12px;">BT</div><div style="font-weight:bold; font-size:18px;">{st.session_state.sim_bt}</div></div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.markdown(f"**[감지된 위험 요인]**")
-            if detected_factors:
-                for f in detected_factors:
-                    st.markdown(f"<span class='risk-tag'>{f}</span>", unsafe_allow_html=True)
-            else:
-                st.info("특이 사항 없음")
+        simulation_panel(curr_pt_base, monitor_slot, alarm_slot)
 
     with tab2: st.write("오더 화면입니다.")
 
     with tab3:
-        st.markdown("##### 📋 간호진술문 (Nursing Note)")
-        for note in st.session_state.nursing_notes:
-            st.markdown(f"""
-            <div class="note-entry">
-                <div class="note-time">📅 {note['time']} | 작성자: {note['writer']}</div>
-                <div>{note['content']}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        st.text_area("추가 기록", height=100)
-        st.button("저장")
-
-# [NEW] 알람 (버튼을 HTML 안에 넣어서 내용물과 함께 움직이게 함)
-if res and (fall_score_raw >= float(res.get('cutoff_top20', 1.0))) and not st.session_state.alarm_confirmed:
-    # ✅ 알람 트리거: Top20(상위 20%) 기준
-    factors_str = "<br>• ".join(detected_factors) if detected_factors else "복합적 요인"
-    
-    st.markdown(f"""
-    <div class="custom-alert-box">
-        <div class="alert-title">🚨 낙상 고위험 감지! ({fall_score}점)</div>
-        <div class="alert-content">
-            환자의 상태 변화로 인해 낙상 위험도가 급격히 상승했습니다. 즉시 확인이 필요합니다.
-        </div>
-        <div class="alert-factors">
-            <b>[감지된 주요 위험 요인]</b><br>
-            • {factors_str}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # ✅ (수정) 링크 대신 Streamlit 버튼 사용: 클릭해도 상태가 리셋되지 않음
-    if st.button("확인 (Confirm)", key="confirm_alarm_btn", use_container_width=True):
-        confirm_alarm()
-        st.rerun()
+        notes_panel(curr_pt_base)
+
+    with tab4:
+        census_panel()
+
+    with tab5:
+        handoff_panel()
+
+if get_alarm_manager() is not None:
+    watch_alarms()
 
 st.markdown("---")
-legends = [("수술전","#e57373"), ("수술중","#ba68c8"), ("검사후","#7986cb"), ("퇴원","#81c784"), ("신규오더","#ffb74d")]
-html = '<div style="display:flex; gap:10px;">' + "".join([f'<span class="legend-item" style="background:{c}">{l}</span>' for l,c in legends]) + '</div>'
-st.markdown(html, unsafe_allow_html=True)
+st.markdown(ui_templates.LEGEND_HTML, unsafe_allow_html=True)
+
+# [DEBUG] 구간별 타이밍 (FALLGUARD_TIMING=1 일 때만 표시)
+if instrumentation.enabled():
+    with st.expander("⏱️ 성능 계측 (debug)"):
+        prev = st.session_state.get("last_rerun_timing")
+        if prev:
+            st.caption("직전 rerun: " + " · ".join(f"{k} {v:.1f}ms" for k, v in prev.items()))
+        import pandas as pd
+        st.dataframe(pd.DataFrame(instrumentation.registry.snapshot()).round(3), hide_index=True, use_container_width=True)
+        st.code(instrumentation.registry.prometheus_text(), language="text")
+    st.session_state.last_rerun_timing = instrumentation.end_rerun()
@@ -0,0 +1,300 @@
+"""근무조 인수인계 보고서: 교대 직전 병동 전체 사전 계산 + 스냅샷 이후 바뀐 환자만 live 재스코어링.
+
+- HandoffScheduler: 근무조 경계 lead_s 전 (기본 15분)에 재원 명단 전체를 한 번에 스코어링하고 위험요인과
+  직전 근무조 대비 점수 변화 (score_history 근무조 bucket 의 last)를 계산해 보고서 (HandoffReport)로
+  HandoffStore 에 넣습니다. 보고서 key 는 인수받는 근무조 시작 시각 (score_history.next_shift_boundary) 이고,
+  시작했을 때 현재 근무조 보고서가 없으면 바로 한 번 만듭니다.
+- 교대 시각에 대시보드를 여는 간호사마다 병동 전체를 다시 계산하지 않고 보고서를 그대로 씁니다.
+  HandoffReport.current 는 지금 명단의 인코딩 입력을 스냅샷과 비교해 (census.match_rows) 입력이 바뀐 환자와
+  신규 입원만 재스코어링하고 (live 컬럼 True), 퇴원 환자는 뺍니다. 모델 (model_version)이 바뀌었으면 전원 live.
+- 점수 변화 (delta)는 표시 점수 기준 (지금 - 직전 근무조 마지막)이며, 이력이 없으면 NaN 입니다.
+- HandoffStore(directory) 를 주면 (FALLGUARD_HANDOFF_DIR) 보고서를 Parquet 로 남깁니다. 재시작한 프로세스나
+  같은 디렉터리를 쓰는 다른 워커는 메모리에 없는 근무조 보고서를 파일에서 읽습니다 (먼저 만든 쪽 결과 공유).
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+import census
+import score_history
+import score_reference
+import scoring
+
+DEFAULT_LEAD_S = 15 * 60
+DEFAULT_KEEP = 9  # 보관 보고서 수 (3일치 근무조)
+TABLE_COLUMNS = scoring.RESULT_COLUMNS + ["n_factors", "factors"]
+DISPLAY_COLUMNS = ["ward", "bed", "name", "patient_id", "risk_group", "display_score", "delta", "factors", "live"]
+_INPUT_PREFIX = "input:"
+_META_KEY = b"fallguard_handoff"
+
+
+def _roster_ids(roster):
+    return roster["patient_id"].astype(str).to_numpy(dtype=object)
+
+
+def score_delta(results, prev_raw):
+    """표시 점수 변화 (지금 - 직전 근무조). 직전 점수가 없거나 입력 오류 행은 NaN."""
+    prev = scoring.display_scores(prev_raw).astype(float)
+    delta = results["display_score"] - prev
+    delta[(prev < 0) | (results["input_error"] != 0)] = np.nan
+    return delta
+
+
+def group_counts(table, by="ward"):
+    """병동별 위험군 인원 요약 (고/중/저/입력오류 + 재원). by 컬럼이 없으면 전체 한 줄."""
+    import pandas as pd
+    groups = [scoring.RISK_HIGH, scoring.RISK_MID, scoring.RISK_LOW, scoring.RISK_INVALID]
+    keys = table[by] if by in table else pd.Series("전체", index=table.index)
+    counts = pd.crosstab(keys, table["risk_group"]).reindex(columns=groups, fill_value=0)
+    counts["재원"] = counts.sum(axis=1)
+    return counts.rename_axis(index=by, columns=None)
+
+
+    # --------------------------------------------------------------------------------
+# 1. 보고서
+    # --------------------------------------------------------------------------------
+class HandoffReport:
+    """근무조 1개 인수인계 스냅샷 (명단 전체의 인코딩 입력 / 결과 / 직전 근무조 점수)."""
+
+    def __init__(self, shift_start, built_at, model_version, prev_bucket, ids, X, results, prev_raw, meta, raw_cols):
+        self.shift_start = int(shift_start)
+        self.shift = score_history.shift_of(self.shift_start)[0]
+        self.built_at = float(built_at)
+        self.model_version = model_version
+        self.prev_bucket = int(prev_bucket)  # 점수 변화 기준 근무조 bucket (score_history 'shift')
+        self.ids = ids
+        self.X = X
+        self.results = results
+        self.prev_raw = prev_raw
+        self.meta = meta  # 명단 표시용 컬럼 (bed/name/ward/patient_id ...)
+        self.raw_cols = list(raw_cols)  # X 컬럼 순서
+        self._memo = (None, None)  # (key, current 표): 같은 명단으로 다시 열면 비교도 건너뜀
+
+    @property
+    def label(self):
+        return score_history.bucket_label(self.shift_start, "shift")
+
+    def table(self):
+        """스냅샷 그대로의 보고서 표 (live 재계산 없음)."""
+        table = self.meta.copy()
+        for col in TABLE_COLUMNS:
+            table[col] = self.results[col]
+        table["prev_raw"], table["delta"] = self.prev_raw, score_delta(self.results, self.prev_raw)
+        table["live"] = False
+        return table
+
+    def current(self, roster, res, engine=None, history=None, key=None):
+        """지금 명단 기준 보고서 표. 스냅샷 이후 입력이 바뀐 환자 / 신규 입원만 재스코어링 (live=True).
+
+        key: 명단 버전 (예: (소스, mtime, model_version)). 직전 호출과 같으면 그 표를 그대로 돌려줌 (수정하지 말 것).
+        """
+        memo_key, memo = self._memo
+        if key is not None and key == memo_key:
+            return memo
+        ids = _roster_ids(roster)
+        X, codes = census.encode_roster(roster, res)
+        old_idx, known, changed = census.match_rows(ids, X, self.ids, self.X, codes, self.results["input_error"])
+        if res.get('model_version') != self.model_version:
+            changed[:] = True
+        results = census.carry_over(self.results, old_idx, known, len(ids))
+        prev = np.full(len(ids), np.nan)
+        prev[known] = self.prev_raw[old_idx[known]]
+        rows = np.flatnonzero(changed)
+        if len(rows):
+            census.score_rows(X, rows, results, res, engine, codes)
+            new = np.flatnonzero(~known)
+            if history is not None and len(new):
+                prev[new] = history.bucket_last(ids[new], self.prev_bucket)
+        table = census.result_table(roster, results, res['raw_cols'])
+        table["prev_raw"], table["delta"] = prev, score_delta(results, prev)
+        table["live"] = changed
+        if key is not None:
+            self._memo = (key, table)
+        return table
+
+    # ---- 저장 ----
+    def save(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        frame = self.table().drop(columns=["delta", "live"])
+        for j, col in enumerate(self.raw_cols):
+            frame[_INPUT_PREFIX + col] = self.X[:, j]
+        meta = {"shift_start": self.shift_start, "built_at": self.built_at, "model_version": self.model_version,
+                "prev_bucket": self.prev_bucket, "meta_columns": list(self.meta.columns), "raw_cols": self.raw_cols}
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _META_KEY: json.dumps(meta).encode()})
+        score_reference._atomic_save(path, lambda f: pq.write_table(table, f))
+
+    @classmethod
+    def load(cls, path):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+        meta = json.loads(table.schema.metadata[_META_KEY])
+        frame = table.to_pandas()
+        X = np.column_stack([frame[_INPUT_PREFIX + c].to_numpy(dtype=float) for c in meta["raw_cols"]])
+        results = {col: frame[col].to_numpy() for col in TABLE_COLUMNS}
+        return cls(meta["shift_start"], meta["built_at"], meta["model_version"], meta["prev_bucket"],
+                   _roster_ids(frame), X, results, frame["prev_raw"].to_numpy(dtype=float),
+                   frame[meta["meta_columns"]].reset_index(drop=True), meta["raw_cols"])
+
+
+def build_report(roster, res, engine=None, history=None, shift_start=None, now=None):
+    """명단 전체 스코어링 + 위험요인 + 직전 근무조 대비 변화 -> HandoffReport.
+
+    shift_start: 보고서 근무조 시작 (기본: now 가 속한 근무조). history 가 있으면 이번 점수도 이력에 기록.
+    """
+    now = time.time() if now is None else now
+    shift_start = score_history.shift_start(now) if shift_start is None else shift_start
+    ids = _roster_ids(roster)
+    X, codes = census.encode_roster(roster, res)
+    results = census.carry_over({}, np.full(len(ids), -1, dtype=np.intp), np.zeros(len(ids), dtype=bool), len(ids))
+    census.score_rows(X, np.arange(len(ids)), results, res, engine, codes)
+
+    prev_bucket = int(score_history.bucket_ids(now, "shift")) - 1  # 지금 근무조 직전 (마지막 점수 = 이번 근무조 시작 시점)
+    prev = history.bucket_last(ids, prev_bucket) if history is not None else np.full(len(ids), np.nan)
+    if history is not None:
+        valid = results["input_error"] == 0
+        history.record_many(ids[valid], results["raw_score"][valid], ts=now)
+    meta = roster[[c for c in roster.columns if c not in res['raw_cols']]].reset_index(drop=True)
+    return HandoffReport(shift_start, now, res.get('model_version'), prev_bucket, ids, X, results, prev, meta,
+                         res['raw_cols'])
+
+
+    # --------------------------------------------------------------------------------
+# 2. 저장소 / 스케줄러
+    # --------------------------------------------------------------------------------
+class HandoffStore:
+    """근무조 시작 시각 -> HandoffReport (최근 keep 개, thread-safe). directory 가 있으면 Parquet 로도 보관."""
+
+    def __init__(self, directory=None, keep=DEFAULT_KEEP):
+        self.directory = Path(directory) if directory else None
+        self.keep = int(keep)
+        self.reports = {}
+        self._lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for path in sorted(self.directory.glob("handoff_*.parquet"))[-self.keep:]:
+                report = HandoffReport.load(path)
+                self.reports[report.shift_start] = report
+
+    def _path(self, shift_start):
+        return self.directory / f"handoff_{int(shift_start)}.parquet"
+
+    def put(self, report):
+        if self.directory is not None:
+            report.save(self._path(report.shift_start))
+        with self._lock:
+            self.reports[report.shift_start] = report
+            for old in sorted(self.reports)[:-self.keep]:
+                del self.reports[old]
+                if self.directory is not None and self._path(old).exists():
+                    self._path(old).unlink()
+
+    def get(self, shift_start):
+        """근무조 보고서. 메모리에 없고 디렉터리에 파일이 있으면 (다른 워커가 만든 것) 읽어 둠."""
+        with self._lock:
+            report = self.reports.get(int(shift_start))
+        if report is None and self.directory is not None and self._path(shift_start).exists():
+            report = HandoffReport.load(self._path(shift_start))
+            with self._lock:
+                self.reports[report.shift_start] = report
+        return report
+
+    def latest(self, shift_name=None, now=None):
+        """now 까지 시작하는 (인수인계 직전 만든 다음 근무조 포함) 가장 최근 보고서. shift_name 으로 근무조 지정."""
+        limit = score_history.next_shift_boundary(time.time() if now is None else now)
+        with self._lock:
+            reports = sorted(self.reports.values(), key=lambda r: r.shift_start, reverse=True)
+        for report in reports:
+            if report.shift_start <= limit and (shift_name is None or report.shift == shift_name):
+                return report
+        return None
+
+
+class HandoffScheduler:
+    """근무조 경계 lead_s 전에 build(shift_start) 로 보고서를 만들어 store 에 넣는 백그라운드 스레드."""
+
+    def __init__(self, store, build, lead_s=DEFAULT_LEAD_S, retry_s=60.0, clock=time.time):
+        self.store = store
+        self.build = build  # shift_start -> HandoffReport
+        self.lead_s = float(lead_s)
+        self.retry_s = retry_s
+        self.clock = clock
+        self.last_build = None  # {"shift", "patients", "ms"}
+        self.last_error = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._build_lock = threading.Lock()
+
+    @property
+    def building(self):
+        return self._build_lock.locked()
+
+    def wake(self):
+        """대기 중인 스레드가 바로 due 를 다시 확인하게 함 (대시보드가 보고서 없는 근무조를 열었을 때)."""
+        self._wake.set()
+
+    def due(self, now=None):
+        """지금 만들어야 하는 보고서의 근무조 시작 시각 (이미 있으면 None)."""
+        now = self.clock() if now is None else now
+        boundary = score_history.next_shift_boundary(now)
+        key = boundary if now >= boundary - self.lead_s else score_history.shift_start(now)
+        return None if self.store.get(key) is not None else key
+
+    def run_once(self, now=None, force=False):
+        """필요하면 (force 면 무조건) 보고서 1개 생성. 반환: 새 보고서 또는 None."""
+        with self._build_lock:
+            now = self.clock() if now is None else now
+            key = self.due(now)
+            if key is None and force:
+                boundary = score_history.next_shift_boundary(now)
+                key = boundary if now >= boundary - self.lead_s else score_history.shift_start(now)
+            if key is None:
+                return None
+            t0 = time.perf_counter()
+            report = self.build(key)
+            self.store.put(report)
+            self.last_build = {"shift": report.label, "patients": len(report.ids), "ms": (time.perf_counter() - t0) * 1e3}
+            self.last_error = None
+            return report
+
+    def _next_wake(self, now):
+        due_at = score_history.next_shift_boundary(now) - self.lead_s
+        if now < due_at:
+            return due_at - now
+        return score_history.next_shift_boundary(now) - now  # 이번 경계 보고서는 만들었음 -> 경계 이후 다시 확인
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+                wait = self._next_wake(self.clock())
+            except Exception as e:  # 명단/모델 오류: 기록 후 retry_s 뒤 재시도 (대시보드는 live 경로로 동작)
+                self.last_error = f"{type(e).__name__}: {e}"
+                wait = self.retry_s
+            self._wake.wait(max(1.0, wait))
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="handoff-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def default_store():
+    """FALLGUARD_HANDOFF_DIR 가 있으면 디스크 보관 store, 없으면 메모리 store."""
+    return HandoffStore(os.environ.get("FALLGUARD_HANDOFF_DIR") or None)
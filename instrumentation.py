@@ -0,0 +1,273 @@
+"""대시보드 rerun 구간별 타이밍 계측 (span / decorator + 히스토그램 + Prometheus text + cProfile).
+
+    with instrumentation.span("predict"):
+        ...
+    @instrumentation.timed("render_chart")
+    def show_chart(...): ...
+
+- 기본은 꺼져 있습니다 (FALLGUARD_TIMING=1 또는 enable(True) 로 켬). 꺼져 있으면 span() 은
+  미리 만든 null context 를, timed 는 플래그 확인 후 원래 함수를 그대로 호출하므로 추가 비용은 호출당 수백 ns 입니다.
+- 구간별 latency 는 고정 bucket 히스토그램(Prometheus histogram 과 같은 누적 bucket)과
+  최근 RECENT 건 ring 으로 모아 p50/p95 를 계산합니다.
+- 노출: snapshot() (디버그 패널), prometheus_text(), FALLGUARD_METRICS_PORT 로 /metrics HTTP,
+  FALLGUARD_TIMING_LOG 로 rerun 마다 구간별 ms 를 JSONL 한 줄씩 기록.
+- FALLGUARD_PROFILE_DIR 를 지정하면 begin_rerun ~ end_rerun 사이를 cProfile 로 감싸
+  rerun 마다 .prof 파일을 남깁니다 (python -m pstats / snakeviz 로 확인).
+- st.fragment 범위 rerun 은 스크립트 처음/끝을 지나지 않으므로 fragment 본문을 fragment_run(name) 으로 감쌉니다.
+  fragment 만 실행될 때는 그 자체가 rerun 1번 (scope=name: "rerun" + "rerun.<name>" 히스토그램, 로그, 프로파일),
+  전체 rerun 안에서 실행될 때는 name 구간 span 입니다.
+Streamlit 은 세션마다 별도 스레드에서 스크립트를 실행하므로 rerun 추적은 thread-local 입니다.
+"""
+import bisect
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# 초 단위 bucket 상한 (Prometheus le)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RECENT = 1024
+METRIC_NAME = "fallguard_stage_seconds"
+
+_enabled = os.environ.get("FALLGUARD_TIMING", "") not in ("", "0")
+_local = threading.local()
+_NULL = contextlib.nullcontext()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = bool(flag)
+
+
+    # --------------------------------------------------------------------------------
+# 1. 히스토그램 registry
+    # --------------------------------------------------------------------------------
+class StageHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # 마지막 칸 = +Inf
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT)
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+
+class Registry:
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            hist = self.stages.get(name)
+            if hist is None:
+                hist = self.stages[name] = StageHistogram()
+            hist.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+
+    def snapshot(self):
+        """구간별 요약 (ms): stage/count/mean/p50/p95/max. 누적 시간 큰 순."""
+        with self._lock:
+            items = [(name, h.count, h.total, h.max, np.array(h.recent)) for name, h in self.stages.items()]
+        rows = []
+        for name, count, total, mx, recent in sorted(items, key=lambda t: -t[2]):
+            p50, p95 = np.percentile(recent, [50, 95]) if len(recent) else (0.0, 0.0)
+            rows.append({"stage": name, "count": count, "mean_ms": total / count * 1e3,
+                         "p50_ms": p50 * 1e3, "p95_ms": p95 * 1e3, "max_ms": mx * 1e3})
+        return rows
+
+    def prometheus_text(self):
+        lines = [f"# HELP {METRIC_NAME} Dashboard stage latency in seconds.", f"# TYPE {METRIC_NAME} histogram"]
+        with self._lock:
+            for name, h in sorted(self.stages.items()):
+                cum = 0
+                for le, c in zip(BUCKETS + ("+Inf",), h.counts):
+                    cum += c
+                    lines.append(f'{METRIC_NAME}_bucket{{stage="{name}",le="{le}"}} {cum}')
+                lines.append(f'{METRIC_NAME}_sum{{stage="{name}"}} {h.total:.9f}')
+                lines.append(f'{METRIC_NAME}_count{{stage="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+    # --------------------------------------------------------------------------------
+# 2. span / decorator
+    # --------------------------------------------------------------------------------
+class _Span:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        registry.observe(self.name, elapsed)
+        trace = getattr(_local, "trace", None)
+        if trace is not None:
+            trace[self.name] = trace.get(self.name, 0.0) + elapsed
+        return False
+
+
+def span(name):
+    """구간 계측 context manager. 꺼져 있으면 공유 null context."""
+    return _Span(name) if _enabled else _NULL
+
+
+def timed(name=None):
+    """함수 전체를 span 으로 계측하는 decorator (이름 생략 시 함수 이름)."""
+    def deco(fn):
+        stage = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+    # --------------------------------------------------------------------------------
+# 3. rerun 단위 추적 (log sink / cProfile)
+    # --------------------------------------------------------------------------------
+def begin_rerun(scope="app"):
+    """스크립트 시작 시 호출. 이전 rerun 이 st.rerun()/예외로 끝나 end_rerun 이 없었으면 버림."""
+    _discard()
+    if not _enabled:
+        return
+    _local.trace = {}
+    _local.scope = scope
+    _local.t0 = time.perf_counter()
+    _local.profiler = None
+    if os.environ.get("FALLGUARD_PROFILE_DIR"):
+        _local.profiler = cProfile.Profile()
+        _local.profiler.enable()
+
+
+def end_rerun():
+    """스크립트 끝에서 호출. rerun 전체 시간 기록 + 로그/프로파일 저장. 구간별 ms dict 반환."""
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return None
+    _local.trace = None
+    elapsed = time.perf_counter() - _local.t0
+    scope = getattr(_local, "scope", "app")
+    registry.observe("rerun", elapsed)
+    registry.observe(f"rerun.{scope}", elapsed)
+    stages = {k: round(v * 1e3, 3) for k, v in trace.items()}
+    stages["rerun"] = round(elapsed * 1e3, 3)
+
+    profiler = getattr(_local, "profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        out_dir = os.environ["FALLGUARD_PROFILE_DIR"]
+        os.makedirs(out_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(out_dir, f"rerun-{time.time_ns()}-{threading.get_ident()}.prof"))
+        _local.profiler = None
+
+    log_path = os.environ.get("FALLGUARD_TIMING_LOG")
+    if log_path:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": time.time(), "scope": scope, "stages_ms": stages}, ensure_ascii=False) + "\n")
+    return stages
+
+
+def _discard():
+    """끝나지 않은 rerun 추적 (st.rerun()/예외) 버림. 켜 둔 profiler 는 끔."""
+    _local.trace = None
+    profiler = getattr(_local, "profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        _local.profiler = None
+
+
+class fragment_run(contextlib.ContextDecorator):
+    """st.fragment 본문 계측 (with 문 또는 decorator).
+
+    전체 rerun 중 (begin_rerun 이후)이면 name 구간 span, fragment 만 다시 실행될 때는 scope=name 인 rerun 1번으로
+    begin_rerun / end_rerun 을 하고 on_end(구간별 ms dict) 를 부릅니다 (예: 디버그 패널의 직전 rerun 표시).
+    """
+
+    def __init__(self, name, on_end=None):
+        self.name = name
+        self.on_end = on_end
+        self._span = None
+        self._own = False
+
+    def _recreate_cm(self):  # decorator 로 쓸 때 호출마다 새 인스턴스 (세션 스레드 간 공유 상태 없음)
+        return fragment_run(self.name, self.on_end)
+
+    def __enter__(self):
+        if not _enabled:
+            return self
+        if getattr(_local, "trace", None) is not None:
+            self._span = _Span(self.name).__enter__()
+        else:
+            self._own = True
+            begin_rerun(self.name)
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if self._span is not None:
+            self._span.__exit__(exc_type, *exc)
+        elif self._own:
+            if exc_type is not None:  # st.rerun() / 예외: 전체 rerun 과 같이 버림
+                _discard()
+                return False
+            stages = end_rerun()
+            if stages is not None and self.on_end is not None:
+                self.on_end(stages)
+        return False
+
+
+    # --------------------------------------------------------------------------------
+# 4. Prometheus /metrics
+    # --------------------------------------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """/metrics 를 제공하는 daemon 스레드 HTTP 서버 시작 (프로세스당 1회 호출)."""
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="fallguard-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,237 @@
+"""운영 점수 기반 cutoff 재보정: KLL 분위 sketch + 학습 분포 대비 drift + 새 참조 아티팩트 발행.
+
+- KLLSketch: 점수 1건/배치를 O(1) amortized 로 넣고, 메모리는 k 에 비례 (k=256 -> 약 1천 개 float).
+  레벨 h 의 항목은 가중치 2^h 이고, 레벨 용량을 넘으면 정렬 후 한 칸 건너 하나씩 다음 레벨로 올립니다.
+  같은 k 의 sketch 끼리 merge 가능 (워커별 sketch -> 부모에서 합침, to_bytes/from_bytes 로 전달).
+  순위 오차는 k=256 에서 대략 ±1 %p 수준이며 bench_live_cutoffs.py 가 정확값과 비교합니다.
+- scoring.score_results 가 res['live_sketch'] 에 모든 운영 점수를 넣습니다 (스트리밍/배치/서비스/대시보드 공통).
+- drift_report: 학습 분포 대비 KS 통계량, PSI(학습 10분위), 학습 cutoff 위 비율, live cutoff.
+- publish_reference: live 분포로 train_score_ref.npz 와 같은 형식(train_scores_sorted 분위 grid +
+  cutoff_top20/top40 + drift 메타데이터)의 새 참조 파일을 만듭니다. FALLGUARD_REF_PATH 로 지정해 사용.
+"""
+import argparse
+import io
+import json
+import threading
+import time
+
+import numpy as np
+
+import score_reference
+
+DEFAULT_K = 256
+_C = 2.0 / 3.0  # 레벨 용량 감소율
+
+
+    # --------------------------------------------------------------------------------
+# 1. KLL sketch
+    # --------------------------------------------------------------------------------
+class KLLSketch:
+    """mergeable 분위 sketch (thread-safe)."""
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = int(k)
+        self._count = 0  # 레벨에 반영된 건수 (버퍼 제외)
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._buf = []  # 단건 update 버퍼 (레벨 0 으로 일괄 이동)
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._view = None  # (정렬 값, 누적 가중치) 캐시
+
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(2, int(np.ceil(self.k * _C ** depth)))
+
+    def update(self, value):
+        with self._lock:
+            self._buf.append(float(value))
+            if len(self._buf) >= self._capacity(0):
+                self._drain()
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        with self._lock:
+            if len(values) < self._capacity(0):  # 작은 배치(단일 환자 등)는 버퍼로
+                self._buf.extend(values.tolist())
+                if len(self._buf) >= self._capacity(0):
+                    self._drain()
+                return
+            self._drain()
+            self._add(values)
+
+    def _drain(self):
+        if self._buf:
+            buf, self._buf = np.array(self._buf), []
+            self._add(buf)
+
+    def _add(self, values):
+        self._count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        self._view = None
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                keep_one = len(level) % 2  # 홀수면 가장 큰 값 1개는 현재 레벨에 남김
+                pairs = level[:len(level) - keep_one]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[h] = level[len(level) - keep_one:]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def merge(self, other):
+        """other 를 이 sketch 에 합침 (같은 k 권장)."""
+        with self._lock, other._lock:
+            other._drain()
+            self._drain()
+            while len(self.levels) < len(other.levels):
+                self.levels.append(np.empty(0))
+            for h, level in enumerate(other.levels):
+                self.levels[h] = np.concatenate([self.levels[h], level])
+            self._count += other._count
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress()
+            self._view = None
+        return self
+
+    def _sorted_view(self):
+        with self._lock:
+            self._drain()
+            if self._view is None:
+                vals = np.concatenate(self.levels)
+                weights = np.concatenate([np.full(len(l), 2.0 ** h) for h, l in enumerate(self.levels)])
+                order = np.argsort(vals, kind="stable")
+                self._view = (vals[order], np.cumsum(weights[order]))
+            return self._view
+
+    def cdf(self, x):
+        """P(score <= x) 근사."""
+        vals, cum = self._sorted_view()
+        if not len(vals):
+            return np.full(np.shape(x), np.nan)
+        idx = np.searchsorted(vals, np.asarray(x, dtype=float), side="right")
+        return np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0.0) / cum[-1]
+
+    def quantile(self, q):
+        vals, cum = self._sorted_view()
+        if not len(vals):
+            return np.full(np.shape(q), np.nan)
+        target = np.asarray(q, dtype=float) * cum[-1]
+        return vals[np.minimum(np.searchsorted(cum, target, side="left"), len(vals) - 1)]
+
+    def top_percent(self, raw_scores):
+        return np.clip(100.0 - self.cdf(raw_scores) * 100.0, 0.0, 100.0)
+
+    @property
+    def n(self):
+        return self._count + len(self._buf)
+
+    @property
+    def size(self):
+        return sum(len(l) for l in self.levels) + len(self._buf)
+
+    # ---- 직렬화 (워커 -> 부모, 디스크) ----
+    def to_bytes(self):
+        with self._lock:
+            self._drain()
+            buf = io.BytesIO()
+            np.savez(buf, k=self.k, n=self._count, min=self.min, max=self.max,
+                     values=np.concatenate(self.levels), lengths=np.array([len(l) for l in self.levels]))
+            return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        with np.load(io.BytesIO(data), allow_pickle=False) as z:
+            sketch = cls(int(z["k"]))
+            sketch._count, sketch.min, sketch.max = int(z["n"]), float(z["min"]), float(z["max"])
+            sketch.levels = np.split(z["values"], np.cumsum(z["lengths"])[:-1])
+        return sketch
+
+
+    # --------------------------------------------------------------------------------
+# 2. drift / 발행
+    # --------------------------------------------------------------------------------
+def live_cutoffs(sketch):
+    cut20, cut40 = sketch.quantile([0.80, 0.60])
+    return float(cut20), float(cut40)
+
+
+def drift_report(sketch, train_scores_sorted, cutoff_top20, cutoff_top40, bins=10):
+    """학습 분포 대비 live 분포 drift 지표."""
+    train = np.asarray(train_scores_sorted, dtype=float)
+    n_train = len(train)
+    vals, _ = sketch._sorted_view()
+    grid = np.union1d(vals, np.quantile(train, np.linspace(0, 1, 1025)))
+    ks = float(np.max(np.abs(sketch.cdf(grid) - np.searchsorted(train, grid, side="right") / n_train)))
+
+    edges = np.quantile(train, np.linspace(0, 1, bins + 1))[1:-1]  # 학습 10분위 경계
+    expected = np.diff(np.concatenate([[0.0], np.searchsorted(train, edges, side="right") / n_train, [1.0]]))
+    actual = np.diff(np.concatenate([[0.0], sketch.cdf(edges), [1.0]]))
+    eps = 1e-6
+    psi = float(np.sum((actual - expected) * np.log((actual + eps) / (expected + eps))))
+
+    live20, live40 = live_cutoffs(sketch)
+    return {
+        "n_live": int(sketch.n),
+        "ks": ks,
+        "psi": psi,
+        "live_cutoff_top20": live20,
+        "live_cutoff_top40": live40,
+        "train_cutoff_top20": float(cutoff_top20),
+        "train_cutoff_top40": float(cutoff_top40),
+        "live_share_above_train_top20": float(1.0 - sketch.cdf(cutoff_top20)),
+        "live_share_above_train_top40": float(1.0 - sketch.cdf(cutoff_top40)),
+    }
+
+
+def publish_reference(sketch, out_path, drift=None, grid_size=4096):
+    """live 분포로 새 참조 npz 발행 (train_score_ref.npz 형식 + 메타데이터). 반환: (cut20, cut40)."""
+    if sketch.n == 0:
+        raise ValueError("live 점수가 없어 참조를 발행할 수 없습니다.")
+    scores = np.sort(sketch.quantile((np.arange(grid_size) + 0.5) / grid_size))
+    cut20, cut40 = live_cutoffs(sketch)
+    meta = {"source": "live_kll", "n_live": int(sketch.n), "k": sketch.k,
+            "published_at": time.strftime("%Y-%m-%d %H:%M:%S"), "drift": drift or {}}
+    score_reference._atomic_save(out_path, lambda f: np.savez(
+        f, train_scores_sorted=scores, cutoff_top20=cut20, cutoff_top40=cut40,
+        meta=np.array(json.dumps(meta, ensure_ascii=False)),
+    ))
+    return cut20, cut40
+
+
+def main():
+    ap = argparse.ArgumentParser(description="워커별 live 점수 sketch 병합 -> drift 리포트 / 새 참조 발행")
+    ap.add_argument("sketches", nargs="+", help="KLLSketch.to_bytes() 로 저장한 파일들")
+    ap.add_argument("--ref", default=str(score_reference.REF_PATH), help="비교할 학습 참조 npz")
+    ap.add_argument("--publish", help="새 참조 npz 경로 (지정 시 발행)")
+    args = ap.parse_args()
+
+    merged = None
+    for path in args.sketches:
+        with open(path, "rb") as f:
+            part = KLLSketch.from_bytes(f.read())
+        merged = part if merged is None else merged.merge(part)
+    train, cut20, cut40 = score_reference.read_npz_reference(args.ref)
+    report = drift_report(merged, train, cut20, cut40)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.publish:
+        publish_reference(merged, args.publish, drift=report)
+        print(f"발행: {args.publish}")
+
+
+if __name__ == "__main__":
+    main()
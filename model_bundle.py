@@ -0,0 +1,171 @@
+"""단일 모델 번들 (fallguard_bundle.npz): schema + compiled 계수 + 학습 점수 분위 + checksum.
+
+joblib 모델은 unpickle 에 sklearn/imblearn import (약 1초)가 필요하고, load_resources 가 아티팩트 3개를
+따로 읽습니다. 번들은 원본 아티팩트에서 한 번 만들어 두는 파생 아티팩트로, NumPy 만으로 수 ms 에 읽습니다.
+
+    python model_bundle.py             # 원본 -> fallguard_bundle.npz (sklearn 필요, compiled 정합성 검증 포함)
+    python model_bundle.py --check     # 번들 checksum / 원본 일치 확인 + 로딩 시간 (배포 전 CI)
+
+형식 (np.savez, allow_pickle 없이 읽음):
+    format_version       BUNDLE_FORMAT (읽는 쪽보다 새 형식이면 거부)
+    meta                 JSON: schema, cutoff, 원본 sha256 (sources), 빌드 시각/라이브러리 버전, 정합성 오차
+    compiled_<param>     CompiledScorer.PARAMS
+    ref_knot_scores/ref_knot_cdf   학습 점수 분위 (score_reference.PercentileSketch)
+    checksum             위 항목 전체의 sha256 (키/dtype/shape 포함)
+손상/형식 오류는 BundleError 로 올립니다. 원본(joblib/schema)이 번들 옆에 있는데 내용이 다르면
+stale_sources 가 바뀐 항목을 돌려주고, scoring.load_resources 는 원본에서 로딩합니다.
+배포 이미지에서는 score_reference 파생 파일과 함께 미리 만들어 두세요.
+"""
+import argparse
+import hashlib
+import json
+import time
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+import score_reference
+from compiled_scorer import CompiledScorer
+
+BASE_DIR = Path(__file__).resolve().parent
+BUNDLE_PATH = BASE_DIR / "fallguard_bundle.npz"
+BUNDLE_FORMAT = 1
+
+_COMPILED_PREFIX = "compiled_"
+
+
+class BundleError(ValueError):
+    """번들 파일 손상 / checksum 불일치 / 지원하지 않는 형식."""
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _checksum(arrays):
+    h = hashlib.sha256()
+    for key in sorted(arrays):
+        a = np.ascontiguousarray(arrays[key])
+        h.update(key.encode())
+        h.update(f"{a.dtype.str}{a.shape}".encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+    # --------------------------------------------------------------------------------
+# 1. 빌드 (원본 아티팩트 -> 번들)
+    # --------------------------------------------------------------------------------
+def build_bundle(out_path=BUNDLE_PATH, model_path=None, schema_path=None, ref_path=None):
+    """원본 아티팩트로 번들을 만들고 meta (checksum 포함) 반환. compiled scorer 추출/정합성 실패 시 BundleError."""
+    import scoring
+    import sklearn
+
+    model_path = Path(model_path or scoring.MODEL_PATH)
+    schema_path = Path(schema_path or scoring.SCHEMA_PATH)
+    ref_path = Path(ref_path or scoring.REF_PATH)
+    res = scoring.load_resources(model_path, schema_path, ref_path, bundle_path=None)
+    if res['compiled'] is None:
+        raise BundleError(f"compiled scorer 를 만들 수 없어 번들을 만들지 않습니다: {res['compiled_error']}")
+    parity = scoring.verify_parity(res['compiled'], res)
+
+    scores_sorted, cut20, cut40 = score_reference.read_npz_reference(ref_path)
+    sketch = score_reference.PercentileSketch.build(scores_sorted)
+    meta = {
+        "schema": res['schema'],
+        "cutoff_top20": cut20,
+        "cutoff_top40": cut40,
+        "n_train": len(scores_sorted),
+        "percentile_max_error_pct": sketch.max_error_pct,
+        "parity_max_abs_err": parity,
+        "sources": {"model": file_digest(model_path), "schema": file_digest(schema_path), "ref": file_digest(ref_path)},
+        "source_version": res['model_version'],
+        "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "sklearn": sklearn.__version__,
+    }
+    arrays = {
+        "format_version": np.array(BUNDLE_FORMAT),
+        "meta": np.array(json.dumps(meta, ensure_ascii=False)),
+        "ref_knot_scores": sketch.knot_scores,
+        "ref_knot_cdf": sketch.knot_cdf,
+    }
+    arrays.update({_COMPILED_PREFIX + k: v for k, v in res['compiled'].params().items()})
+    checksum = _checksum(arrays)
+    score_reference._atomic_save(out_path, lambda f: np.savez(f, checksum=np.array(checksum), **arrays))
+    return {**meta, "checksum": checksum}
+
+
+    # --------------------------------------------------------------------------------
+# 2. 로딩 / 검증
+    # --------------------------------------------------------------------------------
+def load_bundle(path=BUNDLE_PATH):
+    """번들 -> dict(meta, compiled, percentile_sketch, checksum). 문제가 있으면 BundleError."""
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            arrays = {k: z[k] for k in z.files}
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        raise BundleError(f"번들을 읽을 수 없습니다 ({path}): {e}") from e
+
+    missing = {"format_version", "meta", "checksum", "ref_knot_scores", "ref_knot_cdf"} - set(arrays)
+    if missing:
+        raise BundleError(f"번들 항목 누락 ({path}): {sorted(missing)}")
+    version = int(arrays["format_version"])
+    if version > BUNDLE_FORMAT:
+        raise BundleError(f"번들 형식 v{version} 은 이 코드(v{BUNDLE_FORMAT})보다 새 버전입니다: {path}")
+    checksum = str(arrays.pop("checksum"))
+    if _checksum(arrays) != checksum:
+        raise BundleError(f"번들 checksum 불일치 (파일 손상 또는 수정됨): {path}")
+
+    params = {k[len(_COMPILED_PREFIX):]: v for k, v in arrays.items() if k.startswith(_COMPILED_PREFIX)}
+    try:
+        compiled = CompiledScorer.from_params(params)
+    except KeyError as e:
+        raise BundleError(f"번들 compiled 파라미터 누락 ({path}): {e}") from e
+    meta = json.loads(str(arrays["meta"]))
+    sketch = score_reference.PercentileSketch(arrays["ref_knot_scores"], arrays["ref_knot_cdf"],
+                                              meta.get("percentile_max_error_pct", np.nan))
+    return {"meta": meta, "compiled": compiled, "percentile_sketch": sketch, "checksum": checksum}
+
+
+def stale_sources(meta, **paths):
+    """번들 옆 원본 (model_path=..., schema_path=...) 중 내용이 번들 빌드 당시와 다른 항목 이름 목록.
+
+    파일이 없으면 (번들만 배포한 경우) 비교하지 않습니다.
+    """
+    sources = meta.get("sources", {})
+    changed = []
+    for key, path in paths.items():
+        name = key.removesuffix("_path")
+        if path is not None and Path(path).exists() and name in sources and file_digest(path) != sources[name]:
+            changed.append(name)
+    return changed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="fall-guard-ai 단일 모델 번들 빌드/검증")
+    ap.add_argument("--out", default=str(BUNDLE_PATH))
+    ap.add_argument("--check", action="store_true", help="빌드하지 않고 번들 checksum/원본 일치만 확인")
+    args = ap.parse_args()
+
+    if not args.check:
+        meta = build_bundle(args.out)
+        print(f"{args.out} 생성: checksum={meta['checksum'][:12]} parity={meta['parity_max_abs_err']:.1e} "
+              f"percentile 최대오차={meta['percentile_max_error_pct']:.3f}%p")
+
+    t0 = time.perf_counter()
+    bundle = load_bundle(args.out)
+    load_ms = (time.perf_counter() - t0) * 1e3
+    import scoring
+    stale = stale_sources(bundle["meta"], model_path=scoring.MODEL_PATH, schema_path=scoring.SCHEMA_PATH)
+    print(f"로딩 {load_ms:.2f} ms, 형식 v{BUNDLE_FORMAT}, built_at={bundle['meta']['built_at']}, "
+          f"원본 불일치={stale or '없음'}")
+    if stale:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""버전별 모델 registry + shadow (후보 모델) 스코어링 + 재시작 없는 primary 교체.
+
+디렉터리 구성 (FALLGUARD_REGISTRY_DIR, 기본 models/):
+    models/registry.json          {"primary": "2025-12", "shadow": ["2026-01"]}
+    models/2025-12/               risk_score_model.joblib + dashboard_schema.json + train_score_ref.npz
+    models/2026-01/               (또는 fallguard_bundle.npz 만 / 번들 + 원본)
+버전 디렉터리마다 scoring.load_resources 로 따로 올리므로 schema / 참조 cutoff 도 버전별입니다.
+registry.json 이 없으면 저장소 루트 아티팩트 1개를 버전 DEFAULT_VERSION 으로 씁니다 (기존 동작).
+
+- 운영 점수는 primary 만 냅니다. primary resources 에 ShadowScorer 를 res['shadow'] 로 붙이면
+  scoring.score_results 가 정상 행의 (인코딩 행렬, primary 점수)를 대기열에 넣고 바로 돌아갑니다. 후보 모델
+  스코어링은 스레드 1개가 요청 경로 밖에서 처리하며, 깨어날 때 쌓인 batch 를 모두 합쳐 후보마다 predict 1번으로
+  끝냅니다 (단일 환자 요청이 몰려도 호출당 Python 비용이 쌓이지 않음). 대기 행이 max_pending_rows 를 넘으면
+  그 batch 는 shadow 에서 건너뛰고 (dropped 행으로 집계) 운영 점수는 기다리지 않습니다.
+- 위험군 일치 통계 (AgreementStats)는 후보별 3x3 혼동행렬 (primary 고/중/저 x 후보 고/중/저) 누적입니다.
+  일치율, Cohen kappa, 상향/하향 재분류 비율, 평균 점수 차이를 합계에서 바로 계산합니다.
+- primary 교체: `python model_registry.py promote 2026-01` (registry.json 을 원자적으로 교체). 실행 중인
+  대시보드/서비스는 ModelRegistry.active() 가 poll_s 마다 registry.json mtime 을 보고 새 primary 로 바꿉니다.
+  점수 캐시 key 는 model_version (아티팩트 내용 hash) 을 포함하므로 교체 시 캐시를 비우지 않습니다
+  (이전 버전 항목은 LRU 로 밀려나고, 되돌리면 그대로 다시 hit).
+
+    python model_registry.py list
+    python model_registry.py promote 2026-01
+    python model_registry.py shadow 2026-02 2026-03     # 후보 목록 교체 (빈 목록 = shadow 끔)
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import instrumentation
+import model_bundle
+import score_reference
+import scoring
+
+REGISTRY_DIR = Path(os.environ.get("FALLGUARD_REGISTRY_DIR") or scoring.BASE_DIR / "models")
+MANIFEST_NAME = "registry.json"
+DEFAULT_VERSION = "default"  # registry.json 이 없을 때 저장소 루트 아티팩트
+DEFAULT_POLL_S = 2.0
+DEFAULT_MAX_PENDING_ROWS = 1_000_000  # 대기 행 상한 (행당 88 B -> 약 90 MB)
+
+GROUPS = (scoring.RISK_HIGH, scoring.RISK_MID, scoring.RISK_LOW)  # 혼동행렬 행/열 순서
+
+
+def group_codes(raw, cutoff_top20, cutoff_top40):
+    """raw 점수 -> 위험군 code (0 고위험, 1 중위험, 2 저위험). assign_risk_group 과 같은 기준."""
+    raw = np.asarray(raw, dtype=float)
+    return np.where(raw >= cutoff_top20, 0, np.where(raw >= cutoff_top40, 1, 2)).astype(np.intp)
+
+
+    # --------------------------------------------------------------------------------
+# 1. 위험군 일치 통계
+    # --------------------------------------------------------------------------------
+class AgreementStats:
+    """primary 대비 후보 1개의 위험군 혼동행렬 + 점수 차이 합계 (증분 누적, thread-safe)."""
+
+    def __init__(self):
+        self.confusion = np.zeros((len(GROUPS), len(GROUPS)), dtype=np.int64)
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, primary_codes, candidate_codes, primary_raw, candidate_raw):
+        k = len(GROUPS)
+        counts = np.bincount(primary_codes * k + candidate_codes, minlength=k * k).reshape(k, k)
+        diff = np.abs(np.asarray(candidate_raw, dtype=float) - primary_raw)
+        with self._lock:
+            self.confusion += counts
+            if len(diff):
+                self.abs_diff_sum += float(diff.sum())
+                self.max_abs_diff = max(self.max_abs_diff, float(diff.max()))
+
+    def summary(self):
+        with self._lock:
+            c = self.confusion.copy()
+            abs_diff_sum, max_abs_diff = self.abs_diff_sum, self.max_abs_diff
+        n = int(c.sum())
+        if not n:
+            return {"rows": 0}
+        agree = np.trace(c) / n
+        chance = float((c.sum(axis=1) @ c.sum(axis=0))) / n / n
+        return {
+            "rows": n,
+            "agreement": float(agree),
+            "kappa": float((agree - chance) / (1 - chance)) if chance < 1 else 1.0,
+            "upgraded": float(np.triu(c, 1).sum() / n),     # 후보가 더 높은 위험군 (저 -> 중/고, 중 -> 고)
+            "downgraded": float(np.tril(c, -1).sum() / n),  # 후보가 더 낮은 위험군
+            "mean_abs_diff": abs_diff_sum / n,
+            "max_abs_diff": max_abs_diff,
+            "confusion": {g: dict(zip(GROUPS, row)) for g, row in zip(GROUPS, c.tolist())},
+        }
+
+
+    # --------------------------------------------------------------------------------
+# 2. shadow 스코어링
+    # --------------------------------------------------------------------------------
+class ShadowScorer:
+    """primary batch 를 후보 모델들로 다시 스코어링 (스레드 1개, 요청 경로 밖). res['shadow'] 로 붙여 씀."""
+
+    def __init__(self, candidates, cutoffs, max_pending_rows=DEFAULT_MAX_PENDING_ROWS):
+        self.candidates = dict(candidates)  # 버전 -> resources
+        self.cutoffs = cutoffs  # primary (cutoff_top20, cutoff_top40)
+        self.max_pending_rows = int(max_pending_rows)
+        self.stats = {v: AgreementStats() for v in self.candidates}
+        self.batches = self.rows = self.dropped = self.errors = 0
+        self.last_error = None
+        self._queue = []  # [(X, raw)] 다음 worker 실행에서 한 번에 처리
+        self._pending_rows = 0
+        self._scheduled = False
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fallguard-shadow")
+
+    def submit(self, X, raw):
+        """정상 행의 인코딩 행렬 + primary raw 점수를 대기열에 넣음 (즉시 반환). 넘긴 배열은 수정하지 않아야 함."""
+        if not self.candidates or not len(raw):
+            return False
+        with self._lock:
+            if self._pending_rows + len(raw) > self.max_pending_rows:
+                self.dropped += len(raw)
+                return False
+            self._queue.append((X, raw))
+            self._pending_rows += len(raw)
+            if self._scheduled:  # 실행 중인 worker 가 이어서 가져감
+                return True
+            self._scheduled = True
+        self._pool.submit(self._run)
+        return True
+
+    def _run(self):
+        while True:
+            with self._lock:
+                items, self._queue = self._queue, []
+                if not items:
+                    self._scheduled = False
+                    return
+            X = items[0][0] if len(items) == 1 else np.vstack([x for x, _ in items])
+            raw = items[0][1] if len(items) == 1 else np.concatenate([r for _, r in items])
+            try:
+                self._score(X, raw)
+                with self._lock:
+                    self.batches += 1
+                    self.rows += len(raw)
+            except Exception as e:  # shadow 실패는 운영 점수와 무관: 기록만 함
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+            finally:
+                with self._lock:
+                    self._pending_rows -= len(raw)
+
+    def _score(self, X, raw):
+        with instrumentation.span("shadow"):
+            primary = group_codes(raw, *self.cutoffs)
+            for version, res in self.candidates.items():
+                # 계측 wrapper 를 건너뛰어 운영 predict 구간 통계에 shadow 시간이 섞이지 않게 함
+                cand = scoring.predict_matrix.__wrapped__(X, res)
+                codes = group_codes(cand, float(res['cutoff_top20']), float(res['cutoff_top40']))
+                self.stats[version].update(primary, codes, raw, cand)
+
+    def drain(self, timeout_s=30.0):
+        """대기 중인 batch 처리를 기다림 (벤치마크 / CLI 용)."""
+        deadline = time.monotonic() + timeout_s
+        while (self._scheduled or self._pending_rows) and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def summary(self):
+        return {
+            "batches": self.batches, "rows": self.rows, "dropped": self.dropped, "errors": self.errors,
+            "last_error": self.last_error,
+            "candidates": {v: s.summary() for v, s in self.stats.items()},
+        }
+
+
+    # --------------------------------------------------------------------------------
+# 3. registry
+    # --------------------------------------------------------------------------------
+def _check_compatible(primary, candidate, version):
+    """후보는 primary 와 같은 인코딩 행렬을 받으므로 입력 구성 (raw_cols / 범주 / 성별 mapping)이 같아야 함."""
+    if scoring.schema_context(primary['schema']) != scoring.schema_context(candidate['schema']):
+        raise ValueError(f"shadow 후보 '{version}' 의 입력 구성 (raw_input_cols / category_options / "
+                         f"gender_mapping)이 primary 와 다릅니다.")
+
+
+class ModelRegistry:
+    """registry.json 의 primary / shadow 버전을 올려 두고 active() 로 현재 primary resources 를 돌려줌."""
+
+    def __init__(self, root=REGISTRY_DIR, poll_s=DEFAULT_POLL_S, max_pending_rows=DEFAULT_MAX_PENDING_ROWS):
+        self.root = Path(root)
+        self.poll_s = poll_s
+        self.max_pending_rows = max_pending_rows
+        self.loaded = {}  # 버전 -> resources (교체 후 되돌릴 때 다시 읽지 않음)
+        self.primary_version = None
+        self.shadow_versions = []
+        self.error = None  # 마지막 manifest 적용 실패 (이전 primary 유지)
+        self.swaps = 0
+        self._primary = None
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._apply(self.read_manifest(), raise_errors=True)
+
+    @property
+    def manifest_path(self):
+        return self.root / MANIFEST_NAME
+
+    def read_manifest(self):
+        if not self.manifest_path.exists():
+            self._mtime = None
+            return {"primary": DEFAULT_VERSION, "shadow": []}
+        self._mtime = self.manifest_path.stat().st_mtime_ns
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return {"primary": manifest["primary"], "shadow": list(manifest.get("shadow", []))}
+
+    def versions(self):
+        """registry 에 있는 버전 디렉터리 이름 (모델 또는 번들이 있는 것만)."""
+        if not self.root.is_dir():
+            return []
+        return sorted(d.name for d in self.root.iterdir() if d.is_dir() and (
+            (d / scoring.MODEL_PATH.name).exists() or (d / model_bundle.BUNDLE_PATH.name).exists()))
+
+    def load(self, version):
+        """버전 resources (한 번 읽은 버전은 재사용). 실패는 예외 그대로."""
+        if version in self.loaded:
+            return self.loaded[version]
+        if version == DEFAULT_VERSION:
+            res = scoring.load_resources()
+        else:
+            d = self.root / version
+            if not d.is_dir():
+                raise FileNotFoundError(f"registry 에 버전 '{version}' 이 없습니다: {d}")
+            bundle = d / model_bundle.BUNDLE_PATH.name
+            res = scoring.load_resources(d / scoring.MODEL_PATH.name, d / scoring.SCHEMA_PATH.name,
+                                         d / scoring.REF_PATH.name, bundle_path=bundle if bundle.exists() else None)
+        res['registry_version'] = version
+        self.loaded[version] = res
+        return res
+
+    def _apply(self, manifest, raise_errors=False):
+        """manifest 의 버전을 모두 올린 뒤에만 primary 를 바꿈 (실패하면 이전 primary 유지)."""
+        try:
+            primary = self.load(manifest["primary"])
+            shadows = [v for v in manifest["shadow"] if v != manifest["primary"]]
+            candidates = {}
+            for v in shadows:
+                candidates[v] = self.load(v)
+                _check_compatible(primary, candidates[v], v)
+        except Exception as e:
+            if raise_errors:
+                raise
+            self.error = f"{type(e).__name__}: {e}"
+            return False
+
+        old = self._primary
+        if old is not None and old is not primary and old.get('shadow') is not None:
+            old.pop('shadow').close()
+        if primary.get('shadow') is not None:
+            primary['shadow'].close()
+        primary['shadow'] = ShadowScorer(candidates, (float(primary['cutoff_top20']), float(primary['cutoff_top40'])),
+                                         self.max_pending_rows) if candidates else None
+        self._primary = primary  # 참조 1개 교체 -> 이후 호출부터 새 primary (진행 중 batch 는 이전 resources 로 끝남)
+        self.primary_version, self.shadow_versions = manifest["primary"], shadows
+        self.swaps += old is not None and old is not primary
+        self.error = None
+        return True
+
+    def active(self):
+        """현재 primary resources. poll_s 마다 registry.json 변경을 확인해 바뀌었으면 교체."""
+        now = time.monotonic()
+        if now - self._checked >= self.poll_s:
+            with self._lock:
+                if now - self._checked >= self.poll_s:
+                    self._checked = now
+                    self.refresh()
+        return self._primary
+
+    def refresh(self):
+        """registry.json mtime 이 바뀌었으면 다시 읽어 적용. 반환: 적용 여부."""
+        mtime = self.manifest_path.stat().st_mtime_ns if self.manifest_path.exists() else None
+        if mtime == self._mtime:
+            return False
+        try:
+            manifest = self.read_manifest()
+        except (OSError, ValueError, KeyError) as e:
+            self.error = f"{type(e).__name__}: {e}"
+            return False
+        return self._apply(manifest)
+
+    # ---- 관리 (registry.json 쓰기) ----
+    def write_manifest(self, primary, shadow=()):
+        """registry.json 원자적 교체. 실행 중인 프로세스는 다음 poll 에서 적용."""
+        if primary != DEFAULT_VERSION and primary not in self.versions():
+            raise FileNotFoundError(f"registry 에 버전 '{primary}' 이 없습니다.")
+        manifest = {"primary": primary, "shadow": [v for v in shadow if v != primary]}
+        self.root.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+        score_reference._atomic_save(self.manifest_path, lambda f: f.write(payload))
+        return manifest
+
+    def promote(self, version):
+        """version 을 primary 로 (shadow 목록에서는 빠짐). 이 프로세스에는 바로 적용."""
+        manifest = self.write_manifest(version, self.shadow_versions)
+        with self._lock:
+            self._checked = time.monotonic()
+            self.refresh()
+        if self.primary_version != version:
+            raise RuntimeError(f"primary 교체 실패: {self.error}")
+        return manifest
+
+    def summary(self):
+        primary = self._primary
+        shadow = primary.get('shadow')
+        return {
+            "primary": self.primary_version, "model_version": primary.get('model_version'),
+            "shadow": self.shadow_versions, "swaps": self.swaps, "error": self.error,
+            "agreement": shadow.summary() if shadow is not None else None,
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="fall-guard-ai 모델 registry (primary / shadow 버전 관리)")
+    ap.add_argument("--root", default=str(REGISTRY_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="버전 목록과 현재 primary / shadow")
+    p = sub.add_parser("promote", help="primary 교체 (실행 중인 대시보드/서비스는 다음 poll 에서 적용)")
+    p.add_argument("version")
+    s = sub.add_parser("shadow", help="shadow 후보 목록 교체")
+    s.add_argument("versions", nargs="*")
+    args = ap.parse_args()
+
+    registry = ModelRegistry(args.root, max_pending_rows=0)  # CLI 는 shadow 스코어링을 하지 않음
+    if args.cmd == "promote":
+        registry.promote(args.version)
+    elif args.cmd == "shadow":
+        registry.write_manifest(registry.primary_version, args.versions)
+        registry.refresh()
+    for v in registry.versions() or [DEFAULT_VERSION]:
+        role = "primary" if v == registry.primary_version else "shadow" if v in registry.shadow_versions else ""
+        print(f"{v:20s} {role}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""간호기록 영구 저장소 (SQLite WAL, append-only, 환자/시각 인덱스, 배치 쓰기).
+
+- notes 테이블은 INSERT 만 합니다 (수정/삭제 없음). 인덱스:
+  (patient_id, ts, id) -> 환자별 최근 기록 페이지,  (ward, ts) -> 병동 단위 조회
+- append() 는 메모리 대기열에 넣고, batch_size 건이 모이거나 flush_interval_s 가 지나면
+  백그라운드 스레드가 한 트랜잭션(executemany)으로 기록합니다. 조회 전에는 flush 하므로
+  방금 저장한 기록도 바로 보입니다.
+- 기록이 실패하면 (디스크 full, DB lock 등) 트랜잭션을 ROLLBACK 하고 그 배치를 대기열 앞에 되돌려 다음 flush 때
+  다시 씁니다. 백그라운드 스레드는 오류를 로그와 last_error 에 남기고 계속 동작합니다.
+- 페이지 조회는 keyset (ts, id < cursor) 방식이라 기록이 10만 건이어도 첫 페이지/다음 페이지 비용이 같습니다.
+- 세션/프로세스 간 공유: Streamlit 은 st.cache_resource 로 NoteStore 1개를 공유하고,
+  다른 프로세스(배치 import 등)는 같은 DB 파일을 WAL 모드로 동시에 읽고 씁니다.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+NOTES_DB_PATH = Path(__file__).resolve().parent / "nursing_notes.db"
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT NOT NULL,
+    ward       TEXT NOT NULL DEFAULT '',
+    ts         TEXT NOT NULL,
+    writer     TEXT NOT NULL,
+    content    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_patient_ts ON notes (patient_id, ts, id);
+CREATE INDEX IF NOT EXISTS idx_notes_ward_ts ON notes (ward, ts);
+"""
+_COLUMNS = ("id", "patient_id", "ward", "ts", "writer", "content")
+
+
+def connect(path):
+    conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL 에서는 checkpoint 시점에만 fsync
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class NoteStore:
+    """append-only 간호기록 저장소. with 문 또는 close() 로 남은 대기열을 기록하고 닫습니다."""
+
+    def __init__(self, path=None, batch_size=64, flush_interval_s=0.5):
+        self.path = Path(path or os.environ.get("FALLGUARD_NOTES_DB") or NOTES_DB_PATH)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval_s = flush_interval_s
+        self._conn = connect(self.path)
+        self._lock = threading.Lock()      # 연결 공유 보호
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self.last_error = None
+        self._writer = threading.Thread(target=self._run, name="note-store-writer", daemon=True)
+        self._writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        try:
+            self.flush()
+        finally:
+            self._conn.close()
+
+    # ---- 쓰기 ----
+    def append(self, patient_id, content, writer, ts=None, ward=""):
+        """기록 1건을 대기열에 추가 (ts 기본 = 현재 시각, 'YYYY-MM-DD HH:MM[:SS]')."""
+        row = (str(patient_id), ward or "", ts or time.strftime(TS_FORMAT), writer, content)
+        with self._pending_lock:
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def append_many(self, rows):
+        """(patient_id, ward, ts, writer, content) 튜플 여러 건을 한 트랜잭션으로 바로 기록. 실패하면 ROLLBACK 후 예외."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO notes (patient_id, ward, ts, writer, content) VALUES (?, ?, ?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+
+    def flush(self):
+        """대기열 기록. 실패하면 꺼낸 행을 대기열 앞에 되돌리고 (순서 유지) 예외를 다시 올림."""
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if rows:
+            try:
+                self.append_many(rows)
+            except BaseException:
+                with self._pending_lock:
+                    self._pending[:0] = rows
+                raise
+        return len(rows)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as e:  # 다음 주기에 다시 시도 (행은 대기열에 남아 있음)
+                self.last_error = f"{type(e).__name__}: {e}"
+                log.exception("간호기록 기록 실패 (%d건 대기)", len(self._pending))
+
+    # ---- 읽기 ----
+    def _query(self, sql, args):
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [dict(zip(_COLUMNS, r)) for r in rows]
+
+    def recent(self, patient_id, limit=20, before=None):
+        """환자 최근 기록 limit 건 (최신순). before=(ts, id) 커서를 주면 그보다 이전 기록."""
+        if before is None:
+            return self._query(
+                "SELECT id, patient_id, ward, ts, writer, content FROM notes WHERE patient_id = ? "
+                "ORDER BY ts DESC, id DESC LIMIT ?", (str(patient_id), int(limit)))
+        return self._query(
+            "SELECT id, patient_id, ward, ts, writer, content FROM notes WHERE patient_id = ? "
+            "AND (ts, id) < (?, ?) ORDER BY ts DESC, id DESC LIMIT ?",
+            (str(patient_id), before[0], int(before[1]), int(limit)))
+
+    def ward_recent(self, ward, limit=50):
+        return self._query(
+            "SELECT id, patient_id, ward, ts, writer, content FROM notes WHERE ward = ? "
+            "ORDER BY ts DESC LIMIT ?", (ward, int(limit)))
+
+    def count(self, patient_id=None):
+        self.flush()
+        with self._lock:
+            if patient_id is None:
+                return self._conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM notes WHERE patient_id = ?", (str(patient_id),)).fetchone()[0]
+
+
+def cursor_of(note):
+    """페이지 마지막 기록 -> 다음 페이지 조회용 before 커서."""
+    return (note["ts"], note["id"])
@@ -0,0 +1,107 @@
+"""규칙 기반 위험요인 태깅 엔진 (선언적 규칙표 + 벡터화 평가).
+
+규칙표는 dashboard_schema.json 의 "risk_factor_rules" 에서 읽습니다 (없으면 DEFAULT_RULES).
+    {"label": "알부민 저하", "feature": "albumin", "op": "<", "value": 3.0}
+    {"label": "의식/반응 저하", "feature": "내원시 반응", "op": "in", "value": ["verbal response", ...]}
+op: >=, >, <, <=, ==, in (범주형: schema category_options 값 목록)
+
+평가는 scoring.encode_matrix 형식의 (n, 11) 행렬에 대해 op 별로 한 번씩 비교하므로
+병동 전체의 (환자 x 규칙) boolean 요인 행렬을 NumPy 몇 번의 연산으로 얻습니다.
+결측(NaN) 입력은 어떤 규칙도 만족하지 않습니다. 모델과 독립적으로 동작합니다.
+"""
+import json
+
+import numpy as np
+
+import scoring
+
+# 스키마에 규칙표가 없는 예전 아티팩트용 기본값 (PoC 임계값)
+DEFAULT_RULES = [
+    {"label": "고령", "feature": "나이", "op": ">=", "value": 65},
+    {"label": "알부민 저하", "feature": "albumin", "op": "<", "value": 3.0},
+    {"label": "CRP 상승", "feature": "crp", "op": ">=", "value": 5.0},
+    {"label": "저혈압(SBP<100)", "feature": "SBP", "op": "<", "value": 100},
+    {"label": "고혈압(SBP≥180)", "feature": "SBP", "op": ">=", "value": 180},
+    {"label": "빈맥(PR>100)", "feature": "PR", "op": ">", "value": 100},
+    {"label": "빈호흡(RR≥24)", "feature": "RR", "op": ">=", "value": 24},
+    {"label": "발열(BT≥37.8)", "feature": "BT", "op": ">=", "value": 37.8},
+    {"label": "의식/반응 저하", "feature": "내원시 반응", "op": "in",
+     "value": ["verbal response", "painful response", "unresponsive"]},
+    {"label": "중증도 높음(4~5)", "feature": "중증도분류", "op": ">=", "value": 4},
+]
+
+NUMERIC_OPS = {
+    ">=": np.greater_equal,
+    ">": np.greater,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+}
+
+
+class RiskFactorEngine:
+    """규칙표를 (컬럼 인덱스, op, 임계값) 배열로 컴파일해 두고 배치 단위로 평가."""
+
+    def __init__(self, rules, context):
+        self.rules = [dict(r) for r in rules]
+        self.context = context  # encode_matrix 용 (raw_cols, gender_mapping, category_options)
+        self.labels = [r["label"] for r in self.rules]
+        self.features = [r["feature"] for r in self.rules]
+
+        col_pos = {c: j for j, c in enumerate(context['raw_cols'])}
+        cat_index = {c: i for i, c in enumerate(context.get('category_options', {}).get("내원시 반응", []))}
+        self._numeric = {}  # op -> (규칙 번호 배열, 컬럼 배열, 임계값 배열)
+        self._member = []   # (규칙 번호, 컬럼, 허용 code 배열)
+        for i, r in enumerate(self.rules):
+            if r["feature"] not in col_pos:
+                raise ValueError(f"규칙 '{r['label']}' 의 feature '{r['feature']}' 가 raw_input_cols 에 없습니다.")
+            j = col_pos[r["feature"]]
+            if r["op"] == "in":
+                codes = [cat_index[v] for v in r["value"] if v in cat_index]
+                self._member.append((i, j, np.array(codes, dtype=float)))
+            elif r["op"] in NUMERIC_OPS:
+                idx, cols, vals = self._numeric.setdefault(r["op"], ([], [], []))
+                idx.append(i)
+                cols.append(j)
+                vals.append(float(r["value"]))
+            else:
+                raise ValueError(f"지원하지 않는 op: {r['op']!r} (규칙 '{r['label']}')")
+        self._numeric = {op: tuple(np.array(a) for a in v) for op, v in self._numeric.items()}
+
+    @classmethod
+    def from_schema(cls, schema):
+        return cls(schema.get("risk_factor_rules") or DEFAULT_RULES, scoring.schema_context(schema))
+
+    def evaluate(self, X):
+        """(n, 11) 인코딩 행렬 -> (n, n_rules) boolean 요인 행렬."""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        M = np.zeros((len(X), len(self.rules)), dtype=bool)
+        for op, (idx, cols, vals) in self._numeric.items():
+            M[:, idx] = NUMERIC_OPS[op](X[:, cols], vals)  # NaN 비교는 False
+        for i, j, codes in self._member:
+            M[:, i] = np.isin(X[:, j], codes)
+        return M
+
+    def evaluate_records(self, batch):
+        """DataFrame / record array / dict 목록을 인코딩 후 평가."""
+        return self.evaluate(scoring.encode_matrix(batch, self.context))
+
+    def labels_for(self, row_mask):
+        """한 환자 요인 행 -> 규칙표 순서의 라벨 목록."""
+        return [self.labels[i] for i in np.flatnonzero(row_mask)]
+
+    def flagged_features(self, row_mask):
+        """한 환자 요인 행 -> 규칙에 걸린 입력 feature 집합 (차트 강조 등)."""
+        return {self.features[i] for i in np.flatnonzero(row_mask)}
+
+    def summary(self, M):
+        """병동 요인 요약: 라벨 -> 해당 환자 수."""
+        counts = np.asarray(M, dtype=bool).sum(axis=0)
+        return dict(zip(self.labels, counts.tolist()))
+
+
+def load_engine(schema_path=scoring.SCHEMA_PATH):
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        return RiskFactorEngine.from_schema(json.load(f))
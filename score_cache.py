@@ -0,0 +1,117 @@
+"""환자 입력 feature 벡터 기준 점수 캐시 (프로세스 내 세션 공유, LRU + TTL).
+
+Streamlit 은 간호기록 입력, 탭 전환, 알람 확인 버튼 등 모든 상호작용마다 스크립트를 다시 실행하지만
+11개 입력이 그대로라면 점수도 같습니다. 캐시 key 는 (model_version, 인코딩된 feature tuple) 이므로
+입력 표기 차이('M' vs 'm', 3 vs 3.0)는 같은 key 로 모이고, 모델/참조 아티팩트가 바뀌면 자동으로 분리됩니다.
+값은 calculate_risk_score 반환값과 같은 (display_score, raw_score, risk_group, top_percent) 입니다.
+같은 캐시에 ("explain",) 접두 key 로 환자별 기여도 벡터(explain_record)도 함께 둡니다.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import scoring
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_TTL_S = 600.0
+
+
+class ScoreCache:
+    """thread-safe LRU + TTL 캐시. hit/miss/eviction(용량)/expiration(TTL) 카운터 제공."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl_s=DEFAULT_TTL_S, clock=time.monotonic):
+        self.maxsize = int(maxsize)
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self._data = OrderedDict()  # key -> (만료 시각, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, value = item
+                if expires is None or expires > self.clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires = None if self.ttl_s is None else self.clock() + self.ttl_s
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data), "maxsize": self.maxsize, "ttl_s": self.ttl_s,
+            "hits": self.hits, "misses": self.misses,
+            "evictions": self.evictions, "expirations": self.expirations,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def feature_key(model_version, x):
+    """인코딩된 feature 행 -> hash 가능한 key (NaN 은 None 으로 정규화: NaN != NaN 이라 tuple 비교가 깨짐)."""
+    return (model_version,) + tuple(None if math.isnan(v) else v for v in x.tolist())
+
+
+def score_record(record, res, cache=None):
+    """단일 환자 record 스코어링 (캐시 사용). 반환: (display_score, raw_score, risk_group, top_percent|None, sore).
+    sore: {"score": Braden 합계, "group", "top_percent"|None} (res['sore'] 가 없으면 None)
+    res['validator'] 가 있으면 먼저 검증하고, 오류면 validation.InputError (스코어링/캐시하지 않음)."""
+    validator = res.get('validator')
+    x = validator.encode_record(record)[None, :] if validator is not None else scoring.encode_matrix([record], res)
+    key = feature_key(res.get('model_version'), x[0])
+    if cache is not None:
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    out = scoring.score_matrix(x, res)
+    tp = float(out["top_percent"][0])
+    sore_tp = float(out["sore_top_percent"][0])
+    sore = None if out["sore_group"][0] is None else {
+        "score": int(out["sore_score"][0]), "group": out["sore_group"][0], "top_percent": None if math.isnan(sore_tp) else sore_tp}
+    value = (int(out["display_score"][0]), float(out["raw_score"][0]), out["risk_group"][0],
+             None if math.isnan(tp) else tp, sore)
+    if cache is not None:
+        cache.put(key, value)
+    return value
+
+
+def explain_record(record, res, cache=None):
+    """단일 환자 기여도 (raw_cols 순서 (11,) 배열, logit 단위). explainer 가 없으면 None."""
+    explainer = res.get('explainer')
+    if explainer is None:
+        return None
+    x = scoring.encode_matrix([record], res)
+    key = ("explain",) + feature_key(res.get('model_version'), x[0])
+    if cache is not None:
+        value = cache.get(key)
+        if value is not None:
+            return value
+    value = explainer.contributions(x)[0]
+    value.setflags(write=False)  # 캐시 공유 값
+    if cache is not None:
+        cache.put(key, value)
+    return value
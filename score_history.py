@@ -0,0 +1,355 @@
+"""환자별 낙상 점수 이력 (컬럼형 ring buffer + 근무조/일 단위 min/max/last 집계 + 디스크 spill).
+
+- 원시 점수는 환자당 ring_capacity 개 (ts, raw) 만 메모리에 유지하고, 밀려나는 점은 spill_dir 의
+  환자별 append-only 바이너리 파일로 옮깁니다. 집계 bucket 도 같은 방식(shift/day ring + spill).
+  -> 재원 기간과 무관하게 환자당 메모리는 고정 (PatientHistory.nbytes).
+- 점수가 들어올 때마다 해당 근무조/일 bucket 의 min/max/last/count 를 O(1) 로 갱신하므로
+  병동 추이 차트는 원시 점이 아니라 미리 집계된 bucket 배열에서 바로 그립니다.
+- 근무조 경계: Day 07-15, Evening 15-23, Night 23-07 (현지 시각, Night 는 시작한 날짜 소속).
+  shift_of / shift_start / next_shift_boundary 는 인수인계 스케줄러에서도 그대로 씁니다.
+- 퇴원 환자 정리: evict(퇴원 ID) 또는 evict_missing(현재 재원 명단) -> 명단에 없고 마지막 점수가 discharge_ttl_s
+  (기본 24시간) 보다 오래된 환자를 메모리와 spill 파일에서 지웁니다 (census refresh 가 sweep_interval_s 마다 호출).
+- spill 파일 이름은 patient_id 가 [0-9A-Za-z_-] 로만 되어 있으면 그대로, 아니면 "=" + sha1 (경로 문자 차단).
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+SHIFTS = (("Day", 7), ("Evening", 15), ("Night", 23))
+SHIFT_NAMES = [name for name, _ in SHIFTS]
+SHIFT_HOURS = 8
+UTC_OFFSET_S = int(os.environ.get("FALLGUARD_UTC_OFFSET_S", -time.timezone))  # 기본: 시스템 로컬 (KST = 32400)
+
+RESOLUTIONS = {
+    "shift": (SHIFT_HOURS * 3600, SHIFTS[0][1] * 3600),  # (bucket 길이, 현지 자정 기준 시작 offset)
+    "day": (86400, 0),
+}
+DISCHARGE_TTL_S = 24 * 3600
+SWEEP_INTERVAL_S = 300.0
+_SAFE_ID = re.compile(r"[0-9A-Za-z_-]{1,64}")
+RAW_DTYPE = np.dtype([("ts", "<f8"), ("raw", "<f4")])
+BUCKET_DTYPE = np.dtype([("bucket", "<i8"), ("min", "<f4"), ("max", "<f4"), ("last", "<f4"), ("count", "<i4")])
+
+
+    # --------------------------------------------------------------------------------
+# 1. 근무조 / bucket 시각 계산
+    # --------------------------------------------------------------------------------
+def bucket_ids(ts, resolution):
+    """epoch 초 (스칼라/배열) -> bucket 번호 (현지 시각 기준)."""
+    width, offset = RESOLUTIONS[resolution]
+    return np.floor_divide(np.asarray(ts, dtype=np.float64) + UTC_OFFSET_S - offset, width).astype(np.int64)
+
+
+def bucket_start(bucket, resolution):
+    """bucket 번호 -> 시작 epoch 초."""
+    width, offset = RESOLUTIONS[resolution]
+    return np.asarray(bucket, dtype=np.int64) * width + offset - UTC_OFFSET_S
+
+
+def shift_of(ts=None):
+    """epoch 초 -> (근무조 이름, 근무조 시작 epoch 초)."""
+    ts = time.time() if ts is None else ts
+    b = int(bucket_ids(ts, "shift"))
+    return SHIFT_NAMES[b % len(SHIFTS)], int(bucket_start(b, "shift"))
+
+
+def shift_start(ts=None):
+    return shift_of(ts)[1]
+
+
+def next_shift_boundary(ts=None):
+    """다음 근무조 시작 epoch 초."""
+    return shift_start(ts) + SHIFT_HOURS * 3600
+
+
+def bucket_label(start_ts, resolution):
+    lt = time.gmtime(start_ts + UTC_OFFSET_S)
+    if resolution == "day":
+        return time.strftime("%m-%d", lt)
+    return time.strftime("%m-%d", lt) + " " + SHIFT_NAMES[int(bucket_ids(start_ts, "shift")) % len(SHIFTS)][0]
+
+
+    # --------------------------------------------------------------------------------
+# 2. 환자별 이력
+    # --------------------------------------------------------------------------------
+def spill_name(patient_id):
+    """patient_id -> spill 파일 이름 (경로 구분자/상위 경로가 들어갈 수 없는 이름)."""
+    pid = str(patient_id)
+    if _SAFE_ID.fullmatch(pid):
+        return pid
+    return "=" + hashlib.sha1(pid.encode("utf-8")).hexdigest()
+
+
+class _Ring:
+    """고정 길이 structured ndarray ring.
+
+    가득 차면 spill 콜백이 있을 때 가장 오래된 1/4 을 한 번에 넘기고(파일 append 1회) 자리를 비우며,
+    없으면 가장 오래된 레코드를 덮어씁니다.
+    """
+
+    def __init__(self, dtype, capacity, spill=None):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0  # 다음 기록 위치
+        self.spill = spill
+
+    def slots(self, k):
+        """가장 오래된 것부터 k 개 레코드의 배열 위치."""
+        return (self.head - self.size + np.arange(k)) % self.capacity
+
+    def append(self, record):
+        if self.size == self.capacity and self.spill is not None:
+            k = max(1, self.capacity // 4)
+            self.spill(self.data[self.slots(k)])
+            self.size -= k
+        self.data[self.head] = record
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def ordered(self):
+        return self.data[self.slots(self.size)]
+
+
+class PatientHistory:
+    def __init__(self, patient_id, ring_capacity=512, bucket_capacity=None, spill_dir=None, min_interval_s=0.0):
+        self.patient_id = str(patient_id)
+        self.min_interval_s = min_interval_s
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        bucket_capacity = bucket_capacity or {"shift": 3 * 7 * 8, "day": 120}  # 8주 / 약 4개월
+        self.raw = _Ring(RAW_DTYPE, ring_capacity, self._spiller("raw"))
+        self.buckets = {r: _Ring(BUCKET_DTYPE, max(1, bucket_capacity[r] - 1), self._spiller(r)) for r in RESOLUTIONS}
+        # 진행 중인 bucket 은 [bucket, min, max, last, count] Python 값으로 갱신하고 닫힐 때 ring 에 기록
+        self._open = dict.fromkeys(RESOLUTIONS)
+        self._last = None  # (ts, raw) 직전 점수
+        self.dropped = 0  # ring 범위보다 오래된 늦은 도착 점 (집계 반영 못 함)
+
+    def _spill_path(self, kind):
+        return self.spill_dir / f"{spill_name(self.patient_id)}.{kind}.bin"
+
+    def remove_spill(self):
+        if self.spill_dir is not None:
+            for kind in ("raw", *RESOLUTIONS):
+                self._spill_path(kind).unlink(missing_ok=True)
+
+    def _spiller(self, kind):
+        if self.spill_dir is None:
+            return None
+
+        def spill(records):
+            with open(self._spill_path(kind), "ab") as f:
+                records.tofile(f)
+        return spill
+
+    @property
+    def last_ts(self):
+        return self._last[0] if self._last is not None else np.nan
+
+    def record(self, ts, raw, bucket_of=None):
+        """점수 1건 기록. 직전 점수와 같고 min_interval_s 이내면 건너뜀 (rerun 마다 같은 점수 반복 방지).
+        bucket_of: {resolution: bucket 번호} (일괄 기록 시 미리 벡터화해 계산한 값)."""
+        late = self._last is not None and ts < self._last[0]
+        if not late:
+            if self._last is not None and self._last[1] == raw and ts - self._last[0] < self.min_interval_s:
+                return False
+            self._last = (ts, raw)
+        self.raw.append((ts, raw))
+        for resolution in RESOLUTIONS:
+            b = bucket_of[resolution] if bucket_of else int(bucket_ids(ts, resolution))
+            self._update_bucket(resolution, b, raw, late)
+        return True
+
+    def _update_bucket(self, resolution, b, raw, late=False):
+        cur = self._open[resolution]
+        if cur is None or b > cur[0]:
+            if cur is not None:
+                self.buckets[resolution].append(tuple(cur))
+            self._open[resolution] = [b, raw, raw, raw, 1]
+        elif b == cur[0]:
+            cur[1] = min(cur[1], raw)
+            cur[2] = max(cur[2], raw)
+            if not late:
+                cur[3] = raw
+            cur[4] += 1
+        else:  # 늦게 도착한 점: ring 안에 bucket 이 있으면 min/max/count 만 반영
+            ring = self.buckets[resolution]
+            pos = ring.slots(ring.size)
+            hit = pos[ring.data["bucket"][pos] == b]
+            if len(hit):
+                old = ring.data[hit[0]]
+                old["min"] = min(old["min"], raw)
+                old["max"] = max(old["max"], raw)
+                old["count"] += 1
+            else:
+                self.dropped += 1
+
+    def bucket_last(self, resolution, b):
+        """bucket b 의 last 점수 (진행 중 bucket 또는 ring 안). 없으면 NaN."""
+        cur = self._open[resolution]
+        if cur is not None and cur[0] == b:
+            return float(cur[3])
+        ring = self.buckets[resolution]
+        pos = ring.slots(ring.size)
+        hit = pos[ring.data["bucket"][pos] == b]
+        return float(ring.data["last"][hit[-1]]) if len(hit) else np.nan
+
+    def points(self, include_spilled=False):
+        pts = self.raw.ordered()
+        if include_spilled:
+            pts = np.concatenate([self._read_spill("raw", RAW_DTYPE), pts])
+        return pts
+
+    def bucket_array(self, resolution, include_spilled=False):
+        arr = self.buckets[resolution].ordered()
+        if self._open[resolution] is not None:
+            arr = np.concatenate([arr, np.array([tuple(self._open[resolution])], dtype=BUCKET_DTYPE)])
+        if include_spilled:
+            arr = np.concatenate([self._read_spill(resolution, BUCKET_DTYPE), arr])
+        return arr
+
+    def _read_spill(self, kind, dtype):
+        if self.spill_dir is None or not self._spill_path(kind).exists():
+            return np.empty(0, dtype=dtype)
+        return np.fromfile(self._spill_path(kind), dtype=dtype)
+
+    def nbytes(self):
+        return self.raw.data.nbytes + sum(r.data.nbytes for r in self.buckets.values())
+
+
+    # --------------------------------------------------------------------------------
+# 3. 병동 단위 저장소
+    # --------------------------------------------------------------------------------
+class ScoreHistoryStore:
+    """환자 ID -> PatientHistory (thread-safe). spill_dir 가 없으면 ring 밖 데이터는 버림."""
+
+    def __init__(self, ring_capacity=512, bucket_capacity=None, spill_dir=None, min_interval_s=60.0,
+                 discharge_ttl_s=DISCHARGE_TTL_S, sweep_interval_s=SWEEP_INTERVAL_S):
+        self.ring_capacity = ring_capacity
+        self.bucket_capacity = bucket_capacity
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.min_interval_s = min_interval_s
+        self.discharge_ttl_s = discharge_ttl_s
+        self.sweep_interval_s = sweep_interval_s
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.patients = {}
+        self.evicted = 0
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def _history(self, patient_id):
+        h = self.patients.get(str(patient_id))
+        if h is None:
+            h = self.patients[str(patient_id)] = PatientHistory(
+                patient_id, self.ring_capacity, self.bucket_capacity, self.spill_dir, self.min_interval_s)
+        return h
+
+    def record(self, patient_id, raw, ts=None):
+        with self._lock:
+            return self._history(patient_id).record(time.time() if ts is None else ts, float(raw))
+
+    def record_many(self, patient_ids, raw_scores, ts=None):
+        """여러 환자 점수 일괄 기록 (census refresh / 스트리밍 flush 결과). 기록된 건수 반환."""
+        ts = np.broadcast_to(np.asarray(time.time() if ts is None else ts, dtype=np.float64), (len(patient_ids),))
+        ids = {r: bucket_ids(ts, r).tolist() for r in RESOLUTIONS}
+        recorded = 0
+        with self._lock:
+            for i, (p, t, r) in enumerate(zip(patient_ids, ts.tolist(), np.asarray(raw_scores, dtype=float).tolist())):
+                recorded += self._history(p).record(t, r, {res: ids[res][i] for res in RESOLUTIONS})
+        return recorded
+
+    def evict(self, patient_ids):
+        """퇴원 환자 이력 삭제 (메모리 + spill 파일). 반환: 지운 환자 수."""
+        with self._lock:
+            gone = [self.patients.pop(str(p)) for p in patient_ids if str(p) in self.patients]
+            self.evicted += len(gone)
+        for h in gone:
+            h.remove_spill()
+        return len(gone)
+
+    def evict_missing(self, present_ids, now=None, force=False):
+        """present_ids (현재 재원 명단)에 없고 마지막 점수가 discharge_ttl_s 보다 오래된 환자 삭제.
+
+        sweep_interval_s 안에 다시 부르면 건너뜀 (force 면 바로). 반환: 지운 환자 수.
+        """
+        now = time.time() if now is None else now
+        if not force and now < self._next_sweep:
+            return 0
+        self._next_sweep = now + self.sweep_interval_s
+        present = {str(p) for p in present_ids}
+        with self._lock:
+            stale = [p for p, h in self.patients.items()
+                     if p not in present and not now - h.last_ts <= self.discharge_ttl_s]  # 기록 없음 (NaN) 도 삭제
+        return self.evict(stale)
+
+    def __contains__(self, patient_id):
+        return str(patient_id) in self.patients
+
+    def points(self, patient_id, include_spilled=False):
+        with self._lock:
+            h = self.patients.get(str(patient_id))
+            return h.points(include_spilled) if h else np.empty(0, dtype=RAW_DTYPE)
+
+    def buckets(self, patient_id, resolution="shift", include_spilled=False):
+        with self._lock:
+            h = self.patients.get(str(patient_id))
+            return h.bucket_array(resolution, include_spilled) if h else np.empty(0, dtype=BUCKET_DTYPE)
+
+    def bucket_last(self, patient_ids, bucket, resolution="shift"):
+        """환자별 bucket 의 last 점수 (n,) (기록 없으면 NaN). 인수인계 보고서의 직전 근무조 대비 변화 계산용."""
+        out = np.full(len(patient_ids), np.nan)
+        with self._lock:
+            for i, p in enumerate(patient_ids):
+                h = self.patients.get(str(p))
+                if h is not None:
+                    out[i] = h.bucket_last(resolution, bucket)
+        return out
+
+    def trend_frame(self, patient_id, resolution="shift", since=None):
+        """환자 추이 차트용 DataFrame: start, label, min, max, last, count (raw 점수)."""
+        arr = self.buckets(patient_id, resolution, include_spilled=since is not None)
+        return _bucket_frame(arr, resolution, since)
+
+    def ward_trend(self, patient_ids, resolution="shift", since=None):
+        """병동 추이: bucket 별 환자 last 평균, max 최대, 점수가 있는 환자 수 (환자별 집계 배열만 사용)."""
+        with self._lock:
+            arrs = [self.patients[str(p)].bucket_array(resolution) for p in patient_ids if str(p) in self.patients]
+        if not arrs:
+            return _bucket_frame(np.empty(0, dtype=BUCKET_DTYPE), resolution, since).assign(patients=0)
+        allb = np.concatenate(arrs)
+        if since is not None:
+            allb = allb[allb["bucket"] >= bucket_ids(since, resolution)]
+        uniq, inv = np.unique(allb["bucket"], return_inverse=True)
+        n = np.bincount(inv, minlength=len(uniq))
+        mean_last = np.bincount(inv, weights=allb["last"], minlength=len(uniq)) / np.maximum(n, 1)
+        max_max = np.full(len(uniq), -np.inf)
+        np.maximum.at(max_max, inv, allb["max"])
+        starts = bucket_start(uniq, resolution)
+        import pandas as pd
+        return pd.DataFrame({
+            "start": pd.to_datetime(starts + UTC_OFFSET_S, unit="s"),
+            "label": [bucket_label(s, resolution) for s in starts],
+            "mean_last": mean_last, "max": max_max, "patients": n,
+        })
+
+    def nbytes(self):
+        with self._lock:
+            return sum(h.nbytes() for h in self.patients.values())
+
+
+def _bucket_frame(arr, resolution, since=None):
+    if since is not None:
+        arr = arr[arr["bucket"] >= bucket_ids(since, resolution)]
+    starts = bucket_start(arr["bucket"], resolution)
+    import pandas as pd  # 차트용 frame 을 만들 때만 (기록 경로는 pandas 불필요)
+    return pd.DataFrame({
+        "start": pd.to_datetime(starts + UTC_OFFSET_S, unit="s"),  # 현지 시각 (naive)
+        "label": [bucket_label(s, resolution) for s in starts],
+        "min": arr["min"].astype(float), "max": arr["max"].astype(float),
+        "last": arr["last"].astype(float), "count": arr["count"].astype(int),
+    })
@@ -0,0 +1,185 @@
+"""학습 점수 분포(train_score_ref.npz) 기준 참조: mmap 공유 로딩 + 압축 percentile index.
+
+train_score_ref.npz 는 ~337k 개 float64 점수(약 2.7 MB)를 담고 있어 프로세스마다 읽고 복사하면
+워커 수만큼 메모리를 차지합니다. 여기서는 두 가지 파생 아티팩트를 만듭니다.
+
+1) train_score_ref.npy        : 정렬된 점수 float64 (비압축). np.load(mmap_mode='r') 로 열면
+                                 OS 페이지 캐시를 모든 프로세스가 공유하고, 필요한 페이지만 읽습니다.
+2) train_score_ref_sketch.npz : 분위 knot (기본 1024개, 16 KB) + cutoff.
+                                 knot 사이 선형보간으로 '상위 %' 를 O(log k) 로 계산합니다.
+
+Sketch 오차: knot i 의 점수 s_i 와 경험적 CDF F(s_i) (= searchsorted(right)/n) 를 저장하므로
+s_i <= x < s_{i+1} 인 x 의 참값/보간값 모두 [F(s_i), F(s_{i+1})] 구간에 있습니다.
+따라서 최대 오차 <= max_i (F(s_{i+1}) - F(s_i)) ~= 100/(k-1) %p (동점 질량이 크면 그만큼 증가)
+이며, 빌드 시 모든 학습 점수에서 실제 최대 오차를 측정해 max_error_pct 로 함께 저장합니다.
+(k=1024 -> 약 0.1 %p)
+
+파생 파일은 원본 npz 의 (크기, mtime) 이 바뀌면 다시 만들어집니다.
+배포 이미지에서는 `python score_reference.py` 로 미리 만들어 두는 것을 권장합니다.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent
+REF_PATH = BASE_DIR / "train_score_ref.npz"
+REF_NPY_PATH = BASE_DIR / "train_score_ref.npy"
+SKETCH_PATH = BASE_DIR / "train_score_ref_sketch.npz"
+
+DEFAULT_KNOTS = 1024
+
+
+def derived_paths(ref_path=REF_PATH):
+    """원본 npz 옆에 만들 (npy, sketch npz) 경로."""
+    ref_path = Path(ref_path)
+    return ref_path.with_suffix(".npy"), ref_path.with_name(ref_path.stem + "_sketch.npz")
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+def _atomic_save(path, writer):
+    """같은 디렉터리 임시파일에 쓴 뒤 os.replace (여러 프로세스가 동시에 만들어도 안전)."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer(f)
+        os.chmod(tmp, 0o644)  # mkstemp 기본 0600 -> 다른 워커 계정도 읽을 수 있게
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def read_npz_reference(ref_path=REF_PATH):
+    """원본 npz 에서 (정렬 점수, cutoff_top20, cutoff_top40) 읽기. cutoff 미저장 시 분위수로 계산."""
+    with np.load(ref_path, allow_pickle=False) as ref:
+        if 'train_scores_sorted' not in ref.files:
+            raise ValueError("train_score_ref.npz 안에 'train_scores_sorted'가 없습니다.")
+        scores_sorted = np.asarray(ref['train_scores_sorted'], dtype=float)
+        cut20 = float(ref['cutoff_top20']) if 'cutoff_top20' in ref.files else float(np.quantile(scores_sorted, 0.80))
+        cut40 = float(ref['cutoff_top40']) if 'cutoff_top40' in ref.files else float(np.quantile(scores_sorted, 0.60))
+    return scores_sorted, cut20, cut40
+
+
+    # --------------------------------------------------------------------------------
+# 1. Percentile sketch (분위 knot + 선형보간)
+    # --------------------------------------------------------------------------------
+class PercentileSketch:
+    """정렬된 학습 점수의 분위 knot 로 '상위 %' 를 근사하는 압축 index."""
+
+    def __init__(self, knot_scores, knot_cdf, max_error_pct=np.nan):
+        self.knot_scores = np.asarray(knot_scores, dtype=float)
+        self.knot_cdf = np.asarray(knot_cdf, dtype=float)
+        self.max_error_pct = float(max_error_pct)
+
+    @classmethod
+    def build(cls, scores_sorted, k=DEFAULT_KNOTS):
+        scores_sorted = np.asarray(scores_sorted, dtype=float)
+        n = len(scores_sorted)
+        if n == 0:
+            raise ValueError("빈 점수 분포로 sketch 를 만들 수 없습니다.")
+        pos = np.unique(np.round(np.linspace(0, n - 1, min(k, n))).astype(np.intp))
+        knot_scores = np.unique(scores_sorted[pos])  # 동점 knot 제거 (np.interp 는 증가 xp 필요)
+        knot_cdf = np.searchsorted(scores_sorted, knot_scores, side="right") / n
+        sketch = cls(knot_scores, knot_cdf)
+        sketch.max_error_pct = sketch.measure_error(scores_sorted)
+        return sketch
+
+    def cdf(self, raw_scores):
+        """경험적 CDF 근사 (0~1). 최소 knot 미만 0, 최대 knot 이상 1."""
+        return np.interp(np.asarray(raw_scores, dtype=float), self.knot_scores, self.knot_cdf, left=0.0, right=1.0)
+
+    def top_percent(self, raw_scores):
+        return np.clip(100.0 - self.cdf(raw_scores) * 100.0, 0.0, 100.0)
+
+    def measure_error(self, scores_sorted):
+        """학습 점수 전체(+ 인접 점수 중점)에서 정확한 상위 % 대비 최대 절대오차 (%p)."""
+        scores_sorted = np.asarray(scores_sorted, dtype=float)
+        probes = np.concatenate([scores_sorted, (scores_sorted[1:] + scores_sorted[:-1]) / 2])
+        exact = np.searchsorted(scores_sorted, probes, side="right") / len(scores_sorted)
+        return float(np.max(np.abs(self.cdf(probes) - exact)) * 100.0)
+
+    @property
+    def nbytes(self):
+        return self.knot_scores.nbytes + self.knot_cdf.nbytes
+
+
+    # --------------------------------------------------------------------------------
+# 2. 파생 아티팩트 생성/로딩
+    # --------------------------------------------------------------------------------
+def export_reference(ref_path=REF_PATH, npy_path=None, sketch_path=None, k=DEFAULT_KNOTS):
+    """npz -> (비압축 npy, sketch npz). 만든 PercentileSketch 반환."""
+    default_npy, default_sketch = derived_paths(ref_path)
+    npy_path, sketch_path = npy_path or default_npy, sketch_path or default_sketch
+    scores_sorted, cut20, cut40 = read_npz_reference(ref_path)
+    stamp = _source_stamp(ref_path)
+    sketch = PercentileSketch.build(scores_sorted, k=k)
+    _atomic_save(npy_path, lambda f: np.save(f, np.ascontiguousarray(scores_sorted)))
+    _atomic_save(sketch_path, lambda f: np.savez(
+        f, knot_scores=sketch.knot_scores, knot_cdf=sketch.knot_cdf,
+        max_error_pct=sketch.max_error_pct, cutoff_top20=cut20, cutoff_top40=cut40,
+        n=len(scores_sorted), source_stamp=stamp,
+    ))
+    return sketch
+
+
+def _load_sketch_file(sketch_path):
+    with np.load(sketch_path, allow_pickle=False) as z:
+        meta = {k: z[k] for k in z.files}
+    sketch = PercentileSketch(meta['knot_scores'], meta['knot_cdf'], float(meta['max_error_pct']))
+    return sketch, float(meta['cutoff_top20']), float(meta['cutoff_top40']), meta['source_stamp']
+
+
+def load_reference(ref_path=REF_PATH, npy_path=None, sketch_path=None, mmap=True, exact=True):
+    """학습 점수 참조 로딩.
+
+    반환: dict(train_scores_sorted, cutoff_top20, cutoff_top40, percentile_sketch)
+    - exact=True : train_scores_sorted 를 npy mmap(읽기 전용, 프로세스 간 공유)으로 제공
+    - exact=False: train_scores_sorted 없이 sketch(수 KB)만 제공
+    파생 파일이 없거나 원본보다 오래됐으면 만들고, 디렉터리에 쓸 수 없으면 npz 를 메모리로 읽습니다.
+    """
+    default_npy, default_sketch = derived_paths(ref_path)
+    npy_path, sketch_path = npy_path or default_npy, sketch_path or default_sketch
+    stamp = _source_stamp(ref_path)
+    try:
+        sketch, cut20, cut40, built_from = _load_sketch_file(sketch_path)
+        fresh = np.array_equal(built_from, stamp) and Path(npy_path).exists()
+    except (OSError, KeyError, ValueError):
+        fresh = False
+
+    if not fresh:
+        try:
+            export_reference(ref_path, npy_path, sketch_path)
+            sketch, cut20, cut40, _ = _load_sketch_file(sketch_path)
+        except OSError:
+            # 읽기 전용 배포 등: 파생 파일 없이 메모리 로딩
+            scores_sorted, cut20, cut40 = read_npz_reference(ref_path)
+            return {
+                'train_scores_sorted': scores_sorted if exact else None,
+                'cutoff_top20': cut20,
+                'cutoff_top40': cut40,
+                'percentile_sketch': PercentileSketch.build(scores_sorted),
+            }
+
+    scores_sorted = None
+    if exact:
+        scores_sorted = np.load(npy_path, mmap_mode='r' if mmap else None)
+    return {
+        'train_scores_sorted': scores_sorted,
+        'cutoff_top20': cut20,
+        'cutoff_top40': cut40,
+        'percentile_sketch': sketch,
+    }
+
+
+if __name__ == "__main__":
+    built = export_reference()
+    print(f"{REF_NPY_PATH.name}, {SKETCH_PATH.name} 생성: knots={len(built.knot_scores)} "
+          f"({built.nbytes / 1024:.1f} KB), max_error={built.max_error_pct:.4f} %p")
@@ -0,0 +1,471 @@
+"""낙상 위험도 배치 스코어링 엔진 (Streamlit 비의존).
+
+대시보드(`fall down.app.py`)의 단일 환자 점수 계산과 병동 단위 일괄 스코어링이
+같은 입력 구성 / 위험군 판정 / 학습분포 상위 % 계산 로직을 공유하도록 분리한 모듈입니다.
+pandas 는 DataFrame 입력/출력 경로에서만 import 합니다 (dict/행렬 경로만 쓰는 워커의 cold start 단축).
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+import explain
+import instrumentation
+import live_cutoffs
+import model_bundle
+import score_reference
+from compiled_scorer import CompiledScorer
+
+BASE_DIR = Path(__file__).resolve().parent
+MODEL_PATH = BASE_DIR / "risk_score_model.joblib"
+SCHEMA_PATH = BASE_DIR / "dashboard_schema.json"
+REF_PATH = Path(os.environ.get("FALLGUARD_REF_PATH") or BASE_DIR / "train_score_ref.npz")  # live 재보정 참조로 교체 가능
+BUNDLE_PATH = Path(os.environ.get("FALLGUARD_BUNDLE") or model_bundle.BUNDLE_PATH)
+
+RISK_HIGH = "고위험"
+RISK_MID = "중위험"
+RISK_LOW = "저위험"
+RISK_INVALID = "입력오류"  # 입력 검증 실패 행 (validation): 스코어링하지 않음
+
+# 내원시 반응: 빈 값/nan/none 문자열은 결측으로 취급 (모델 imputer가 최빈값으로 채움)
+MISSING_TOKENS = ("", "nan", "none")
+
+RESULT_COLUMNS = ["raw_score", "display_score", "risk_group", "top_percent", "input_error",
+                  "sore_score", "sore_group", "sore_top_percent"]
+
+
+    # --------------------------------------------------------------------------------
+# 1. 리소스 로딩
+    # --------------------------------------------------------------------------------
+def load_resources(model_path=MODEL_PATH, schema_path=SCHEMA_PATH, ref_path=REF_PATH, percentile_index=None,
+                   bundle_path=BUNDLE_PATH):
+    """모델 + schema + train 점수 기준 cutoff 로딩. 실패 시 예외를 그대로 올립니다.
+
+    bundle_path 에 단일 번들(model_bundle)이 있고 원본과 일치하면 sklearn/joblib 없이 번들에서 읽습니다
+    (resources['model'] 은 None, resources['source'] == "bundle"). 번들이 없거나 원본보다 오래됐으면
+    원본 아티팩트에서 읽습니다 (오래된 경우 이유를 resources['bundle_status'] 에 남김). 번들 손상은 BundleError.
+    percentile_index: "exact" (정렬 점수 전체 mmap + searchsorted) 또는
+    "sketch" (분위 knot 보간, 수 KB). 기본값은 환경변수 FALLGUARD_PERCENTILE_INDEX, 없으면 "exact".
+    """
+    if percentile_index is None:
+        percentile_index = os.environ.get("FALLGUARD_PERCENTILE_INDEX", "exact")
+    if percentile_index not in ("exact", "sketch"):
+        raise ValueError(f"percentile_index 는 'exact' 또는 'sketch' 여야 합니다: {percentile_index!r}")
+
+    resources = None
+    bundle_status = None
+    if bundle_path is not None and Path(bundle_path).exists():
+        bundle = model_bundle.load_bundle(bundle_path)
+        sources = {"model_path": model_path, "schema_path": schema_path}
+        if percentile_index == "sketch":  # exact 는 참조 파일을 직접 읽으므로 번들 분위와 무관
+            sources["ref_path"] = ref_path
+        stale = model_bundle.stale_sources(bundle['meta'], **sources)
+        if stale:
+            bundle_status = f"번들이 원본과 다름 ({', '.join(stale)}) -> 원본 아티팩트에서 로딩"
+        else:
+            resources = _bundle_resources(bundle, bundle_path, ref_path, percentile_index)
+    if resources is None:
+        resources = _artifact_resources(model_path, schema_path, ref_path, percentile_index)
+    resources['bundle_status'] = bundle_status
+
+    # schema 구성요소
+    resources.update(schema_context(resources['schema']))
+
+    # 입력 검증 (schema 범위/범주). score_arrays / score_matrix 가 오류 행을 격리
+    import validation
+    resources['validator'] = validation.InputValidator.from_schema(resources['schema'])
+
+    # 욕창 위험도 (Braden 근사 규칙 점수, 같은 인코딩 행렬에서 계산) + 자체 cutoff / 참조 분포
+    import sore_risk
+    resources['sore'] = sore_risk.SoreScorer.from_schema(resources['schema'])
+
+    # 위험요인 규칙 엔진 (schema risk_factor_rules)
+    import risk_factors
+    resources['risk_factors'] = risk_factors.RiskFactorEngine.from_schema(resources['schema'])
+
+    # 환자별 기여도 설명 (compiled 파라미터 기반. 없으면 설명 불가)
+    resources['explainer'] = explain.Explainer(resources['compiled'], resources['raw_cols']) if resources['compiled'] else None
+
+    # 운영 점수 분위 sketch (score_results 가 모든 점수를 넣음 -> cutoff 재보정 / drift)
+    resources['live_sketch'] = live_cutoffs.KLLSketch()
+    return resources
+
+
+def _artifact_resources(model_path, schema_path, ref_path, percentile_index):
+    """원본 아티팩트 (joblib 모델 + schema json + 참조 npz) 로딩."""
+    import joblib
+
+    resources = {'source': "joblib"}
+
+    # 1) 모델 (+ 캐시 key 등에 쓰는 아티팩트 버전)
+    resources['model'] = joblib.load(model_path)
+    resources['model_version'] = artifact_version(model_path, ref_path)
+
+    # 2) schema
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        resources['schema'] = json.load(f)
+
+    # 3) train score reference (cutoff). npy mmap 공유 / sketch index (score_reference 참고)
+    resources.update(score_reference.load_reference(ref_path, exact=(percentile_index == "exact")))
+
+    # 4) compiled scorer (sklearn 파이프라인 우회). 구조 미지원/정합성 실패 시 predict_proba 사용
+    context = schema_context(resources['schema'])
+    resources['compiled'] = None
+    resources['compiled_error'] = None
+    try:
+        compiled = CompiledScorer.from_pipeline(resources['model'], _reaction_categories(context), context['raw_cols'])
+        verify_parity(compiled, {**resources, **context})
+        resources['compiled'] = compiled
+    except Exception as e:
+        resources['compiled_error'] = f"{type(e).__name__}: {e}"
+    return resources
+
+
+def _bundle_resources(bundle, bundle_path, ref_path, percentile_index):
+    """번들 로딩 결과 -> resources. exact 이고 참조 파일이 있으면 참조는 파일(mmap)에서 읽습니다."""
+    meta = bundle['meta']
+    resources = {'source': "bundle", 'model': None, 'schema': meta['schema'],
+                 'compiled': bundle['compiled'], 'compiled_error': None}
+    if percentile_index == "exact" and Path(ref_path).exists():
+        resources.update(score_reference.load_reference(ref_path, exact=True))
+        resources['model_version'] = artifact_version(bundle_path, ref_path)
+    else:
+        resources.update({
+            'train_scores_sorted': None,
+            'percentile_sketch': bundle['percentile_sketch'],
+            'cutoff_top20': float(meta['cutoff_top20']),
+            'cutoff_top40': float(meta['cutoff_top40']),
+        })
+        resources['model_version'] = bundle['checksum'][:12]
+    return resources
+
+
+def artifact_version(*paths):
+    """아티팩트 파일 내용 sha256 앞 12자리 (모델/참조가 바뀌면 달라짐)."""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+    return h.hexdigest()[:12]
+
+
+def schema_context(schema):
+    """schema -> 입력 구성에 필요한 구성요소 (raw_cols, category_options, gender_mapping)."""
+    return {
+        'raw_cols': schema.get('raw_input_cols', []),
+        'category_options': schema.get('category_options', {}),
+        'gender_mapping': schema.get('gender_mapping', {'M': 1, 'F': 0}),
+    }
+
+
+    # --------------------------------------------------------------------------------
+# 2. 입력 구성
+    # --------------------------------------------------------------------------------
+def session_record(pt_static, state):
+    """환자 기본정보 + 시뮬레이션 입력(session_state 유사 mapping)으로 11개 raw feature dict 구성."""
+    return {
+        "성별": pt_static.get("gender", "M"),
+        "나이": float(pt_static.get("age", np.nan)),
+        "중증도분류": float(state.get("sim_severity", np.nan)),
+        "SBP": float(state.get("sim_sbp", np.nan)),
+        "DBP": float(state.get("sim_dbp", np.nan)),
+        "RR": float(state.get("sim_rr", np.nan)),
+        "PR": float(state.get("sim_pr", np.nan)),
+        "BT": float(state.get("sim_bt", np.nan)),
+        "내원시 반응": state.get("sim_reaction", ""),
+        "albumin": float(state.get("sim_alb", np.nan)),
+        "crp": float(state.get("sim_crp", np.nan)),
+    }
+
+
+def _to_frame(batch, raw_cols):
+    """DataFrame / NumPy record array / dict iterable 을 raw_cols 순서의 DataFrame으로 변환."""
+    import pandas as pd
+    if isinstance(batch, pd.DataFrame):
+        frame = batch
+    elif isinstance(batch, np.ndarray):
+        if batch.dtype.names is None:
+            raise TypeError("NumPy 입력은 필드명이 있는 record array여야 합니다.")
+        frame = pd.DataFrame.from_records(batch)
+    elif isinstance(batch, dict):
+        frame = pd.DataFrame([batch])
+    else:
+        frame = pd.DataFrame.from_records(list(batch))
+    return frame.reindex(columns=raw_cols)
+
+
+@instrumentation.timed("input_frame")
+def build_input_frame(batch, res):
+    """배치 입력을 모델 입력 DataFrame으로 정규화.
+
+    - 성별: schema gender_mapping (대문자 문자열 기준, 미정의 값은 결측)
+    - 내원시 반응: 공백 제거, 빈 값/nan/none 은 결측
+    - 나머지 수치형: float 변환 (변환 불가 값은 ValueError)
+    """
+    raw_cols = res['raw_cols']
+    frame = _to_frame(batch, raw_cols).copy()
+    gm = res.get('gender_mapping', {'M': 1, 'F': 0})
+
+    for col in raw_cols:
+        s = frame[col]
+        if col == "성별":
+            frame[col] = s.astype(str).str.upper().map(gm).astype(float)
+        elif col == "내원시 반응":
+            s = s.astype(str).str.strip()
+            frame[col] = s.where(~s.str.lower().isin(MISSING_TOKENS), np.nan)
+        else:
+            frame[col] = s.astype(float)
+    return frame
+
+
+def _reaction_categories(res):
+    return list(res.get('category_options', {}).get("내원시 반응", []))
+
+
+def _encode_value(col, value, gm, cat_index):
+    if col == "성별":
+        return gm.get(str(value).upper(), np.nan)
+    if col == "내원시 반응":
+        s = str(value).strip()
+        if s.lower() in MISSING_TOKENS:
+            return np.nan
+        return cat_index.get(s, -1)
+    return np.nan if value is None else float(value)
+
+
+def value_encoder(res):
+    """(col, value) -> encode_matrix 와 같은 규칙의 float 인코딩 함수 (스트리밍 단건 갱신용)."""
+    gm = res.get('gender_mapping', {'M': 1, 'F': 0})
+    cat_index = {c: i for i, c in enumerate(_reaction_categories(res))}
+    return lambda col, value: float(_encode_value(col, value, gm, cat_index))
+
+
+def matrix_to_frame(X, res):
+    """encode_matrix 행렬 -> 모델 입력 DataFrame (compiled scorer 가 없을 때 predict_proba 용)."""
+    import pandas as pd
+    raw_cols = res['raw_cols']
+    cats = np.array(_reaction_categories(res) + ["__unknown__"], dtype=object)
+    frame = pd.DataFrame(np.asarray(X, dtype=float), columns=raw_cols)
+    if "내원시 반응" in frame:
+        codes = frame["내원시 반응"].to_numpy()
+        missing = np.isnan(codes)
+        decoded = cats[np.where(missing, -1, codes).astype(np.intp)]
+        decoded[missing] = np.nan
+        frame["내원시 반응"] = decoded
+    return frame
+
+
+@instrumentation.timed("encode")
+def encode_matrix(batch, res, dtype=np.float64):
+    """배치 입력을 raw_cols 순서의 수치 행렬 (n, 11)로 인코딩 (compiled scorer 입력).
+
+    정규화 규칙은 build_input_frame 과 같고, 추가로
+    - 내원시 반응: schema category_options 내 인덱스 (결측 NaN, 미정의 값 -1)
+    dict 입력은 pandas를 거치지 않고 바로 채워서 단일 행 지연을 최소화합니다.
+    """
+    raw_cols = res['raw_cols']
+    gm = res.get('gender_mapping', {'M': 1, 'F': 0})
+    cat_index = {c: i for i, c in enumerate(_reaction_categories(res))}
+
+    if isinstance(batch, dict):
+        batch = [batch]
+    if isinstance(batch, (list, tuple)) and all(isinstance(r, dict) for r in batch):
+        out = np.empty((len(batch), len(raw_cols)), dtype=dtype)
+        for i, record in enumerate(batch):
+            for j, col in enumerate(raw_cols):
+                out[i, j] = _encode_value(col, record.get(col, np.nan), gm, cat_index)
+        return out
+
+    frame = _to_frame(batch, raw_cols)
+    out = np.empty((len(frame), len(raw_cols)), dtype=dtype)
+    for j, col in enumerate(raw_cols):
+        s = frame[col]
+        if col == "성별":
+            out[:, j] = s.astype(str).str.upper().map(gm).astype(float).to_numpy()
+        elif col == "내원시 반응":
+            s = s.astype(str).str.strip()
+            codes = s.map(cat_index).fillna(-1).astype(float)
+            out[:, j] = codes.where(~s.str.lower().isin(MISSING_TOKENS), np.nan).to_numpy()
+        else:
+            out[:, j] = s.to_numpy(dtype=float, na_value=np.nan)
+    return out
+
+
+    # --------------------------------------------------------------------------------
+# 3. 위험군 / 상위 % 판정 (벡터화)
+    # --------------------------------------------------------------------------------
+def assign_risk_group(raw_scores, cutoff_top20, cutoff_top40):
+    """cutoff 기준 고/중/저 위험군 판정."""
+    raw_scores = np.asarray(raw_scores, dtype=float)
+    return np.where(raw_scores >= cutoff_top20, RISK_HIGH,
+                    np.where(raw_scores >= cutoff_top40, RISK_MID, RISK_LOW)).astype(object)
+
+
+def top_percent(raw_scores, scores_sorted):
+    """학습 분포 기준 '상위 %' (0~100). 기준 분포가 없으면 NaN."""
+    raw_scores = np.asarray(raw_scores, dtype=float)
+    n = 0 if scores_sorted is None else len(scores_sorted)
+    if not n:
+        return np.full(raw_scores.shape, np.nan)
+    perc = np.searchsorted(scores_sorted, raw_scores, side="right") / n * 100.0
+    return np.clip(100.0 - perc, 0.0, 100.0)
+
+
+@instrumentation.timed("percentile")
+def lookup_top_percent(raw_scores, res):
+    """res 의 percentile index 로 상위 % 계산: 정렬 점수가 있으면 정확값, 없으면 sketch 근사."""
+    scores_sorted = res.get('train_scores_sorted')
+    sketch = res.get('percentile_sketch')
+    if scores_sorted is None and sketch is not None:
+        return sketch.top_percent(raw_scores)
+    return top_percent(raw_scores, scores_sorted)
+
+
+def display_scores(raw_scores):
+    """표시용(0~99): 확률이 아니라 상대 점수 표시(그대로 스케일). 점수 없음(NaN)은 -1."""
+    raw_scores = np.asarray(raw_scores, dtype=float)
+    return np.where(np.isnan(raw_scores), -1, np.clip(np.rint(np.nan_to_num(raw_scores) * 100), 0, 99)).astype(int)
+
+
+def score_results(raw, res, input_error=None, X=None):
+    """raw 점수 배열 -> RESULT_COLUMNS 배열 dict.
+
+    input_error: 행별 검증 오류 code (validation). 0 이 아닌 행은 raw 가 NaN 이고 위험군 RISK_INVALID.
+    X: 낙상 점수에 쓴 인코딩 행렬. res['sore'] 가 있으면 같은 행렬로 욕창 점수를 함께 계산 (벡터화 1회 추가).
+    res['shadow'] (model_registry.ShadowScorer) 가 있으면 정상 행의 X / raw 를 후보 모델 스코어링 대기열에 넘김
+    (다른 스레드에서 처리하므로 반환을 기다리지 않음).
+    """
+    if res.get('live_sketch') is not None:
+        res['live_sketch'].update_many(raw)  # NaN (격리 행) 은 sketch 가 건너뜀
+    out = {
+        "raw_score": raw,
+        "display_score": display_scores(raw),
+        "risk_group": assign_risk_group(raw, float(res.get('cutoff_top20', 1.0)), float(res.get('cutoff_top40', 1.0))),
+        "top_percent": lookup_top_percent(raw, res),
+        "input_error": np.zeros(len(raw), dtype=np.uint8) if input_error is None else input_error,
+    }
+    if input_error is not None:
+        invalid = input_error != 0
+        if invalid.any():
+            out["risk_group"][invalid] = RISK_INVALID
+            out["top_percent"][invalid] = np.nan
+    shadow = res.get('shadow')
+    if shadow is not None and X is not None:
+        if input_error is None or not input_error.any():
+            shadow.submit(X, raw)
+        else:
+            valid = input_error == 0
+            shadow.submit(X[valid], raw[valid])
+    sore = res.get('sore')
+    if sore is not None and X is not None:
+        out.update(sore.score(X, input_error))
+    else:
+        out.update({"sore_score": np.full(len(raw), -1), "sore_group": np.full(len(raw), None, dtype=object),
+                    "sore_top_percent": np.full(len(raw), np.nan)})
+    return out
+
+
+@instrumentation.timed("predict")
+def predict_matrix(X, res):
+    """encode_matrix 행렬의 raw 점수 (compiled 우선, 없으면 predict_proba)."""
+    compiled = res.get('compiled')
+    if compiled is not None:
+        return compiled.predict_proba1(X)
+    if not len(X):
+        return np.empty(0, dtype=float)
+    return res['model'].predict_proba(matrix_to_frame(X, res))[:, 1].astype(float)
+
+
+def _score_checked(X, codes, res):
+    """검증 code 가 0 인 행만 스코어링. 전부 정상이면 행 복사 없이 한 번에 처리."""
+    valid = codes == 0
+    if valid.all():
+        return score_results(predict_matrix(X, res), res, codes, X)
+    raw = np.full(len(X), np.nan)
+    if valid.any():
+        raw[valid] = predict_matrix(X[valid], res)
+    return score_results(raw, res, codes, X)
+
+
+def score_matrix(X, res):
+    """이미 인코딩된 (n, 11) 행렬 스코어링 (스트리밍/배치 워커 공용).
+
+    res['validator'] 가 있으면 범위 밖 / 미정의 범주 행은 격리 (RISK_INVALID, input_error 에 code).
+    """
+    validator = res.get('validator')
+    if validator is None:
+        return score_results(predict_matrix(X, res), res, X=X)
+    import validation
+    return _score_checked(X, validation.row_codes(validator.check(X)), res)
+
+
+def score_arrays(batch, res):
+    """배치 전체를 한 번의 벡터화 호출로 스코어링 (pandas 결과 생성 없이 NumPy 배열 dict 반환).
+
+    res['validator'] 가 있으면 인코딩과 검증을 같이 하고 (InputValidator.encode), 오류 행은 예외 없이
+    격리합니다 (raw_score NaN, display_score -1, risk_group RISK_INVALID, input_error 에 행 code).
+    res['compiled'] (CompiledScorer) 가 있으면 NumPy 경로, 없으면 model.predict_proba.
+    """
+    validator = res.get('validator')
+    if validator is not None:
+        import validation
+        X, errors = validator.encode(batch)
+        return _score_checked(X, validation.row_codes(errors), res)
+
+    if res.get('compiled') is not None:
+        return score_matrix(encode_matrix(batch, res), res)
+
+    X_input = build_input_frame(batch, res)
+    if len(X_input):
+        raw = res['model'].predict_proba(X_input)[:, 1].astype(float)
+    else:
+        raw = np.empty(0, dtype=float)
+    return score_results(raw, res)
+
+
+def score_batch(batch, res):
+    """score_arrays 결과를 입력과 같은 행 순서/인덱스의 DataFrame으로 반환.
+
+    컬럼: RESULT_COLUMNS (낙상 raw_score ~ input_error, 욕창 sore_score/sore_group/sore_top_percent)
+    """
+    import pandas as pd
+    index = batch.index if isinstance(batch, pd.DataFrame) else None
+    return pd.DataFrame(score_arrays(batch, res), index=index, columns=RESULT_COLUMNS)
+
+
+    # --------------------------------------------------------------------------------
+# 4. compiled scorer 정합성 검증
+    # --------------------------------------------------------------------------------
+PARITY_ATOL = 1e-12
+
+
+def parity_probe(res, n=256, seed=0):
+    """정합성 검증용 입력: 결측/미정의 범주/극단값을 포함한 raw 입력 DataFrame."""
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    scaler_like = {  # 학습 분포 대략 범위 (평균, 표준편차)
+        "중증도분류": (3, 1), "SBP": (137, 25), "DBP": (78, 16), "RR": (18, 3), "PR": (86, 18),
+        "BT": (36.8, 0.7), "나이": (57, 19), "albumin": (4.0, 0.5), "crp": (2.2, 4.8),
+    }
+    frame = pd.DataFrame({c: rng.normal(m, sd * 2, n) for c, (m, sd) in scaler_like.items()})
+    frame["성별"] = rng.choice(["M", "F", "1", "0", "x"], n)
+    frame["내원시 반응"] = rng.choice(_reaction_categories(res) + ["", "None", "unknown", " alert "], n)
+    frame = frame.reindex(columns=res['raw_cols'])
+    # 수치형 결측 (중앙값 대체 경로)
+    for j, col in enumerate(scaler_like):
+        frame.loc[frame.index[j::len(scaler_like) + 3], col] = np.nan
+    return frame
+
+
+def verify_parity(compiled, res, batch=None, atol=PARITY_ATOL):
+    """compiled scorer 와 model.predict_proba 의 최대 절대오차를 확인. atol 초과 시 AssertionError."""
+    batch = parity_probe(res) if batch is None else batch
+    expected = res['model'].predict_proba(build_input_frame(batch, res))[:, 1]
+    got = compiled.predict_proba1(encode_matrix(batch, res))
+    err = float(np.max(np.abs(expected - got))) if len(got) else 0.0
+    if not err <= atol:
+        raise AssertionError(f"compiled scorer 오차 {err:.3e} > {atol:.0e}")
+    return err
@@ -0,0 +1,127 @@
+"""What-if 민감도 분석: 현재 환자의 입력 1~2개를 격자로 바꿔 가며 점수 곡면과 위험군 경계를 계산.
+
+격자 (예: albumin 200 x CRP 200 = 40,000점)는 현재 환자 인코딩 행을 복제해 해당 열만 바꾼 (n, 11)
+행렬 하나로 만들고, scoring.predict_matrix 벡터화 호출 1번으로 스코어링합니다 (live sketch 에는 넣지 않음).
+
+위험군 경계는 해석적으로 풉니다. 모델은 변환 공간에서 선형이므로 (logit = intercept + Σ coef_j · z_j,
+수치형 z = (x − mean) / scale), 다른 입력을 고정하면 수치형 입력 x 하나에 대해
+    logit(x) = logit(x0) + (coef / scale) · (x − x0)
+이고, P = cutoff 가 되는 값은  x* = x0 + (logit(cutoff) − logit(x0)) / (coef / scale)  입니다.
+두 입력이면 경계는 (x, y) 평면의 직선입니다. compiled scorer 가 없으면 (predict_proba 경로) 격자만 계산합니다.
+"""
+import numpy as np
+
+import instrumentation
+import scoring
+
+# 민감도 축으로 쓸 수 있는 입력 (시뮬레이션 패널 수치 입력): raw col -> (표시 이름, 기본 하한, 기본 상한)
+SWEEP_INPUTS = {
+    "albumin": ("Albumin", 1.0, 5.5),
+    "crp": ("CRP", 0.0, 20.0),
+    "SBP": ("SBP", 70.0, 200.0),
+    "DBP": ("DBP", 40.0, 120.0),
+    "PR": ("PR", 40.0, 160.0),
+    "RR": ("RR", 8.0, 40.0),
+    "BT": ("BT", 35.0, 40.0),
+    "중증도분류": ("중증도분류", 1.0, 5.0),
+}
+
+
+def sweep_range(col, current=None):
+    """col 의 기본 격자 범위. 현재 값이 범위 밖이면 포함하도록 넓힘."""
+    _, lo, hi = SWEEP_INPUTS[col]
+    if current is not None and np.isfinite(current):
+        lo, hi = min(lo, float(current)), max(hi, float(current))
+    return lo, hi
+
+
+def logit(p):
+    p = np.asarray(p, dtype=float)
+    with np.errstate(divide="ignore"):
+        return np.log(p) - np.log1p(-p)
+
+
+    # --------------------------------------------------------------------------------
+# 1. 해석해 (compiled scorer 선형식)
+    # --------------------------------------------------------------------------------
+class LinearSolver:
+    """CompiledScorer 파라미터로 수치형 입력별 logit 기울기 / cutoff 교차 값 계산."""
+
+    def __init__(self, compiled, raw_cols):
+        self.compiled = compiled
+        self.raw_cols = list(raw_cols)
+        n_num = len(compiled.num_idx)
+        per_unit = compiled.coef.ravel()[:n_num] / compiled.num_scale
+        self.slopes = {self.raw_cols[j]: float(w) for j, w in zip(compiled.num_idx, per_unit)}
+        self._fill = {self.raw_cols[j]: float(v) for j, v in zip(compiled.num_idx, compiled.num_fill)}
+
+    def anchor(self, x_row, col):
+        """격자 기준점: 현재 값 (결측이면 학습 중앙값 = 모델이 실제로 쓰는 값)."""
+        v = float(x_row[self.raw_cols.index(col)])
+        return self._fill[col] if np.isnan(v) else v
+
+    def crossing(self, x_row, col, prob):
+        """다른 입력을 고정했을 때 P(낙상) = prob 가 되는 col 값. 기울기가 0 이면 NaN."""
+        slope = self.slopes[col]
+        if slope == 0:
+            return float("nan")
+        logit0 = float(self.compiled.decision_function(x_row)[0])
+        return self.anchor(x_row, col) + (float(logit(prob)) - logit0) / slope
+
+    def boundary(self, x_row, x_col, y_col, prob, x_values):
+        """2축 격자에서 P = prob 경계선: x_values 각각의 y 값. y 기울기가 0 이면 NaN."""
+        sx, sy = self.slopes[x_col], self.slopes[y_col]
+        x_values = np.asarray(x_values, dtype=float)
+        if sy == 0:
+            return np.full(x_values.shape, np.nan)
+        logit0 = float(self.compiled.decision_function(x_row)[0])
+        x0, y0 = self.anchor(x_row, x_col), self.anchor(x_row, y_col)
+        return y0 + (float(logit(prob)) - logit0 - sx * (x_values - x0)) / sy
+
+
+def solver_for(res):
+    """res 의 compiled scorer 로 LinearSolver (없으면 None)."""
+    return LinearSolver(res['compiled'], res['raw_cols']) if res.get('compiled') is not None else None
+
+
+    # --------------------------------------------------------------------------------
+# 2. 격자 스코어링
+    # --------------------------------------------------------------------------------
+@instrumentation.timed("sensitivity")
+def sweep(res, record, x_col, x_range=None, y_col=None, y_range=None, n=200):
+    """현재 환자(record) 기준 x_col (, y_col) 격자 점수와 위험군 경계.
+
+    반환 dict:
+        x, y          격자 축 값 (y_col 이 없으면 y 는 None)
+        raw           raw 점수 (ny, nx) / 1축이면 (nx,)
+        current       현재 입력 값 {col: 값}
+        crossings     {col: {"top20": 값, "top40": 값}} 다른 입력 고정 시 경계 값 (해석해 없으면 빈 dict)
+        boundaries    2축: {"top20": y 배열, "top40": y 배열} (x 에 대응, 해석해 없으면 빈 dict)
+    """
+    x_row = scoring.encode_matrix([record], res)[0]
+    cols = res['raw_cols']
+    xj = cols.index(x_col)
+    x = np.linspace(*(x_range or sweep_range(x_col, x_row[xj])), n)
+    if y_col is None:
+        X = np.repeat(x_row[None, :], n, axis=0)
+        X[:, xj] = x
+        y = None
+        raw = scoring.predict_matrix(X, res)
+    else:
+        yj = cols.index(y_col)
+        y = np.linspace(*(y_range or sweep_range(y_col, x_row[yj])), n)
+        X = np.repeat(x_row[None, :], n * n, axis=0)
+        X[:, xj] = np.tile(x, n)
+        X[:, yj] = np.repeat(y, n)
+        raw = scoring.predict_matrix(X, res).reshape(n, n)
+
+    cutoffs = {"top20": float(res.get('cutoff_top20', 1.0)), "top40": float(res.get('cutoff_top40', 1.0))}
+    solver = solver_for(res)
+    current = {c: float(x_row[cols.index(c)]) for c in (x_col, y_col) if c is not None}
+    crossings, boundaries = {}, {}
+    if solver is not None:
+        crossings = {c: {k: solver.crossing(x_row, c, p) for k, p in cutoffs.items()} for c in current}
+        if y_col is not None:
+            boundaries = {k: solver.boundary(x_row, x_col, y_col, p, x) for k, p in cutoffs.items()}
+    return {"x": x, "y": y, "raw": raw, "current": current, "crossings": crossings, "boundaries": boundaries,
+            "cutoffs": cutoffs}
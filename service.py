@@ -0,0 +1,216 @@
+"""asyncio HTTP 스코어링 서비스 (요청 micro-batching).
+
+대시보드 밖의 병원 시스템이 같은 모델을 호출할 수 있도록 load_resources 로 올린 모델을
+HTTP/1.1 (keep-alive) 로 제공합니다. 동시에 들어온 단일 환자 요청을 MicroBatcher 가
+최대 max_batch 건 / 최대 max_wait_ms 동안 모아 한 번의 벡터화 호출로 스코어링합니다.
+
+    POST /score    본문: raw_input_cols 키 dict  (예: {"성별": "M", "나이": 78, "SBP": 120, ...})
+                   또는 대시보드 형식 {"patient": {"gender": "M", "age": 78}, "inputs": {"sim_sbp": 120, ...}}
+                   (calculate_risk_score 와 같은 scoring.session_record 로 구성)
+                   응답: {"raw_score", "display_score", "risk_group", "top_percent", "sore_score", "sore_group"}
+                   입력 검증 실패 (숫자 아님 / 범위 밖 / 정의되지 않은 범주)는 400 {"error", "fields"}
+    GET  /healthz
+    GET  /models   model_registry 현재 primary / shadow 버전과 위험군 일치 통계
+
+모델은 model_registry 의 primary 로 스코어링하고 (요청마다 active() 확인 -> 재시작 없이 교체),
+요청은 검증에 쓴 resources 와 함께 대기열에 들어가 같은 모델 버전으로 스코어링됩니다 (교체 직후 batch 는 버전별로 나눠 처리).
+벡터화 스코어링은 executor 스레드에서 실행하므로 큰 batch 중에도 event loop 는 연결을 계속 받습니다.
+shadow 후보는 같은 batch 를 별도 스레드에서 스코어링합니다 (응답 지연에 포함되지 않음).
+
+실행: python service.py --port 8502 --max-batch 64 --max-wait-ms 2
+"""
+import argparse
+import asyncio
+import json
+
+import numpy as np
+
+import model_registry
+import scoring
+import validation
+
+
+    # --------------------------------------------------------------------------------
+# 1. Micro-batching
+    # --------------------------------------------------------------------------------
+class MicroBatcher:
+    """단건 요청을 모아 score_matrix 한 번으로 처리. max_batch=1 이면 batching 끔."""
+
+    def __init__(self, res, max_batch=64, max_wait_ms=2.0, registry=None):
+        self.res = res
+        self.registry = registry  # 있으면 batch 마다 registry.active() (모델 교체 반영)
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait_ms / 1e3
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.rows = 0
+        self._worker = None
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def score(self, record):
+        """record(raw_input_cols dict) 1건 스코어링. 인코딩/검증 오류는 호출자에게 바로 ValueError (InputError)."""
+        res = self.resources()
+        validator = res.get('validator')
+        x = validator.encode_record(record) if validator is not None else scoring.encode_matrix([record], res)[0]
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((x, res, future))  # 검증한 resources 로 스코어링 (batch 사이 모델 교체 대비)
+        return await future
+
+    def resources(self):
+        return self.registry.active() if self.registry is not None else self.res
+
+    async def _collect(self):
+        items = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(items) < self.max_batch:
+            if not self.queue.empty():
+                items.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            groups = {}  # 모델 버전 (resources) 별 요청
+            for x, res, f in await self._collect():
+                groups.setdefault(id(res), (res, []))[1].append((x, f))
+            for res, items in groups.values():
+                await self._score_group(loop, res, items)
+
+    async def _score_group(self, loop, res, items):
+        futures = [f for _, f in items]
+        try:
+            out = await loop.run_in_executor(None, scoring.score_matrix, np.vstack([x for x, _ in items]), res)
+        except Exception as e:
+            for f in futures:
+                if not f.done():
+                    f.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(items)
+        for i, f in enumerate(futures):
+            if not f.done():  # 클라이언트 연결 종료로 취소된 요청은 건너뜀
+                tp = float(out["top_percent"][i])
+                f.set_result({
+                    "raw_score": float(out["raw_score"][i]),
+                    "display_score": int(out["display_score"][i]),
+                    "risk_group": out["risk_group"][i],
+                    "top_percent": None if np.isnan(tp) else tp,
+                    "sore_score": int(out["sore_score"][i]),
+                    "sore_group": out["sore_group"][i],
+                })
+
+
+    # --------------------------------------------------------------------------------
+# 2. HTTP
+    # --------------------------------------------------------------------------------
+def request_record(body):
+    """요청 본문 -> raw_input_cols 레코드."""
+    if not isinstance(body, dict):
+        raise ValueError("JSON object 본문이 필요합니다.")
+    if "patient" in body or "inputs" in body:
+        return scoring.session_record(body.get("patient", {}), body.get("inputs", {}))
+    return body
+
+
+def _response(status, payload, keep_alive=True):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}[status]
+    head = (f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("ascii") + body
+
+
+class ScoringService:
+    def __init__(self, res, max_batch=64, max_wait_ms=2.0, registry=None):
+        self.registry = registry
+        self.batcher = MicroBatcher(res, max_batch=max_batch, max_wait_ms=max_wait_ms, registry=registry)
+
+    async def handle(self, method, path, body):
+        if method == "GET" and path == "/healthz":
+            return 200, {"status": "ok", "batches": self.batcher.batches, "rows": self.batcher.rows,
+                         "model_version": self.batcher.resources().get('model_version')}
+        if method == "GET" and path == "/models":
+            if self.registry is None:
+                return 404, {"error": "model registry 를 쓰지 않는 서비스입니다."}
+            return 200, self.registry.summary()
+        if method == "POST" and path == "/score":
+            try:
+                record = request_record(json.loads(body or b"null"))
+                return 200, await self.batcher.score(record)
+            except validation.InputError as e:
+                return 400, {"error": str(e), "fields": e.messages}
+            except (ValueError, TypeError) as e:
+                return 400, {"error": str(e)}
+        return 404, {"error": f"{method} {path} 없음"}
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                method, path, version = (lines[0].split(" ") + ["", "", ""])[:3]
+                headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:] if l)}
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    status, payload = await self.handle(method, path.split("?")[0], body)
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8502):
+        self.batcher.start()
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+
+async def serve(host, port, max_batch, max_wait_ms):
+    registry = model_registry.ModelRegistry()
+    service = ScoringService(registry.active(), max_batch=max_batch, max_wait_ms=max_wait_ms, registry=registry)
+    server = await service.start(host, port)
+    print(f"scoring service: http://{host}:{port} (max_batch={max_batch}, max_wait_ms={max_wait_ms}, "
+          f"primary={registry.primary_version}, shadow={registry.shadow_versions})", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="낙상 위험도 asyncio 스코어링 서비스")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8502)
+    ap.add_argument("--max-batch", type=int, default=64, help="micro-batch 최대 크기 (1 = batching 끔)")
+    ap.add_argument("--max-wait-ms", type=float, default=2.0, help="첫 요청 이후 batch 를 모으는 최대 대기")
+    args = ap.parse_args()
+    asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms))
+
+
+if __name__ == "__main__":
+    main()
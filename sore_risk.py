@@ -0,0 +1,198 @@
+"""욕창 위험도: Braden 척도 근사 규칙 점수 (낙상 점수와 같은 인코딩 행렬에서 벡터화 계산).
+
+Braden 척도 6개 하위척도 (감각인지/습기/활동/이동/영양 1~4점, 마찰·응전력 1~3점, 합계 6~23점,
+낮을수록 위험)를 모델 입력 11개로 근사합니다. 하위척도마다 term 여러 개를 두고 가장 낮은 점수를 씁니다.
+    {"name": "영양", "max": 4, "terms": [{"feature": "albumin", "bins": [2.5, 3.0, 3.5], "scores": [1, 2, 3, 4]}]}
+    {"name": "감각인지", "max": 4, "terms": [{"feature": "내원시 반응", "map": {"unresponsive": 1, ...}}]}
+bins/scores: np.digitize 구간 점수 (bins[i-1] <= x < bins[i] -> scores[i]), map: 범주 값 -> 점수.
+결측 입력은 그 term 을 건너뜁니다 (위험 근거 없음 = 만점). 규칙표는 dashboard_schema.json 의
+"braden_subscales" (없으면 DEFAULT_SUBSCALES), 위험군 cutoff 는 "sore_cutoffs" (없으면 Braden 통상 기준
+<=12 고위험, <=18 중위험 (at risk)).
+
+상위 % 참조: 점수가 6~23 정수이므로 참조 집단의 점수별 인원 (histogram 18칸)만 저장합니다
+(sore_score_ref.npz, FALLGUARD_SORE_REF_PATH). '상위 %' = 참조 집단 중 이 환자보다 점수가 낮은 (더 위험한)
+비율. 참조 파일이 없으면 상위 % 는 NaN 입니다. 만들기:
+    python sore_risk.py encounters.parquet -o sore_score_ref.npz
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+import scoring
+
+SORE_REF_PATH = Path(os.environ.get("FALLGUARD_SORE_REF_PATH") or scoring.BASE_DIR / "sore_score_ref.npz")
+
+MIN_TOTAL, MAX_TOTAL = 6, 23
+
+# 스키마에 braden_subscales 가 없을 때 기본 규칙표 (입력 11개로 근사한 PoC 값, 간호사 Braden 평가 대체 아님)
+DEFAULT_SUBSCALES = [
+    {"name": "감각인지", "max": 4, "terms": [
+        {"feature": "내원시 반응", "map": {"verbal response": 3, "painful response": 2, "unresponsive": 1}}]},
+    {"name": "습기", "max": 4, "terms": [  # 발열 -> 발한
+        {"feature": "BT", "bins": [37.8, 38.5], "scores": [4, 3, 2]}]},
+    {"name": "활동", "max": 4, "terms": [  # 중증도분류 4~5 = 중증
+        {"feature": "중증도분류", "bins": [3, 4, 5], "scores": [4, 3, 2, 1]}]},
+    {"name": "이동", "max": 4, "terms": [
+        {"feature": "나이", "bins": [75, 85], "scores": [4, 3, 2]},
+        {"feature": "내원시 반응", "map": {"painful response": 2, "unresponsive": 1}}]},
+    {"name": "영양", "max": 4, "terms": [
+        {"feature": "albumin", "bins": [2.5, 3.0, 3.5], "scores": [1, 2, 3, 4]}]},
+    {"name": "마찰/응전력", "max": 3, "terms": [
+        {"feature": "내원시 반응", "map": {"verbal response": 2, "painful response": 1, "unresponsive": 1}},
+        {"feature": "나이", "bins": [80], "scores": [3, 2]}]},
+]
+DEFAULT_CUTOFFS = {"high": 12, "mid": 18}  # 합계 <= high 고위험, <= mid 중위험
+
+
+    # --------------------------------------------------------------------------------
+# 1. 규칙 점수
+    # --------------------------------------------------------------------------------
+class SoreScorer:
+    """규칙표를 (컬럼, 구간/lookup 배열) 로 컴파일해 두고 encode 행렬 (n, 11) 에 대해 한 번에 평가."""
+
+    def __init__(self, subscales, cutoffs, context, reference=None):
+        self.subscales = [dict(s) for s in subscales]
+        self.names = [s["name"] for s in self.subscales]
+        self.cutoff_high = int(cutoffs["high"])
+        self.cutoff_mid = int(cutoffs["mid"])
+        col_pos = {c: j for j, c in enumerate(context['raw_cols'])}
+        cat_index = {c: i for i, c in enumerate(context.get('category_options', {}).get("내원시 반응", []))}
+
+        self._terms = []  # 하위척도별 [(컬럼, bins|None, 점수 배열)]
+        for s in self.subscales:
+            terms = []
+            for t in s["terms"]:
+                if t["feature"] not in col_pos:
+                    raise ValueError(f"하위척도 '{s['name']}' 의 feature '{t['feature']}' 가 raw_input_cols 에 없습니다.")
+                j = col_pos[t["feature"]]
+                if "map" in t:  # 범주 code -> 점수 lookup. 마지막 칸 = 결측/미정의 (code -1) -> 만점
+                    lut = np.full(len(cat_index) + 1, s["max"], dtype=np.int8)
+                    for value, score in t["map"].items():
+                        if value in cat_index:
+                            lut[cat_index[value]] = score
+                    terms.append((j, None, lut))
+                else:
+                    if len(t["scores"]) != len(t["bins"]) + 1:
+                        raise ValueError(f"하위척도 '{s['name']}': scores 는 bins 보다 1개 많아야 합니다.")
+                    # bins 끝에 +inf 를 붙여 NaN (searchsorted 에서 가장 큼) 이 별도 칸 (만점) 으로 가게 함
+                    terms.append((j, np.append(np.asarray(t["bins"], dtype=float), np.inf),
+                                  np.append(np.asarray(t["scores"], dtype=np.int8), np.int8(s["max"]))))
+            self._terms.append(terms)
+        totals = np.arange(MIN_TOTAL, MAX_TOTAL + 1)
+        self._group_lut = np.where(totals <= self.cutoff_high, scoring.RISK_HIGH,
+                                   np.where(totals <= self.cutoff_mid, scoring.RISK_MID, scoring.RISK_LOW)).astype(object)
+        self.set_reference(reference)
+
+    @classmethod
+    def from_schema(cls, schema, ref_path=SORE_REF_PATH):
+        reference = load_reference(ref_path) if ref_path is not None and Path(ref_path).exists() else None
+        return cls(schema.get("braden_subscales") or DEFAULT_SUBSCALES, schema.get("sore_cutoffs") or DEFAULT_CUTOFFS,
+                   scoring.schema_context(schema), reference)
+
+    def set_reference(self, counts):
+        """참조 histogram (점수 6~23 별 인원) -> 점수별 '더 낮은 점수 비율' 표."""
+        self.reference = None if counts is None else np.asarray(counts, dtype=np.int64)
+        if self.reference is None or not self.reference.sum():
+            self._below_pct = None
+        else:
+            below = np.concatenate([[0], np.cumsum(self.reference)[:-1]])
+            self._below_pct = below / self.reference.sum() * 100.0
+
+    # ---- 평가 ----
+    def _subscales(self, X):
+        """하위척도별 점수 열 (int8) 을 순서대로 yield. 여러 term 이 같은 컬럼을 쓰면 한 번만 준비."""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        cols = {}
+        for s, terms in zip(self.subscales, self._terms):
+            col = np.full(len(X), s["max"], dtype=np.int8) if not terms else None
+            for j, bins, scores in terms:
+                if bins is None:
+                    if ("code", j) not in cols:
+                        cols[("code", j)] = np.nan_to_num(X[:, j], nan=-1.0).astype(np.intp)  # 결측 -> -1 (lut 마지막 칸)
+                    score = scores[cols[("code", j)]]
+                else:
+                    if j not in cols:
+                        cols[j] = np.ascontiguousarray(X[:, j])
+                    score = scores[np.searchsorted(bins, cols[j], side="right")]
+                col = score if col is None else np.minimum(col, score, out=col)
+            yield col
+
+    def subscale_matrix(self, X):
+        """(n, 11) 인코딩 행렬 -> (n, 6) 하위척도 점수 (int8)."""
+        return np.column_stack(list(self._subscales(X))).astype(np.int8, copy=False)
+
+    def totals(self, X):
+        """(n, 11) 인코딩 행렬 -> Braden 합계 (n,) int64."""
+        total = None
+        for col in self._subscales(X):
+            total = col.astype(np.int64) if total is None else np.add(total, col, out=total)
+        return total
+
+    def score(self, X, input_error=None):
+        """(n, 11) 행렬 -> sore_score (Braden 합계, 격리 행 -1), sore_group, sore_top_percent 배열 dict."""
+        total = self.totals(X)
+        idx = np.clip(total, MIN_TOTAL, MAX_TOTAL) - MIN_TOTAL
+        group = self._group_lut[idx]
+        top = self._below_pct[idx] if self._below_pct is not None else np.full(len(total), np.nan)
+        if input_error is not None:
+            invalid = input_error != 0
+            if invalid.any():
+                total[invalid] = -1
+                group[invalid] = scoring.RISK_INVALID
+                top = np.where(invalid, np.nan, top)
+        return {"sore_score": total, "sore_group": group, "sore_top_percent": top}
+
+    def histogram(self, X):
+        """점수 6~23 별 인원 (참조 만들기용)."""
+        total = self.totals(X)
+        return np.bincount(total - MIN_TOTAL, minlength=MAX_TOTAL - MIN_TOTAL + 1)
+
+
+    # --------------------------------------------------------------------------------
+# 2. 참조 분포
+    # --------------------------------------------------------------------------------
+def load_reference(ref_path=SORE_REF_PATH):
+    with np.load(ref_path, allow_pickle=False) as ref:
+        return np.asarray(ref['counts'], dtype=np.int64)
+
+
+def build_reference(path, out_path=SORE_REF_PATH, chunk_rows=100_000, schema_path=scoring.SCHEMA_PATH):
+    """encounter 파일 (CSV/Parquet) 전체의 점수 histogram 을 chunk 단위로 모아 참조 npz 저장. 반환: counts."""
+    import batch_pool
+    import score_reference
+    import validation
+
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        schema = json.load(f)
+    scorer = SoreScorer.from_schema(schema, ref_path=None)
+    validator = validation.InputValidator.from_schema(schema)
+    counts = np.zeros(MAX_TOTAL - MIN_TOTAL + 1, dtype=np.int64)
+    skipped = 0
+    for frame in batch_pool.iter_file_chunks(path, chunk_rows, set(validator.raw_cols)):
+        X, errors = validator.encode(frame)
+        ok = validation.row_codes(errors) == 0
+        skipped += int((~ok).sum())
+        counts += scorer.histogram(X[ok])
+    score_reference._atomic_save(out_path, lambda f: np.savez(f, counts=counts, min_total=MIN_TOTAL, skipped=skipped))
+    return counts
+
+
+def main():
+    ap = argparse.ArgumentParser(description="욕창 (Braden 근사) 점수 참조 분포 만들기")
+    ap.add_argument("input", help="참조 집단 encounter .csv / .parquet (raw_input_cols)")
+    ap.add_argument("-o", "--out", default=str(SORE_REF_PATH))
+    ap.add_argument("--chunk-rows", type=int, default=100_000)
+    args = ap.parse_args()
+    counts = build_reference(args.input, args.out, args.chunk_rows)
+    n = int(counts.sum())
+    dist = " ".join(f"{MIN_TOTAL + i}:{c / max(n, 1) * 100:.1f}%" for i, c in enumerate(counts.tolist()) if c)
+    print(f"{args.out}: {n:,}명 ({dist})")
+
+
+if __name__ == "__main__":
+    main()
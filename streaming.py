@@ -0,0 +1,262 @@
+"""활력징후/검사 이벤트 스트림 수집 + 증분 재스코어링.
+
+모니터(SBP, DBP, PR, RR, BT)와 LIS(albumin, crp), ADT(성별/나이/중증도/내원시 반응) 이벤트를
+generator 또는 asyncio 스트림으로 받아 환자별 최신 feature 행(PatientFeatureStore)에 반영하고,
+입력이 실제로 바뀐 환자만 모아 한 번에 재스코어링합니다. 위험군이 바뀌면
+(예: 저위험 -> 고위험) transition 이벤트를 내보냅니다.
+
+이벤트 형식 (JSON 한 줄 = 이벤트 하나, HL7 피드 대체용 JSONL replay / socket 공용):
+    {"patient_id": "12345678", "ts": 1765500000.0, "SBP": 92, "PR": 118}   # 여러 항목
+    {"patient_id": "12345678", "ts": 1765500060.0, "code": "crp", "value": 7.2}  # OBX 단건
+raw_input_cols 에 없는 키는 무시합니다.
+숫자로 바꿀 수 없는 값 (예: {"code": "crp", "value": "high"}) 이나 정의되지 않은 범주는 예외 없이 그 칸을 NaN 으로
+두고 validation 오류 code 를 표시해, 해당 환자만 위험군 "입력오류" 로 격리합니다 (다음 정상 값이 오면 해제).
+"""
+import asyncio
+import json
+import time
+
+import numpy as np
+
+import scoring
+import validation
+
+EVENT_META_KEYS = ("patient_id", "ts", "code", "value", "type")
+
+
+def event_values(event):
+    """이벤트 -> {raw_col: value}. code/value 단건 형식과 다항목 형식 모두 지원."""
+    if "code" in event:
+        return {event["code"]: event.get("value")}
+    return {k: v for k, v in event.items() if k not in EVENT_META_KEYS}
+
+
+    # --------------------------------------------------------------------------------
+# 1. 환자별 최신 feature 저장소
+    # --------------------------------------------------------------------------------
+class PatientFeatureStore:
+    """환자별 최신 입력을 encode_matrix 형식의 연속 float 행렬 한 개에 보관.
+
+    환자 -> 행 번호 dict 와 (capacity, 11) 배열 (+ 칸별 오류 code), 행별 dirty 플래그/최초 변경 시각만 유지하므로
+    환자 수에 비례하는 메모리(행당 ~100 B)로 동작하고, 스코어링은 dirty 행을 fancy indexing 으로
+    잘라 한 번에 수행합니다.
+    """
+
+    def __init__(self, res, capacity=1024):
+        self.raw_cols = list(res['raw_cols'])
+        self.col_pos = {c: j for j, c in enumerate(self.raw_cols)}
+        self.encode = scoring.value_encoder(res)
+        self.row_of = {}
+        self.patient_ids = []
+        self.X = np.full((capacity, len(self.raw_cols)), np.nan)
+        self.errors = np.zeros((capacity, len(self.raw_cols)), dtype=np.uint8)  # 칸별 validation code (변환 불가/미정의 범주)
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self.pending_since = np.full(capacity, np.nan)  # 미반영 변경의 최초 수신 시각 (perf_counter)
+        self.risk_group = np.full(capacity, None, dtype=object)
+
+    def __len__(self):
+        return len(self.patient_ids)
+
+    def _row(self, patient_id):
+        row = self.row_of.get(patient_id)
+        if row is None:
+            row = len(self.patient_ids)
+            if row == len(self.X):
+                self._grow()
+            self.row_of[patient_id] = row
+            self.patient_ids.append(patient_id)
+        return row
+
+    def _grow(self):
+        cap = len(self.X) * 2
+        X = np.full((cap, self.X.shape[1]), np.nan)
+        X[:len(self.X)] = self.X
+        self.X = X
+        errors = np.zeros((cap, self.errors.shape[1]), dtype=np.uint8)
+        errors[:len(self.errors)] = self.errors
+        self.errors = errors
+        self.dirty = np.concatenate([self.dirty, np.zeros(cap - len(self.dirty), dtype=bool)])
+        self.pending_since = np.concatenate([self.pending_since, np.full(cap - len(self.pending_since), np.nan)])
+        self.risk_group = np.concatenate([self.risk_group, np.full(cap - len(self.risk_group), None, dtype=object)])
+
+    def _encode(self, col, value):
+        """(col, value) -> (인코딩 값, 오류 code). 변환 불가 / 정의되지 않은 성별은 NaN + code (결측은 오류 아님)."""
+        try:
+            new = self.encode(col, value)
+        except (TypeError, ValueError):
+            new = np.nan
+        if new != new and not validation._missing([value])[0]:
+            return new, validation.E_CATEGORY if col == "성별" else validation.E_TYPE
+        return new, validation.E_OK
+
+    def update(self, patient_id, values, received_at=None):
+        """값 반영. 인코딩 값이나 오류 code 가 하나라도 바뀌면 dirty 로 표시하고 True 반환."""
+        row = self._row(str(patient_id))
+        x, err = self.X[row], self.errors[row]
+        changed = False
+        for col, value in values.items():
+            j = self.col_pos.get(col)
+            if j is None:
+                continue
+            new, code = self._encode(col, value)
+            old = x[j]
+            if (new != old and not (new != new and old != old)) or code != err[j]:  # NaN == NaN 은 변경 아님
+                x[j], err[j] = new, code
+                changed = True
+        if changed and not self.dirty[row]:
+            self.dirty[row] = True
+            self.pending_since[row] = time.perf_counter() if received_at is None else received_at
+        return changed
+
+    def take_dirty(self):
+        """dirty 행 번호를 꺼내고 플래그를 지움."""
+        rows = np.flatnonzero(self.dirty[:len(self.patient_ids)])
+        self.dirty[rows] = False
+        return rows
+
+    def latest(self, patient_id):
+        row = self.row_of.get(str(patient_id))
+        return None if row is None else dict(zip(self.raw_cols, self.X[row].tolist()))
+
+
+    # --------------------------------------------------------------------------------
+# 2. 증분 재스코어링
+    # --------------------------------------------------------------------------------
+class StreamingScorer:
+    """이벤트를 store 에 반영하고 max_batch 개 이벤트마다(또는 flush 호출 시) dirty 환자만 재스코어링."""
+
+    def __init__(self, res, max_batch=256, emit_initial=False):
+        self.res = res
+        self.store = PatientFeatureStore(res)
+        self.max_batch = max_batch
+        self.emit_initial = emit_initial
+        self.events_seen = 0
+        self.rows_scored = 0
+        self._since_flush = 0
+
+    def ingest(self, event, received_at=None):
+        self.events_seen += 1
+        self._since_flush += 1
+        return self.store.update(event["patient_id"], event_values(event), received_at)
+
+    def flush(self):
+        """dirty 환자 재스코어링 -> 위험군 transition 목록."""
+        self._since_flush = 0
+        rows = self.store.take_dirty()
+        if not len(rows):
+            return []
+        X = self.store.X[rows]
+        validator = self.res.get('validator')
+        if validator is None:
+            out = scoring.score_matrix(X, self.res)
+        else:  # 변환 불가 칸은 X 에서 NaN (결측과 같음) 이라 store 의 code 를 함께 넘김
+            out = scoring._score_checked(X, validation.row_codes(self.store.errors[rows] | validator.check(X)), self.res)
+        now = time.perf_counter()
+        self.rows_scored += len(rows)
+
+        prev = self.store.risk_group[rows]
+        new = out["risk_group"]
+        self.store.risk_group[rows] = new
+        changed = prev != new
+        if not self.emit_initial:
+            changed &= np.array([p is not None for p in prev])
+
+        transitions = []
+        for i in np.flatnonzero(changed):
+            row = rows[i]
+            transitions.append({
+                "patient_id": self.store.patient_ids[row],
+                "from": prev[i],
+                "to": new[i],
+                "raw_score": float(out["raw_score"][i]),
+                "display_score": int(out["display_score"][i]),
+                "top_percent": float(out["top_percent"][i]),
+                "latency_ms": (now - self.store.pending_since[row]) * 1e3,
+            })
+        self.store.pending_since[rows] = np.nan
+        return transitions
+
+    def process(self, events):
+        """동기 스트림 처리: transition 을 발생 순서대로 yield."""
+        for event in events:
+            self.ingest(event)
+            if self._since_flush >= self.max_batch:
+                yield from self.flush()
+        yield from self.flush()
+
+    async def aprocess(self, events, max_wait_ms=50.0):
+        """asyncio 스트림 처리: max_batch 개 또는 max_wait_ms 가 지나면 flush (유휴 구간에도 지연 상한 보장)."""
+        queue = asyncio.Queue(maxsize=self.max_batch * 4)
+        done = object()
+
+        async def pump():
+            try:
+                async for event in events:
+                    await queue.put((event, time.perf_counter()))
+            finally:
+                await queue.put((done, None))
+
+        pump_task = asyncio.create_task(pump())
+        deadline = None
+        try:
+            while True:
+                if not queue.empty():
+                    item, received_at = queue.get_nowait()  # 밀린 이벤트는 대기 없이 소진
+                elif deadline is None:
+                    item, received_at = await queue.get()
+                else:
+                    try:
+                        item, received_at = await asyncio.wait_for(
+                            queue.get(), max(0.0, deadline - time.perf_counter()))
+                    except asyncio.TimeoutError:
+                        item = None
+                if item is done:
+                    break
+                if item is not None:
+                    self.ingest(item, received_at)
+                    if deadline is None:
+                        deadline = time.perf_counter() + max_wait_ms / 1e3
+                if item is None or self._since_flush >= self.max_batch or time.perf_counter() >= deadline:
+                    deadline = None
+                    for t in self.flush():
+                        yield t
+            for t in self.flush():
+                yield t
+        finally:
+            pump_task.cancel()
+
+
+    # --------------------------------------------------------------------------------
+# 3. 이벤트 소스 (HL7 피드 대체: JSONL 파일 / socket)
+    # --------------------------------------------------------------------------------
+def read_jsonl(path):
+    """JSONL 파일 이벤트 generator (빈 줄 무시)."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def replay_jsonl(path, speed=None):
+    """JSONL 을 asyncio 스트림으로 재생. speed 지정 시 ts 간격/speed 만큼 대기 (None = 최대 속도)."""
+    first_ts = start = None
+    for i, event in enumerate(read_jsonl(path)):
+        if speed and "ts" in event:
+            if first_ts is None:
+                first_ts, start = float(event["ts"]), time.perf_counter()
+            delay = (float(event["ts"]) - first_ts) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif i % 1024 == 0:
+            await asyncio.sleep(0)  # 다른 태스크(flush 타이머 등)에 양보
+        yield event
+
+
+async def read_ndjson_stream(reader):
+    """asyncio.StreamReader (TCP/Unix socket) 의 줄 단위 JSON 이벤트."""
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if line.strip():
+            yield json.loads(line)
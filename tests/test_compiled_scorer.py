@@ -0,0 +1,62 @@
+"""CompiledScorer 와 sklearn 파이프라인 (model.predict_proba) 정합성 (atol 1e-12).
+
+로딩 시 verify_parity 가 보는 probe 1개 외에 여러 seed, 수치형 전부 결측, 미정의/결측 범주를 확인합니다.
+"""
+import numpy as np
+import pytest
+
+import scoring
+from compiled_scorer import CompiledScorer
+
+ATOL = 1e-12
+NUMERIC = ["중증도분류", "SBP", "DBP", "RR", "PR", "BT", "나이", "albumin", "crp"]
+
+
+@pytest.fixture(scope="module")
+def res():
+    return scoring.load_resources(bundle_path=None)  # 원본 joblib 파이프라인 (번들은 model 이 없음)
+
+
+@pytest.fixture(scope="module")
+def compiled(res):
+    return CompiledScorer.from_pipeline(res['model'], scoring._reaction_categories(res), res['raw_cols'])
+
+
+def assert_parity(batch, res, compiled):
+    expected = res['model'].predict_proba(scoring.build_input_frame(batch, res))[:, 1]
+    got = compiled.predict_proba1(scoring.encode_matrix(batch, res))
+    np.testing.assert_allclose(got, expected, rtol=0, atol=ATOL)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3, 4])
+def test_random_inputs(res, compiled, seed):
+    assert_parity(scoring.parity_probe(res, n=512, seed=seed), res, compiled)
+
+
+@pytest.mark.parametrize("col", NUMERIC)
+def test_numeric_column_all_missing(res, compiled, col):
+    batch = scoring.parity_probe(res, n=64, seed=11)
+    batch[col] = np.nan
+    assert_parity(batch, res, compiled)
+
+
+def test_all_numeric_missing(res, compiled):
+    batch = scoring.parity_probe(res, n=64, seed=12)
+    batch[NUMERIC] = np.nan
+    assert_parity(batch, res, compiled)
+
+
+@pytest.mark.parametrize("gender", ["M", "F", "m", "1", "0", "x", "", None])
+@pytest.mark.parametrize("reaction", ["alert", " alert ", "unknown", "", "None", "nan", None])
+def test_unknown_and_missing_categories(res, compiled, gender, reaction):
+    batch = scoring.parity_probe(res, n=16, seed=13)
+    batch["성별"] = gender
+    batch["내원시 반응"] = reaction
+    assert_parity(batch, res, compiled)
+
+
+def test_record_inputs(res, compiled):
+    """dict 레코드 경로 (단일 환자 / HTTP 요청 인코딩)도 같은 값."""
+    records = scoring.parity_probe(res, n=32, seed=14).to_dict("records")
+    records += [{"성별": "x", "나이": 80}, {}]  # 미정의 성별 + 대부분 결측, 전부 결측
+    assert_parity(records, res, compiled)
@@ -0,0 +1,208 @@
+"""대시보드 정적 CSS / HTML 템플릿 (import 시 1번만 구성).
+
+앱 스크립트는 rerun 마다 처음부터 다시 실행되므로, 스크립트 안의 CSS 문자열과 f-string HTML 은
+상호작용마다 다시 만들어집니다. 여기 모듈 상수는 프로세스당 1번 (첫 import) 만 만들어집니다.
+- CSS: 주석/공백을 줄인 <style> 블록. 전체 페이지 실행에서만 내보내고 fragment rerun 에서는 보내지 않음
+- LEGEND_HTML: 고정 범례 (완성된 문자열)
+- *_html(): 미리 만든 str.format 템플릿에 값만 채움 (사용자 입력 문자열은 호출하는 쪽에서 escape)
+"""
+import html as html_lib
+import re
+
+_CSS_SOURCE = """
+<style>
+    @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@300;400;700&display=swap');
+    .stApp { background-color: #1e252b; color: #e0e0e0; font-family: 'Noto Sans KR', sans-serif; }
+
+    /* 헤더 */
+    .header-container {
+        background-color: #263238; padding: 10px 20px; border-radius: 5px;
+        border-top: 3px solid #0288d1; box-shadow: 0 2px 5px rgba(0,0,0,0.3); margin-bottom: 10px;
+    }
+    .header-info-text { font-size: 1.1em; color: #eceff1; margin-right: 15px; }
+
+    /* 디지털 계기판 */
+    .digital-monitor-container {
+        background-color: #000000; border: 2px solid #455a64; border-radius: 8px;
+        padding: 15px; margin-top: 15px; margin-bottom: 5px;
+        box-shadow: inset 0 0 20px rgba(0,0,0,0.9); transition: border 0.3s;
+        display: flex !important; flex-direction: row !important;
+        justify-content: space-around !important; align-items: center !important;
+    }
+    @keyframes blink { 50% { border-color: #ff5252; box-shadow: 0 0 15px #ff5252; } }
+    .alarm-active { animation: blink 1s infinite; border: 2px solid #ff5252 !important; }
+
+    .score-box { text-align: center; width: 45%; display: flex; flex-direction: column; align-items: center; justify-content: center; }
+    .digital-number { font-family: 'Consolas', monospace; font-size: 36px; font-weight: 900; line-height: 1.0; text-shadow: 0 0 10px rgba(255,255,255,0.4); margin-top: 5px; }
+    .monitor-label { color: #90a4ae; font-size: 12px; font-weight: bold; letter-spacing: 1px; }
+    .divider-line { width: 1px; height: 50px; background-color: #444; }
+
+    /* [수정] 알람 박스 디자인 개선 (높이 자동 조절) */
+    .custom-alert-box {
+        position: fixed; 
+        bottom: 30px; 
+        right: 30px; 
+        width: 380px;
+        height: auto; /* 높이 자동 조절 */
+        background-color: #263238; 
+        border-left: 8px solid #ff5252;
+        box-shadow: 0 6px 25px rgba(0,0,0,0.7); 
+        border-radius: 8px;
+        padding: 20px; 
+        z-index: 9999; 
+        animation: slideIn 0.5s ease-out;
+        font-family: 'Noto Sans KR', sans-serif;
+    }
+    @keyframes slideIn { from { transform: translateX(120%); } to { transform: translateX(0); } }
+    
+    .alert-title { color: #ff5252; font-weight: bold; font-size: 1.4em; margin-bottom: 10px; display: flex; align-items: center; gap: 10px; }
+    .alert-content { color: #eceff1; font-size: 1.0em; margin-bottom: 15px; line-height: 1.5; }
+    .alert-factors { background-color: #3e2723; padding: 12px; border-radius: 6px; margin-bottom: 20px; color: #ffcdd2; font-size: 0.95em; border: 1px solid #ff5252; }
+    
+    /* HTML 버튼 스타일링 */
+    a.btn-confirm {
+        display: block; 
+        width: 100%;
+        background-color: #d32f2f; 
+        color: white !important; 
+        text-align: center; 
+        padding: 12px 0; 
+        border-radius: 6px; 
+        font-weight: bold; 
+        font-size: 1.1em;
+        text-decoration: none !important;
+        transition: background-color 0.3s;
+        box-shadow: 0 2px 5px rgba(0,0,0,0.2);
+    }
+    a.btn-confirm:hover { background-color: #b71c1c; transform: translateY(-1px); }
+
+    /* 기타 UI */
+    .note-entry { background-color: #2c3e50; padding: 15px; border-radius: 5px; border-left: 4px solid #0288d1; margin-bottom: 10px; }
+    .risk-tag { display: inline-block; padding: 2px 8px; border-radius: 10px; font-size: 12px; margin: 2px; border: 1px solid #ff5252; color: #ff867c; }
+    .legend-item { display: inline-block; padding: 2px 8px; margin-right: 5px; border-radius: 3px; font-size: 0.75em; font-weight: bold; color: white; text-align: center; }
+    
+    div[data-testid="stDialog"] { background-color: #263238; color: #eceff1; }
+    .stButton > button { background-color: #37474f; color: white; border: 1px solid #455a64; }
+    .stTabs [data-baseweb="tab-list"] { gap: 2px; }
+    .stTabs [data-baseweb="tab"] { background-color: #263238; color: #b0bec5; border-radius: 4px 4px 0 0; }
+    .stTabs [aria-selected="true"] { background-color: #0277bd; color: white; }
+
+/* (수정) Streamlit 버튼을 Confirm 버튼처럼 보이게 */
+div.stButton > button {
+    width: 100%;
+    background-color: #d32f2f;
+    color: white;
+    border: none;
+    padding: 12px 0;
+    border-radius: 6px;
+    font-weight: bold;
+    font-size: 1.1em;
+    box-shadow: 0 2px 5px rgba(0,0,0,0.2);
+    transition: background-color 0.3s, transform 0.2s;
+}
+div.stButton > button:hover {
+    background-color: #b71c1c;
+    transform: translateY(-1px);
+}
+
+</style>
+"""
+
+
+def _minify(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};:,>])\s*", r"\1", css).replace("<style>", "<style>\n").strip()
+
+
+CSS = _minify(_CSS_SOURCE)
+
+LEGENDS = [("수술전", "#e57373"), ("수술중", "#ba68c8"), ("검사후", "#7986cb"), ("퇴원", "#81c784"), ("신규오더", "#ffb74d")]
+LEGEND_HTML = '<div style="display:flex; gap:10px;">' + "".join(
+    f'<span class="legend-item" style="background:{c}">{label}</span>' for label, c in LEGENDS) + '</div>'
+
+_HEADER = """
+<div class="header-container">
+    <div style="display:flex; align-items:center; justify-content:space-between;">
+        <div style="display:flex; align-items:center;">
+            <span style="font-size:1.5em; font-weight:bold; color:white; margin-right:20px;">🏥 SNUH</span>
+            <span class="header-info-text"><span class="header-label">환자명:</span> <b>{name}</b> ({gender}/{age}세)</span>
+            <span class="header-info-text"><span class="header-label">ID:</span> {id}</span>
+            <span class="header-info-text"><span class="header-label">진단명:</span> <span style="color:#4fc3f7;">{diag}</span></span>
+        </div>
+        <div style="color:#b0bec5; font-size:0.9em;">{nurse} 간호사 | {date}</div>
+    </div>
+</div>
+""".format
+
+_MONITOR = """
+<div class="digital-monitor-container {alarm_class}">
+    <div class="score-box">
+        <div class="monitor-label">FALL RISK</div>
+        <div class="digital-number" style="color: {f_color};">{fall_score}</div>
+        <div style="margin-top:6px; font-size:12px; color:#b0bec5;">{percent_text}</div>
+    </div>
+    <div class="divider-line"></div>
+    <div class="score-box">
+        <div class="monitor-label">SORE RISK</div>
+        <div class="digital-number" style="color: {s_color};">{sore_score}</div>
+        <div style="margin-top:6px; font-size:12px; color:#b0bec5;">{sore_text}</div>
+    </div>
+</div>
+""".format
+
+_VITAL = '<div><div style="color:#aaa; font-size:12px;">{label}</div><div style="font-weight:bold; font-size:18px;">{value}</div></div>'.format
+_VITALS = """
+<div style="background-color:#263238; padding:15px; border-radius:8px; margin-bottom:15px;">
+    <div style="display:grid; grid-template-columns: 1fr 1fr; gap:10px; text-align:center;">{cells}</div>
+</div>
+""".format
+
+_RISK_TAG = "<span class='risk-tag'>{}</span>".format
+
+_ALERT = """
+<div class="custom-alert-box">
+    <div class="alert-title">🚨 낙상 고위험 감지! ({fall_score}점)</div>
+    <div class="alert-content">
+        환자의 상태 변화로 인해 낙상 위험도가 급격히 상승했습니다. 즉시 확인이 필요합니다.
+    </div>
+    <div class="alert-factors">
+        <b>[감지된 주요 위험 요인]</b><br>
+        • {factors}
+    </div>
+</div>
+""".format
+
+_NOTE = """
+<div class="note-entry">
+    <div class="note-time">📅 {ts} | 작성자: {writer}</div>
+    <div>{content}</div>
+</div>
+""".format
+
+
+def header_html(pt, nurse, date):
+    return _HEADER(name=pt['name'], gender=pt['gender'], age=pt['age'], id=pt['id'], diag=pt['diag'], nurse=nurse, date=date)
+
+
+def monitor_html(fall_score, sore_score, f_color, s_color, percent_text="", alarm_class="", sore_text=""):
+    return _MONITOR(fall_score=fall_score, sore_score=sore_score, f_color=f_color, s_color=s_color,
+                    percent_text=percent_text, alarm_class=alarm_class, sore_text=sore_text)
+
+
+def vitals_html(vitals):
+    """[(라벨, 값)] -> 2열 활력징후 요약 카드."""
+    return _VITALS(cells="".join(_VITAL(label=label, value=value) for label, value in vitals))
+
+
+def risk_tags_html(labels):
+    return "".join(_RISK_TAG(label) for label in labels)
+
+
+def alert_html(fall_score, factors):
+    return _ALERT(fall_score=fall_score, factors="<br>• ".join(factors) if factors else "복합적 요인")
+
+
+def notes_html(notes):
+    """간호기록 목록 (작성자/내용은 escape)."""
+    return "".join(_NOTE(ts=n['ts'], writer=html_lib.escape(n['writer']), content=html_lib.escape(n['content'])) for n in notes)
@@ -0,0 +1,257 @@
+"""입력 검증/정규화 (schema 기반, 배치 단위 NumPy mask).
+
+모델 입력 11개를 dashboard_schema.json 의 정의대로 검사합니다.
+    - 입력 형식은 schema "input_types" ({"SBP": "number", "성별": "category", ...})
+    - number: 숫자로 변환 가능해야 하고 생리적 허용 범위 안이어야 함
+      범위는 schema "input_ranges" ({"SBP": [40, 300], ...})
+    - category: 성별은 gender_mapping (대문자 기준), 그 외는 category_options 에 있는 값
+    schema 에 input_types / input_ranges 가 없는 외부 아티팩트는 numeric_cols 등과 DEFAULT_RANGES 로 대신합니다.
+결측 (None/NaN/빈 문자열/"nan"/"none")은 오류가 아닙니다 (모델 imputer 가 중앙값/최빈값으로 채움).
+
+InputValidator.encode 는 scoring.encode_matrix 와 같은 (n, 11) 행렬과 함께 칸별 오류 code 행렬
+(n, 11) uint8 을 돌려주고, 변환 불가 값도 예외 대신 code 로 표시합니다. 오류 code 는 bit flag 이며
+행 code (row_codes) 는 그 행 칸 code 의 OR 입니다. 0 이면 정상 행.
+scoring.score_arrays / score_matrix 는 오류 행을 스코어링하지 않고 위험군 RISK_INVALID 로 격리합니다.
+"""
+import json
+
+import numpy as np
+
+import scoring
+
+E_OK = 0
+E_TYPE = 1       # 숫자로 변환 불가 (예: CRP "양성")
+E_RANGE = 2      # 생리적 허용 범위 밖 / inf (예: BT 3.65)
+E_CATEGORY = 4   # 정의되지 않은 범주 (성별 gender_mapping, 내원시 반응 category_options)
+
+ERROR_LABELS = {E_TYPE: "숫자 아님", E_RANGE: "범위 밖", E_CATEGORY: "정의되지 않은 값"}
+INPUT_TYPES = ("number", "category")
+
+# schema 에 input_ranges 가 없는 외부 아티팩트용 (저장소 schema 와 같은 값: 측정 오류/단위 착오를 거르는 넓은 범위, 임상 기준 아님)
+DEFAULT_RANGES = {
+    "중증도분류": (1, 5),
+    "SBP": (40, 300),
+    "DBP": (20, 200),
+    "RR": (4, 80),
+    "PR": (20, 250),
+    "BT": (30.0, 45.0),
+    "나이": (0, 120),
+    "albumin": (0.5, 7.0),
+    "crp": (0.0, 200.0),
+}
+
+
+class InputError(ValueError):
+    """단건 입력 검증 실패 (대시보드 단일 환자 / HTTP 요청). errors: 칸별 code (11,), messages: describe 결과."""
+
+    def __init__(self, messages, errors):
+        super().__init__("입력값 오류: " + "; ".join(messages))
+        self.messages = messages
+        self.errors = errors
+
+
+def schema_types(schema):
+    """schema -> {컬럼: "number" | "category"}. input_types 가 없으면 binary/categorical_cols 를 category 로."""
+    types = schema.get("input_types")
+    if types:
+        return dict(types)
+    categorical = set(schema.get("binary_cols", [])) | set(schema.get("categorical_cols", []))
+    return {c: "category" if c in categorical else "number" for c in schema.get("raw_input_cols", [])}
+
+
+def row_codes(errors):
+    """칸별 오류 code (n, 11) -> 행 code (n,) (칸 code 의 OR)."""
+    errors = np.asarray(errors, dtype=np.uint8)
+    if errors.ndim == 1:
+        errors = errors.reshape(1, -1)
+    return np.bitwise_or.reduce(errors, axis=1) if errors.shape[1] else np.zeros(len(errors), dtype=np.uint8)
+
+
+def _missing(values):
+    """object 배열 -> 결측 mask (None/NaN/빈 문자열/nan/none 문자열)."""
+    out = np.zeros(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        if v is None or (isinstance(v, float) and v != v):
+            out[i] = True
+        elif isinstance(v, str) and v.strip().lower() in scoring.MISSING_TOKENS:
+            out[i] = True
+    return out
+
+
+def _gender_key(v):
+    if isinstance(v, float) and v.is_integer():  # 결측이 섞인 CSV 숫자 컬럼 (1.0 / 0.0)
+        return str(int(v))
+    return str(v).upper()
+
+
+def _reaction_key(v):
+    return str(v).strip()
+
+
+def _encode_numeric(values, records):
+    """수치 입력 -> (float 배열, 변환 불가 mask). 숫자 dtype 이면 그대로, object 면 결측과 변환 불가를 구분."""
+    if values.dtype.kind in "fiub":
+        return values.astype(np.float64), np.zeros(len(values), dtype=bool)
+    if records:  # dict 입력 (단일 환자 등 소량): pandas 없이 변환
+        x = np.empty(len(values), dtype=np.float64)
+        for i, v in enumerate(values.tolist()):
+            try:
+                x[i] = np.nan if v is None else float(v)
+            except (TypeError, ValueError):
+                x[i] = np.nan
+    else:
+        import pandas as pd
+        x = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    bad = np.isnan(x)
+    idx = np.flatnonzero(bad)
+    if len(idx):  # NaN 칸만 원래 값이 결측이었는지 확인
+        bad[idx] = ~_missing(values[idx])
+    return x, bad
+
+
+def _encode_category(values, index, key, records):
+    """범주 입력 -> (code 배열, 정의되지 않은 값 mask). 결측은 NaN (오류 아님).
+
+    DataFrame 입력은 pd.factorize 로 고유값만 mapping 하므로 행 수가 많아도 Python 루프는 고유값 수만큼입니다.
+    """
+    if records:
+        x = np.fromiter((index.get(key(v), np.nan) for v in values.tolist()), dtype=np.float64, count=len(values))
+        bad = np.isnan(x)
+        idx = np.flatnonzero(bad)
+        if len(idx):
+            bad[idx] = ~_missing(values[idx])
+        return x, bad
+    import pandas as pd
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)  # None/NaN -> -1
+    uniques = np.asarray(uniques, dtype=object)
+    mapped = np.array([index.get(key(u), np.nan) for u in uniques.tolist()] + [np.nan], dtype=np.float64)
+    missing = np.append(_missing(uniques), True)
+    x = mapped[codes]  # code -1 -> 마지막 (결측)
+    return x, np.isnan(x) & ~missing[codes]
+
+
+class InputValidator:
+    """schema 를 (컬럼 인덱스, 하한, 상한) 배열과 범주 index 로 컴파일해 두고 배치 단위로 검사."""
+
+    def __init__(self, ranges, context, types=None):
+        self.context = context  # encode_matrix 용 (raw_cols, gender_mapping, category_options)
+        self.raw_cols = list(context['raw_cols'])
+        types = types or {}
+        self.types = {c: types.get(c, "category" if c in ("성별", "내원시 반응") else "number") for c in self.raw_cols}
+        for c, t in self.types.items():
+            if t not in INPUT_TYPES:
+                raise ValueError(f"input_types '{c}': 지원하지 않는 형식 {t!r} ({', '.join(INPUT_TYPES)})")
+            if t == "category" and c != "성별" and c not in context.get('category_options', {}):
+                raise ValueError(f"input_types '{c}' 가 category 인데 category_options 가 없습니다.")
+        self.ranges = {c: (float(lo), float(hi)) for c, (lo, hi) in ranges.items()
+                       if c in self.raw_cols and self.types[c] == "number"}
+        col_pos = {c: j for j, c in enumerate(self.raw_cols)}
+        self._range_cols = np.array([col_pos[c] for c in self.ranges], dtype=np.intp)
+        self._lo = np.array([lo for lo, _ in self.ranges.values()], dtype=float)
+        self._hi = np.array([hi for _, hi in self.ranges.values()], dtype=float)
+        self._gm = {str(k).upper(): v for k, v in context.get('gender_mapping', {'M': 1, 'F': 0}).items()}
+        # category 컬럼 위치 -> (값 -> code, key 정규화). 성별은 gender_mapping, 그 외는 category_options 인덱스
+        self._categories = {}
+        for c, t in self.types.items():
+            if t == "category":
+                index = self._gm if c == "성별" else {v: i for i, v in enumerate(context['category_options'][c])}
+                self._categories[col_pos[c]] = (index, _gender_key if c == "성별" else _reaction_key)
+        self._reaction = col_pos.get("내원시 반응") if self.types.get("내원시 반응") == "category" else None
+
+    @classmethod
+    def from_schema(cls, schema):
+        ranges = schema.get("input_ranges") or DEFAULT_RANGES
+        return cls(ranges, scoring.schema_context(schema), schema_types(schema))
+
+    # ---- 인코딩 + 검사 ----
+    def encode(self, batch):
+        """배치 입력 -> (X (n, 11) float, errors (n, 11) uint8). 예외 없이 모든 행을 처리.
+
+        X 는 encode_matrix 와 같은 규칙이고, 변환 불가 값은 NaN 입니다 (errors 에 E_TYPE).
+        """
+        if isinstance(batch, dict):
+            batch = [batch]
+        if isinstance(batch, (list, tuple)) and all(isinstance(r, dict) for r in batch):
+            columns = {c: np.array([r.get(c) for r in batch], dtype=object) for c in self.raw_cols}
+            n = len(batch)
+        else:
+            frame = scoring._to_frame(batch, self.raw_cols)
+            columns = {c: frame[c].to_numpy() for c in self.raw_cols}
+            n = len(frame)
+
+        X = np.empty((n, len(self.raw_cols)), dtype=np.float64)
+        errors = np.zeros((n, len(self.raw_cols)), dtype=np.uint8)
+        records = isinstance(batch, (list, tuple))
+        for j, col in enumerate(self.raw_cols):
+            values = columns[col]
+            if j in self._categories:
+                X[:, j], bad = _encode_category(values, *self._categories[j], records)
+                errors[bad, j] = E_CATEGORY
+            else:
+                X[:, j], bad = _encode_numeric(values, records)
+                errors[bad, j] = E_TYPE
+        errors |= self.check(X)
+        return X, errors
+
+    def encode_record(self, record):
+        """단건 record -> 인코딩 행 (11,). 오류가 있으면 InputError (칸별 code + 메시지).
+
+        단일 환자 경로 (대시보드 rerun / HTTP 요청) 지연을 위해 배열 없이 값 단위로 처리합니다 (규칙은 encode 와 같음).
+        """
+        x = np.empty(len(self.raw_cols), dtype=np.float64)
+        errors = np.zeros(len(self.raw_cols), dtype=np.uint8)
+        for j, col in enumerate(self.raw_cols):
+            v = record.get(col)
+            if j in self._categories:
+                index, key = self._categories[j]
+                x[j] = index.get(key(v), np.nan)
+                if x[j] != x[j] and not _missing([v])[0]:
+                    errors[j] = E_CATEGORY
+                continue
+            try:
+                x[j] = np.nan if v is None else float(v)
+            except (TypeError, ValueError):
+                x[j] = np.nan
+                errors[j] = E_TYPE if not _missing([v])[0] else E_OK
+                continue
+            r = self.ranges.get(col)
+            if r is not None and not r[0] <= x[j] <= r[1] and x[j] == x[j]:
+                errors[j] = E_RANGE
+        if errors.any():
+            raise InputError(self.describe(errors, record), errors)
+        return x
+
+    def check(self, X):
+        """이미 인코딩된 행렬 (n, 11) -> 칸별 오류 code. 범위 밖/inf 와 미정의 범주 code (-1) 를 표시."""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        errors = np.zeros(X.shape, dtype=np.uint8)
+        if len(self._range_cols):
+            V = X[:, self._range_cols]
+            errors[:, self._range_cols] = np.where((V < self._lo) | (V > self._hi) | np.isinf(V), E_RANGE, E_OK)  # NaN 은 결측
+        if self._reaction is not None:
+            errors[X[:, self._reaction] < 0, self._reaction] |= E_CATEGORY
+        return errors
+
+    # ---- 표시 ----
+    def describe(self, error_row, record=None):
+        """한 행 칸별 code -> ["SBP: 범위 밖 (40~300)", ...] (record 를 넘기면 입력 값도 표시)."""
+        messages = []
+        for j in np.flatnonzero(np.asarray(error_row)):
+            col = self.raw_cols[j]
+            label = ", ".join(text for code, text in ERROR_LABELS.items() if error_row[j] & code)
+            value = f" {record.get(col)!r}" if record is not None else ""
+            bound = f" ({self.ranges[col][0]:g}~{self.ranges[col][1]:g})" if error_row[j] & E_RANGE else ""
+            messages.append(f"{col}{value}: {label}{bound}")
+        return messages
+
+    def summary(self, errors):
+        """배치 오류 요약: 컬럼 -> 오류 행 수 (오류 없는 컬럼 제외)."""
+        counts = (np.asarray(errors) != 0).sum(axis=0)
+        return {c: int(k) for c, k in zip(self.raw_cols, counts.tolist()) if k}
+
+
+def load_validator(schema_path=scoring.SCHEMA_PATH):
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        return InputValidator.from_schema(json.load(f))